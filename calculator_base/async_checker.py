@@ -0,0 +1,111 @@
+"""
+asyncio 接口
+把 can_win / is_ready / 番数计算放到执行器（线程池或进程池）中运行，不阻塞事件循环
+
+- 相同的请求（手牌只是顺序不同也算相同）正在计算时，后来的请求直接等待
+  同一个结果，不重复计算（single-flight）
+- 等待中的请求可以取消；某个计算的所有等待者都取消后，计算也被取消
+  （还没开始的直接撤销；已经在执行器中运行的无法中断，结果被丢弃）
+
+用法：
+    checker = AsyncArithmeticMahjong(ArithmeticMahjong(), executor=pool)
+    success, groups, win_type, fan_info = await checker.acan_win(hand)
+
+注意：同时等待同一个请求的调用者拿到的是同一个结果对象，不要修改它
+"""
+
+import asyncio
+from functools import partial
+
+from calculator_base.fingerprint import canonical_key
+
+
+class _Flight:
+    """一个正在进行的计算"""
+    __slots__ = ('future', 'waiters')
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+class AsyncArithmeticMahjong:
+    """
+    ArithmeticMahjong 的 asyncio 包装
+
+    参数：
+        mjong: ArithmeticMahjong对象（默认进阶规则）
+        executor: 执行计算的Executor（默认使用事件循环的默认线程池）；
+                  使用进程池时 mjong 要能被序列化（不要带 result_cache）
+
+    同一个对象只在一个事件循环中使用
+    """
+
+    def __init__(self, mjong=None, executor=None):
+        if mjong is None:
+            from calculator_base.mahjong_checker import ArithmeticMahjong
+            mjong = ArithmeticMahjong()
+        self.mjong = mjong
+        self.executor = executor
+        self.coalesced = 0  # 合并到已有计算的请求数
+        self._inflight = {}  # {键: _Flight}
+
+    @property
+    def inflight(self):
+        """正在进行的计算数量"""
+        return len(self._inflight)
+
+    def _forget(self, key, flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    async def _single_flight(self, key, func):
+        """相同键的请求共用一个计算，所有等待者都取消时取消计算"""
+        flight = self._inflight.get(key)
+        if flight is None:
+            loop = asyncio.get_running_loop()
+            flight = _Flight(loop.run_in_executor(self.executor, func))
+            self._inflight[key] = flight
+            flight.future.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # shield：一个等待者被取消不影响其他等待者
+            return await asyncio.shield(flight.future)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.future.done():
+                flight.future.cancel()
+                self._forget(key, flight)
+
+    async def acan_win(self, hand, winning_method=None, has_melded=False):
+        """异步的 can_win，参数和返回值相同"""
+        key = self.mjong._result_key('can_win', hand, (winning_method, has_melded))
+        return await self._single_flight(
+            key, partial(self.mjong.can_win, list(hand), winning_method, has_melded))
+
+    async def ais_ready(self, hand, return_details=False):
+        """异步的 is_ready，参数和返回值相同"""
+        key = self.mjong._result_key('is_ready', hand, (return_details,))
+        return await self._single_flight(
+            key, partial(self.mjong.is_ready, list(hand), return_details))
+
+    async def acalculate_fan(self, hand, min_fan=None):
+        """
+        异步计算番数
+
+        参数：
+            hand: Hand对象（已经胡牌，例如 parse_mode1_already_won 的结果）
+            min_fan: 起胡番数（默认使用 mjong.min_fan）
+
+        返回：
+            FanResults对象
+        """
+        from fan_calculator.fan_calculator import calculate_fan
+
+        if min_fan is None:
+            min_fan = self.mjong.min_fan
+        key = repr(('calculate_fan', min_fan)).encode() + canonical_key(hand)
+        return await self._single_flight(key, partial(calculate_fan, hand, min_fan))
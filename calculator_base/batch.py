@@ -0,0 +1,84 @@
+"""
+批量判定模块
+用线程池（默认）或任意 Executor 批量执行 can_win / is_ready，结果按输入顺序返回
+
+在自由线程（free-threaded，无GIL）的 CPython 3.13t 上，线程池应该可以用满多个核，
+而且不需要像进程池那样序列化手牌和结果（3.13t 上的加速还没有测过，
+见 benchmarks/thread_vs_process.py）。判定过程中共享的只有只读的表
+（formula_table 中构建好的表都是不可变的），可以放心在多个线程中共用
+同一个 ArithmeticMahjong 对象。
+"""
+
+import sys
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+
+
+def is_free_threaded():
+    """当前解释器是否在无GIL模式下运行"""
+    if not sysconfig.get_config_var('Py_GIL_DISABLED'):
+        return False
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is None or not is_gil_enabled()
+
+
+def _call(mjong, method, hand, kwargs):
+    """执行一次判定（在模块顶层，进程池也可以使用）"""
+    return getattr(mjong, method)(hand, **kwargs)
+
+
+def _warm_up(mjong):
+    """在提交任务之前先构建共享的表，避免多个线程同时等待构建"""
+    from calculator_base.formula_table import (
+        get_formula_set, get_partial_formula_set, get_group_completion_index,
+    )
+    get_formula_set(mjong.require_sum_gte_10)
+    get_partial_formula_set(mjong.require_sum_gte_10)
+    get_group_completion_index(mjong.require_sum_gte_10)
+
+
+def run_batch(method, hands, mjong=None, max_workers=None, executor=None, chunksize=1, **kwargs):
+    """
+    批量调用 ArithmeticMahjong 的判定方法
+
+    参数：
+        method: 方法名，'can_win' 或 'is_ready'
+        hands: 手牌列表
+        mjong: ArithmeticMahjong对象（默认进阶规则），所有线程共用
+        max_workers: 线程数（默认由 ThreadPoolExecutor 决定）
+        executor: 外部传入的Executor（可选，优先于max_workers）；
+                  进程池也可以，但每个任务都要序列化判定器和手牌
+        chunksize: 传给 Executor.map 的分块大小（只对进程池有效）
+        **kwargs: 传给判定方法的其他参数
+
+    返回：
+        结果列表（顺序与 hands 相同）
+    """
+    if method not in ('can_win', 'is_ready'):
+        raise ValueError(f"不支持的方法: {method}")
+    if mjong is None:
+        from calculator_base.mahjong_checker import ArithmeticMahjong
+        mjong = ArithmeticMahjong()
+
+    _warm_up(mjong)
+    hands = list(hands)
+    n = len(hands)
+    args = ([mjong] * n, [method] * n, hands, [kwargs] * n)
+
+    if executor is not None:
+        return list(executor.map(_call, *args, chunksize=chunksize))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_call, *args))
+
+
+def batch_can_win(hands, mjong=None, max_workers=None, executor=None, winning_method=None,
+                  has_melded=False):
+    """批量判断能否胡牌，返回 can_win 结果的列表"""
+    return run_batch('can_win', hands, mjong, max_workers, executor,
+                     winning_method=winning_method, has_melded=has_melded)
+
+
+def batch_is_ready(hands, mjong=None, max_workers=None, executor=None, return_details=False):
+    """批量判断是否听牌，返回 is_ready 结果的列表"""
+    return run_batch('is_ready', hands, mjong, max_workers, executor,
+                     return_details=return_details)
@@ -133,4 +133,27 @@ VALID_NUMBER_TILES = (
 )
 
 # 所有合法的牌（数字 + 符号）
-ALL_TILES = VALID_NUMBER_TILES | SYMBOLS
\ No newline at end of file
+ALL_TILES = VALID_NUMBER_TILES | SYMBOLS
+
+# ============================================================
+# 牌编号（用于二进制编码、向量化计算等）
+# ============================================================
+
+# 数字牌 0-49 的编号就是数值本身，符号牌和万用牌依次排在后面
+NUMBER_TILE_RANGE = range(50)
+
+TILE_TO_ID = {
+    **{i: i for i in NUMBER_TILE_RANGE},
+    PLUS: 50,
+    MULTIPLY: 51,
+    POWER: 52,
+    JOKER_TIAO: 53,
+    JOKER_TONG: 54,
+    JOKER_WAN: 55,
+    JOKER_SYMBOL: 56,
+}
+
+# 编号 -> 牌
+ID_TO_TILE = tuple(sorted(TILE_TO_ID, key=TILE_TO_ID.get))
+
+NUM_TILE_IDS = len(ID_TO_TILE)
@@ -0,0 +1,494 @@
+"""
+打牌建议模块
+手里16张牌时，评估打出每一张牌后的听牌情况，按有效进张和番数排序
+
+所有打法共用一个分组缓存：打出不同的牌、再摸进不同的牌后，
+剩下的子手牌大多相同，每个子手牌只需要搜索一次
+"""
+
+from collections import Counter
+from itertools import combinations
+
+from calculator_base.constants import SYMBOLS, JOKER_SYMBOL, JOKERS
+from calculator_base.parser import tile_sort_key
+from calculator_base.formula_table import get_group_completion_index
+from calculator_base.prefilter import symbol_counts_feasible
+from calculator_base.empty_listening_checker import TILE_POOL, check_tile_availability
+
+
+# 算式中占符号位置的牌
+_SYMBOLIC = SYMBOLS | {JOKER_SYMBOL}
+
+
+class SharedPartitioner:
+    """
+    带缓存的算术麻将分组搜索
+
+    搜索顺序与 ArithmeticMahjong._try_partition_with_pruning 完全相同
+    （先刻子，再含第一张牌的算式），所以找到的分组方案也相同；
+    区别是按排序后的子手牌缓存结果，跳过牌面重复的组合，
+    跳过符号张数不对、不可能成组的组合，并用补全索引（formula_table）查表判断有效组
+    """
+
+    def __init__(self, mjong):
+        self.mjong = mjong
+        self._partition_cache = {}   # {排序后的牌元组: 分组元组 或 None}
+        self._waits_cache = {}       # {排序后的牌元组: 听的牌}
+        self._leftovers_cache = {}   # {(排序后的牌元组, 剩下的张数): 剩下的牌的集合}
+        self._completion_index = get_group_completion_index(mjong.require_sum_gte_10)
+
+    def partition(self, tiles):
+        """
+        判断牌能否全部分成有效组
+
+        参数：
+            tiles: 牌的列表（任意顺序，张数为4的倍数）
+
+        返回：
+            (是否成功, 分组列表)
+        """
+        if len(tiles) % 4 != 0:
+            return False, []
+        groups = self._search(tuple(sorted(tiles, key=tile_sort_key)))
+        if groups is None:
+            return False, []
+        return True, [list(group) for group in groups]
+
+    def _partials(self, remaining):
+        """
+        第一张牌 + 后面两张牌的所有组合（牌面相同的只返回一次，
+        顺序与按下标枚举 combinations 相同）
+
+        符号（或符号万用牌）多于一张的组合只可能是符号刻子，其余直接跳过
+
+        返回：
+            生成 (3张牌, 剩余的牌)
+        """
+        first = remaining[0]
+        others = remaining[1:]
+        n = len(others)
+        first_symbolic = first in _SYMBOLIC
+
+        for i in range(n):
+            a = others[i]
+            if i > 0 and a == others[i - 1]:
+                continue
+            symbolic_a = first_symbolic + (a in _SYMBOLIC)
+            if symbolic_a > 1 and a != first:
+                continue
+            for j in range(i + 1, n):
+                b = others[j]
+                if j > i + 1 and b == others[j - 1]:
+                    continue
+                if symbolic_a + (b in _SYMBOLIC) > 1 and not (a == b == first):
+                    continue
+                yield (first, a, b), i, j
+
+    def _groups_with_first(self, remaining):
+        """
+        包含第一张牌的所有有效组（牌面相同的只返回一次，
+        顺序与按下标枚举 combinations 相同）
+
+        返回：
+            生成 (有效组, 剩余的牌)
+        """
+        others = remaining[1:]
+        n = len(others)
+        for partial, i, j in self._partials(remaining):
+            completions = self._completion_index.get(partial, frozenset())
+            for k in range(j + 1, n):
+                c = others[k]
+                if k > j + 1 and c == others[k - 1]:
+                    continue
+                if c not in completions:
+                    continue
+                yield partial + (c,), others[:i] + others[i + 1:j] + others[j + 1:k] + others[k + 1:]
+
+    def _search(self, remaining):
+        if not remaining:
+            return ()
+
+        cached = self._partition_cache.get(remaining, False)
+        if cached is not False:
+            return cached
+
+        # 只剩一组：直接查补全索引（包括刻子）
+        if len(remaining) == 4:
+            result = (remaining,) if remaining[3] in self._completion_index.get(remaining[:3], ()) else None
+            self._partition_cache[remaining] = result
+            return result
+
+        counts = Counter(remaining)
+        if not symbol_counts_feasible(counts):
+            self._partition_cache[remaining] = None
+            return None
+
+        result = None
+
+        # 优先尝试刻子
+        for tile, count in counts.items():
+            if count >= 4:
+                new_remaining = list(remaining)
+                for _ in range(4):
+                    new_remaining.remove(tile)
+                rest = self._search(tuple(new_remaining))
+                if rest is not None:
+                    result = ((tile,) * 4,) + rest
+                    break
+
+        # 再尝试包含第一张牌的算式
+        if result is None:
+            for group, new_remaining in self._groups_with_first(remaining):
+                rest = self._search(new_remaining)
+                if rest is not None:
+                    result = (group,) + rest
+                    break
+
+        self._partition_cache[remaining] = result
+        return result
+
+    def waits(self, tiles):
+        """
+        计算听的牌（张数为4的倍数减1）
+
+        一次搜索得到所有听牌，不需要对每张候选牌分别做分组：
+        缺的那张牌所在的组要么不含第一张牌（第一张牌在完整的组里），
+        要么就是第一张牌加另外两张
+
+        返回：
+            听的牌的集合
+        """
+        if len(tiles) % 4 != 3:
+            return frozenset()
+        return self._search_waits(tuple(sorted(tiles, key=tile_sort_key)))
+
+    def _completions(self, partial):
+        """3张牌能补成有效组（算式或刻子）的牌（不含万用牌）"""
+        return self._completion_index.get(partial, frozenset()) - JOKERS
+
+    @staticmethod
+    def _symbol_counts_feasible_plus_one(remaining):
+        """
+        再加一张牌后按符号张数能否分组（必要条件）
+
+        加的是符号时逐种检查；加的数字只有凑成刻子时才影响判断，
+        其余的数字都相当于一张手里没有的数字（None）
+        """
+        counts = Counter(remaining)
+        extras = [tile for tile, count in counts.items() if count % 4 == 3 and tile not in _SYMBOLIC]
+        for extra in (*SYMBOLS, None, *extras):
+            counts[extra] += 1
+            feasible = symbol_counts_feasible(counts)
+            counts[extra] -= 1
+            if feasible:
+                return True
+        return False
+
+    def _search_waits(self, remaining):
+        if len(remaining) == 3:
+            return self._completions(remaining)
+
+        cached = self._waits_cache.get(remaining)
+        if cached is not None:
+            return cached
+
+        if not self._symbol_counts_feasible_plus_one(remaining):
+            self._waits_cache[remaining] = frozenset()
+            return self._waits_cache[remaining]
+
+        result = set()
+
+        # 第一张牌在缺牌的组里：其余的牌必须能全部分组
+        others = remaining[1:]
+        for partial, i, j in self._partials(remaining):
+            completions = self._completions(partial)
+            if completions - result and self._search(others[:i] + others[i + 1:j] + others[j + 1:]) is not None:
+                result |= completions
+
+        # 第一张牌在完整的组里（包括刻子）
+        for group, rest in self._groups_with_first(remaining):
+            result |= self._search_waits(rest)
+
+        result = frozenset(result)
+        self._waits_cache[remaining] = result
+        return result
+
+    def leftovers(self, tiles, size=3):
+        """
+        去掉哪些 size 张牌后，其余的牌能全部分成有效组
+
+        4n-1张牌的听牌就是这些3张牌能补成有效组的牌（waits_from_leftovers）；
+        HandState 在摸打之间保留这个集合，每轮只重新搜索摸进的牌所在的组
+
+        返回：
+            排序后的 size 张牌的元组的集合
+        """
+        return self._search_leftovers(tuple(sorted(tiles, key=tile_sort_key)), size)
+
+    def waits_from_leftovers(self, leftovers):
+        """剩下的3张牌能补成有效组的牌（与 waits 相同）"""
+        result = set()
+        for partial in leftovers:
+            result |= self._completions(partial)
+        return frozenset(result)
+
+    def groups_with(self, tiles, tile):
+        """
+        手牌中含某张牌的所有有效组（牌面相同的只返回一次）
+
+        返回：
+            生成 (有效组, 其余的牌)，都是排序后的元组
+        """
+        others = sorted(tiles, key=tile_sort_key)
+        others.remove(tile)
+        for partial in set(combinations(others, 3)):
+            if tile not in self._completion_index.get(partial, ()):
+                continue
+            rest = list(others)
+            for value in partial:
+                rest.remove(value)
+            yield tuple(sorted(partial + (tile,), key=tile_sort_key)), tuple(rest)
+
+    @staticmethod
+    def _leftovers_feasible(remaining, size):
+        """
+        去掉 size 张牌后按符号张数能否分组（必要条件）
+
+        去掉的牌中最多有 size 张符号，其余与 symbol_counts_feasible 相同
+        """
+        n_groups = (len(remaining) - size) // 4
+        symbolic = symbol_kezi = number_kezi = 0
+        for tile, count in Counter(remaining).items():
+            if tile in _SYMBOLIC:
+                symbolic += count
+                symbol_kezi += count // 4
+            else:
+                number_kezi += count // 4
+        for n_symbol_kezi in range(symbol_kezi + 1):
+            for removed in range(min(size, symbolic) + 1):
+                n_formulas = symbolic - removed - 4 * n_symbol_kezi
+                n_number_kezi = n_groups - n_formulas - n_symbol_kezi
+                if n_formulas >= 0 and 0 <= n_number_kezi <= number_kezi:
+                    return True
+        return False
+
+    def _search_leftovers(self, remaining, size):
+        if len(remaining) == size:
+            return frozenset((remaining,))
+        if size == 0:
+            return frozenset(((),)) if self._search(remaining) is not None else frozenset()
+
+        key = (remaining, size)
+        cached = self._leftovers_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = set()
+        if self._leftovers_feasible(remaining, size):
+            # 第一张牌剩下
+            first = remaining[0]
+            for rest in self._search_leftovers(remaining[1:], size - 1):
+                result.add((first,) + rest)
+            # 第一张牌在完整的组里（包括刻子）
+            for group, rest in self._groups_with_first(remaining):
+                result |= self._search_leftovers(rest, size)
+
+        result = frozenset(result)
+        self._leftovers_cache[key] = result
+        return result
+
+
+def near_sequence(numbers, length, diffs):
+    """是否存在 length 项的等差数列（公差在 diffs 中），numbers 中至少有 length-1 项"""
+    for diff in diffs:
+        for first in range(diff):
+            # 同余的数字上滑动长为 length 的窗口
+            present = [term in numbers for term in range(first, 50, diff)]
+            count = sum(present[:length])
+            for i in range(length, len(present) + 1):
+                if i > length:
+                    count += present[i - 1] - present[i - 1 - length]
+                if count >= length - 1:
+                    return True
+    return False
+
+
+def tile_live_count(tile, tiles_used):
+    """
+    一张听牌还剩几张（普通牌 + 可代替的万用牌）
+
+    返回：
+        (状态, 剩余张数)
+    """
+    status, joker_type = check_tile_availability(tile, tiles_used)
+    if status == 'empty':
+        return status, 0
+
+    remaining = max(0, TILE_POOL.get(tile, 0) - tiles_used.get(tile, 0))
+    if joker_type is not None:
+        remaining += TILE_POOL.get(joker_type, 0) - tiles_used.get(joker_type, 0)
+    return status, remaining
+
+
+def _ready_waits(mjong, partitioner, rest, check_traditional, traditional_cache, special_checks):
+    """
+    15张牌听哪些牌（按胡牌类型）
+
+    返回：
+        {胡牌类型: {听的牌: 分组}}
+    """
+    waits = {}
+
+    arith = {}
+    for tile in partitioner.waits(rest):
+        # 只对听的牌求分组方案（与 is_ready 得到的方案相同）
+        arith[tile] = partitioner.partition(rest + [tile])[1]
+    if arith:
+        waits['算术麻将'] = arith
+
+    if check_traditional:
+        checker = mjong.traditional_checker
+        trad = {}
+        for tile in checker._get_all_possible_nums():
+            test_hand = rest + [tile]
+            key = tuple(sorted(test_hand, key=tile_sort_key))
+            # 摸进的牌和打出的牌相同时，各种打法得到的都是原来的16张
+            if key not in traditional_cache:
+                traditional_cache[key] = checker.can_win_traditional_counting(test_hand)
+            can_win, groups = traditional_cache[key]
+            if can_win:
+                trad[tile] = groups
+        if trad:
+            waits['传统麻将'] = trad
+
+    if mjong.eight_pairs_checker is not None:
+        is_ready, tiles = mjong.eight_pairs_checker.is_ready_eight_pairs(rest)
+        if is_ready:
+            waits['八小对'] = {
+                tile: mjong.eight_pairs_checker.can_win_eight_pairs(rest + [tile])[1]
+                for tile in tiles
+            }
+
+    for win_type, is_ready_func in special_checks:
+        is_ready, tiles = is_ready_func(rest)
+        if is_ready:
+            waits[win_type] = {tile: [] for tile in tiles}
+
+    return waits
+
+
+def best_discards(hand, mjong=None, visible_tiles=(), winning_method=None, with_fan=True):
+    """
+    评估16张手牌打出每一张牌后的听牌情况
+
+    参数：
+        hand: 16张牌的列表
+        mjong: ArithmeticMahjong对象（默认进阶规则）
+        visible_tiles: 场上可见的牌（用于计算剩余张数）
+        winning_method: 计算番数时使用的胡牌方式
+        with_fan: 是否计算每张听牌的番数
+
+    返回：
+        按推荐程度排序的列表（剩余张数多的在前，相同时番数高的在前），每项为：
+        {
+            'discard': 打出的牌,
+            'waits': {胡牌类型: [听的牌]},
+            'wait_tiles': [听的牌（所有胡牌类型合并）],
+            'live_waits': 没有空听的听牌种数,
+            'live_count': 听牌剩余总张数,
+            'fan_by_tile': {听的牌: 最高番数（算术麻将取所有分组方案中的最高番数）},
+            'best_fan': 最高番数（不听牌或不计算番数时为None）
+        }
+        不听牌的打法也在列表中（排在最后）
+    """
+    if mjong is None:
+        from calculator_base.mahjong_checker import ArithmeticMahjong
+        mjong = ArithmeticMahjong()
+
+    if len(hand) != 16:
+        raise ValueError(f"打牌建议需要16张牌，实际{len(hand)}张")
+
+    partitioner = SharedPartitioner(mjong)
+    tiles_used = Counter(hand)
+    tiles_used.update(visible_tiles)
+    fan_cache = {}
+    traditional_cache = {}
+
+    # 传统麻将中无法表示的牌：有两张以上时打哪张都不可能听传统麻将，
+    # 只有一张时必须打出这一张
+    unconvertible = []
+    if mjong.traditional_checker is not None:
+        unconvertible = [t for t in hand if t not in mjong.traditional_checker.num_to_tile]
+
+    # 天龙/地龙：打牌后数字只会更少，16张里都凑不出差一张的龙就不用检查
+    special_checks = []
+    checker = mjong.special_winning_checker
+    if checker is not None:
+        numbers = {t for t in hand if isinstance(t, int)}
+        special_checks.append(('十三幺', checker.is_ready_shi_san_yao))
+        if near_sequence(numbers, 16, (1,)):
+            special_checks.append(('天龙', checker.is_ready_tian_long))
+        if near_sequence(numbers, 12, (1, 2, 3, 4)):
+            special_checks.append(('地龙', checker.is_ready_di_long))
+
+    results = []
+    for discard in sorted(set(hand), key=tile_sort_key):
+        rest = list(hand)
+        rest.remove(discard)
+
+        check_traditional = mjong.traditional_checker is not None and (
+            not unconvertible or unconvertible == [discard]
+        )
+        waits = _ready_waits(mjong, partitioner, rest, check_traditional,
+                             traditional_cache, special_checks)
+
+        wait_tiles = set()
+        for tiles in waits.values():
+            wait_tiles.update(tiles)
+        wait_tiles = sorted(wait_tiles, key=lambda x: (x not in SYMBOLS, x))
+
+        live_waits = 0
+        live_count = 0
+        for tile in wait_tiles:
+            status, remaining = tile_live_count(tile, tiles_used)
+            if status != 'empty':
+                live_waits += 1
+                live_count += remaining
+
+        fan_by_tile = {}
+        if with_fan:
+            for win_type, tile_groups in waits.items():
+                for tile, groups in tile_groups.items():
+                    test_hand = rest + [tile]
+                    # 打出和摸进的牌不同时，不同的打法可能得到同一手牌
+                    key = (tuple(sorted(test_hand, key=tile_sort_key)), win_type)
+                    if key not in fan_cache:
+                        if win_type == '算术麻将':
+                            # 与 is_ready 相同，取番数最高的分组方案
+                            _, fan_info = mjong._best_arith_partition(test_hand, winning_method)
+                        else:
+                            fan_info = mjong._calculate_fan(test_hand, groups, win_type, winning_method)
+                        fan_cache[key] = fan_info['total_fan'] if fan_info else None
+                    fan = fan_cache[key]
+                    if fan is not None and fan > fan_by_tile.get(tile, -1):
+                        fan_by_tile[tile] = fan
+
+        results.append({
+            'discard': discard,
+            'waits': {
+                win_type: sorted(tile_groups, key=lambda x: (x not in SYMBOLS, x))
+                for win_type, tile_groups in waits.items()
+            },
+            'wait_tiles': wait_tiles,
+            'live_waits': live_waits,
+            'live_count': live_count,
+            'fan_by_tile': fan_by_tile,
+            'best_fan': max(fan_by_tile.values()) if fan_by_tile else None,
+        })
+
+    results.sort(key=lambda r: (
+        -r['live_count'],
+        -(r['best_fan'] if r['best_fan'] is not None else -1),
+        tile_sort_key(r['discard']),
+    ))
+    return results
@@ -0,0 +1,246 @@
+"""
+精确覆盖分组引擎
+把"手牌分成若干个有效组"看作精确覆盖问题（Algorithm X）：
+
+- 行：手牌中能组成有效组（算式或刻子）的4张牌组合，每手牌只用补全索引列举一次
+- 列：手牌中的每种牌，要恰好被覆盖"这种牌的张数"次
+
+同一种牌的多张是不可区分的，所以列按牌的种类、带张数，而不是每张牌一列
+（否则相同的分组会因为牌的排列被重复找到）。每一步选可选行最少的列
+（最少剩余值启发），一次把这一列的所有张数覆盖完，再删去这一列，
+所以每种分组方案只会被找到一次。
+
+16张（4组）、12/8/4张（3/2/1组）都适用。
+
+MultiRuleExactCover 同时搜索新手、进阶两种规则：行按新手规则列举
+（进阶规则的有效组都是新手规则的有效组），每行带规则位，
+一次搜索得到两种规则下的结果。
+"""
+
+from collections import Counter
+from itertools import combinations
+
+from calculator_base.parser import tile_sort_key
+from calculator_base.formula_table import (
+    get_group_completion_index, get_group_rule_index, rule_bit, ALL_RULES,
+)
+
+
+def candidate_groups(tiles, require_sum_gte_10=True):
+    """
+    列举手牌中所有能组成有效组的4张牌组合
+
+    参数：
+        tiles: 牌的列表
+        require_sum_gte_10: 使用的算式规则
+
+    返回：
+        [排序后的4张牌元组, ...]（不重复）；有牌不在牌面范围内时返回None
+    """
+    tagged = _tagged_groups(tiles, get_group_completion_index(require_sum_gte_10))
+    return None if tagged is None else [group for group, _ in tagged]
+
+
+def _tagged_groups(tiles, index):
+    """
+    按补全索引列举手牌中的有效组
+
+    index: {3张牌: 能补成有效组的牌的集合} 或 {3张牌: {牌: 规则位}}
+
+    返回：
+        [(排序后的4张牌元组, 规则位), ...]（集合形式的索引规则位为 ALL_RULES）；
+        有牌不在牌面范围内时返回None
+    """
+    counts = Counter(tiles)
+    ordered = sorted(tiles, key=tile_sort_key)
+
+    groups = []
+    for three in set(combinations(ordered, 3)):
+        completions = index.get(three)
+        if completions is None:
+            return None
+        last_key = tile_sort_key(three[2])
+        for tile in completions:
+            # 第4张牌在排序中不在前3张之前，每个组合只生成一次
+            if counts[tile] == 0 or tile_sort_key(tile) < last_key:
+                continue
+            if tile == three[2] and counts[tile] < three.count(tile) + 1:
+                continue
+            mask = completions[tile] if isinstance(completions, dict) else ALL_RULES
+            groups.append((three + (tile,), mask))
+    return groups
+
+
+class ExactCoverPartitioner:
+    """
+    一手牌的精确覆盖搜索
+
+    参数：
+        tiles: 牌的列表（张数为4的倍数）
+        require_sum_gte_10: 使用的算式规则
+        budget: 搜索预算 SearchBudget（可选），用完时抛出 SearchBudgetExceeded
+
+    示例：
+        partitioner = ExactCoverPartitioner(hand)
+        groups = partitioner.first()           # 一种分组方案（或None）
+        for groups in partitioner:             # 所有分组方案
+            ...
+    """
+
+    def __init__(self, tiles, require_sum_gte_10=True, budget=None):
+        self._init_rows(tiles, get_group_completion_index(require_sum_gte_10), budget)
+
+    def _init_rows(self, tiles, index, budget):
+        self.counts = Counter(tiles)
+        self.budget = budget
+        groups = _tagged_groups(tiles, index)
+        if groups is None:
+            raise ValueError("手牌中有不在牌面范围内的牌")
+        # 行：(分组, {牌: 用的张数}, 规则位)
+        self.rows = [(group, Counter(group), mask) for group, mask in groups]
+        self.nodes = 0
+        # 还需要找的规则（MultiRuleExactCover 找到一种规则的结果后去掉这一位）
+        self._wanted = ALL_RULES
+
+    def __iter__(self):
+        return (groups for groups, _ in self._iter_tagged())
+
+    def _iter_tagged(self):
+        """列举 (分组方案, 规则位)：规则位为方案中所有组的规则位的交"""
+        if sum(self.counts.values()) % 4 != 0:
+            return iter(())
+        return self._search(dict(self.counts), self.rows, [], ALL_RULES)
+
+    def first(self):
+        """
+        找一种分组方案
+
+        返回：
+            [[4张牌], ...]（每组按 tile_sort_key 排序），不能分组时返回None
+        """
+        return next(iter(self), None)
+
+    def _search(self, counts, rows, chosen, mask):
+        """Algorithm X：选可选行最少的列，枚举覆盖这一列的行的组合"""
+        self.nodes += 1
+        if self.budget is not None:
+            self.budget.tick()
+        if not counts:
+            yield [list(group) for group in chosen], mask
+            return
+
+        # 只保留还放得下、而且在还需要找的规则下有效的行，并按列归类
+        wanted = mask & self._wanted
+        if not wanted:
+            return
+        live = [row for row in rows
+                if row[2] & wanted
+                and all(counts.get(tile, 0) >= k for tile, k in row[1].items())]
+        by_column = {tile: [] for tile in counts}
+        for row in live:
+            for tile in row[1]:
+                by_column[tile].append(row)
+
+        column = min(by_column, key=lambda tile: len(by_column[tile]))
+        candidates = by_column[column]
+        if not candidates:
+            return
+
+        rest = [row for row in live if column not in row[1]]
+        for remaining, picked, picked_mask in self._cover_column(
+                column, counts[column], candidates, 0, dict(counts), wanted):
+            remaining = {tile: count for tile, count in remaining.items() if count}
+            yield from self._search(remaining, rest, chosen + picked, picked_mask)
+
+    def _cover_column(self, column, need, candidates, start, counts, mask, picked=()):
+        """
+        枚举覆盖 column 恰好 need 次的行的组合（同一行可以重复用，行号不减）
+
+        产出：(用掉这些行之后的剩余张数, [所选分组, ...], 规则位)
+        """
+        if need == 0:
+            yield counts, list(picked), mask
+            return
+        for i in range(start, len(candidates)):
+            group, usage, row_mask = candidates[i]
+            if not row_mask & mask & self._wanted:
+                continue
+            if usage[column] > need or any(counts.get(tile, 0) < k for tile, k in usage.items()):
+                continue
+            new_counts = dict(counts)
+            for tile, k in usage.items():
+                new_counts[tile] -= k
+            yield from self._cover_column(column, need - usage[column], candidates, i,
+                                          new_counts, mask & row_mask, picked + (group,))
+
+
+class MultiRuleExactCover(ExactCoverPartitioner):
+    """
+    同时搜索新手、进阶两种规则的精确覆盖
+
+    参数：
+        tiles: 牌的列表（张数为4的倍数）
+        budget: 搜索预算 SearchBudget（可选）
+
+    结果都以 require_sum_gte_10 为键：{True: 进阶规则的结果, False: 新手规则的结果}
+    """
+
+    def __init__(self, tiles, budget=None):
+        self._init_rows(tiles, get_group_rule_index(), budget)
+
+    def first_by_rule(self):
+        """
+        每种规则下找一种分组方案（找到一种规则的方案后，只继续搜索另一种规则）
+
+        返回：
+            {True: 分组方案或None, False: 分组方案或None}
+        """
+        found = {}
+        self._wanted = ALL_RULES
+        try:
+            for groups, mask in self._iter_tagged():
+                for require_sum_gte_10 in (True, False):
+                    bit = rule_bit(require_sum_gte_10)
+                    if mask & bit and self._wanted & bit:
+                        found[require_sum_gte_10] = groups
+                        self._wanted &= ~bit
+                if not self._wanted:
+                    break
+        finally:
+            self._wanted = ALL_RULES
+        return {True: found.get(True), False: found.get(False)}
+
+    def all_by_rule(self):
+        """
+        列举两种规则下的所有分组方案
+
+        返回：
+            {True: [分组方案, ...], False: [分组方案, ...]}
+        """
+        result = {True: [], False: []}
+        for groups, mask in self._iter_tagged():
+            for require_sum_gte_10 in (True, False):
+                if mask & rule_bit(require_sum_gte_10):
+                    result[require_sum_gte_10].append(groups)
+        return result
+
+
+def find_partition(tiles, require_sum_gte_10=True):
+    """
+    找一种把牌全部分成有效组的方案
+
+    返回：
+        (是否能分组, 分组方案)，格式与 ArithmeticMahjong._partition_optimized 相同
+    """
+    groups = ExactCoverPartitioner(tiles, require_sum_gte_10).first()
+    return (True, groups) if groups is not None else (False, [])
+
+
+def iter_partitions(tiles, require_sum_gte_10=True):
+    """
+    列举把牌全部分成有效组的所有方案（每种方案只出现一次）
+
+    产出：
+        [[4张牌], ...]
+    """
+    return iter(ExactCoverPartitioner(tiles, require_sum_gte_10))
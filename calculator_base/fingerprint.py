@@ -0,0 +1,117 @@
+"""
+手牌指纹模块
+为手牌生成与牌的顺序无关的标识，用于缓存的键和语料去重
+
+- canonical_key: 规范化的字节串（完全等价的手牌得到相同的字节串，不会冲突）
+- fingerprint: 规范化字节串的64位 blake2b 哈希（更紧凑，用于统计和分片）
+
+支持牌的列表（int/str混合）和 Hand 对象：
+Hand 对象还包括鸣牌面子、宝牌/万用牌标记、分组、胡牌、胡牌方式等
+"""
+
+from hashlib import blake2b
+
+from calculator_base.constants import TILE_TO_ID
+
+
+# 牌编号之外的牌（如超出范围的数字）用这个字节开头，后面跟文本表示
+_EXTRA_TILE = 0xFF
+_DORA_BIT = 0x40
+_JOKER_USED_BIT = 0x80
+
+_LIST_TAG = b'L'
+_HAND_TAG = b'H'
+
+
+def _tile_bytes(value, flags=0):
+    """一张牌的字节表示"""
+    tile_id = TILE_TO_ID.get(value)
+    if tile_id is None or isinstance(value, bool):
+        text = repr(value).encode('utf-8')
+        return bytes((_EXTRA_TILE, len(text))) + text
+    return bytes((tile_id | flags,))
+
+
+def _tiles_bytes(encoded_tiles):
+    """多张牌排序后拼接（与顺序无关）"""
+    encoded = sorted(encoded_tiles)
+    return bytes((len(encoded),)) + b''.join(encoded)
+
+
+def _hand_tile_bytes(tile):
+    """Tile对象的字节表示（包括宝牌、万用牌标记）"""
+    flags = (_DORA_BIT if tile.is_dora else 0) | (_JOKER_USED_BIT if tile.is_joker_used else 0)
+    return _tile_bytes(tile.value, flags)
+
+
+def _text_bytes(text):
+    """可选文本字段（胡牌方式、胡牌类型等）"""
+    if text is None:
+        return b'\x00'
+    data = str(text).encode('utf-8')
+    return bytes((1, len(data))) + data
+
+
+def canonical_key(hand):
+    """
+    手牌的规范化字节串
+
+    参数：
+        hand: 牌的列表，或 Hand 对象
+
+    返回：
+        bytes：两手牌等价（只是顺序不同）时相同，否则不同
+    """
+    if isinstance(hand, (list, tuple)):
+        return _LIST_TAG + _tiles_bytes(_tile_bytes(tile) for tile in hand)
+
+    melds = sorted(
+        group.group_type.encode('ascii') + _tiles_bytes(_hand_tile_bytes(t) for t in group.tiles)
+        for group in hand.melded_groups
+    )
+    hand_groups = sorted(
+        _tiles_bytes(_hand_tile_bytes(t) for t in group) for group in hand.hand_groups
+    )
+    winning = b'\x00' if hand.winning_tile is None else b'\x01' + _hand_tile_bytes(hand.winning_tile)
+
+    return b''.join((
+        _HAND_TAG,
+        bytes((len(melds),)), *melds,
+        bytes((len(hand_groups),)), *hand_groups,
+        _tiles_bytes(_hand_tile_bytes(t) for t in hand.hand_tiles),
+        winning,
+        _text_bytes(hand.winning_method),
+        _text_bytes(hand.win_type),
+        _text_bytes(hand.should_win_in_mode),
+    ))
+
+
+def fingerprint(hand):
+    """
+    手牌的64位指纹（规范化字节串的 blake2b 哈希）
+
+    参数：
+        hand: 牌的列表，或 Hand 对象
+
+    返回：
+        int（0 到 2**64-1）
+    """
+    return int.from_bytes(blake2b(canonical_key(hand), digest_size=8).digest(), 'little')
+
+
+def dedupe_hands(hands):
+    """
+    去掉重复的手牌（只是顺序不同的也算重复），保留第一次出现的
+
+    参数：
+        hands: 手牌（列表或Hand对象）的可迭代对象
+
+    返回：
+        生成 (原始下标, 手牌)
+    """
+    seen = set()
+    for index, hand in enumerate(hands):
+        key = canonical_key(hand)
+        if key not in seen:
+            seen.add(key)
+            yield index, hand
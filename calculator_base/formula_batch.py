@@ -0,0 +1,168 @@
+"""
+批量算式判定（NumPy 向量化）
+对 (N, 4) 的牌编号数组（见 constants.TILE_TO_ID）逐行判断是否是合法算式，
+规则与 ArithmeticMahjong.is_valid_formula 相同：
+
+- 每行恰好一张符号、三张数字
+- 三个数字的 6 种排列都按行内的运算符检查 a op b = c，
+  次方查 50×50 的表（与判定器相同，指数 <= 10），进阶规则要求加法的和 >= 10
+- 合法的行给出算式编号：标准形式在 formula_table.get_formula_table(require_sum_gte_10)
+  中的下标
+
+有万用牌的行可以展开成万用牌能代替的所有牌再判断（resolve_jokers），
+取能组成的算式中编号最小的一个。每张万用牌最多展开 30 行，
+万用牌很多的行会展开很多行，需要时分批调用。
+"""
+
+from calculator_base.constants import (
+    SYMBOLS, TILE_TO_ID, NUMBER_TILE_RANGE, PLUS, MULTIPLY, POWER,
+)
+from calculator_base.formula_table import get_formula_table, JOKER_VALUES, _get_or_build
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+_N_NUMBERS = len(NUMBER_TILE_RANGE)
+_SYMBOL_IDS = sorted(TILE_TO_ID[symbol] for symbol in SYMBOLS)
+_FIRST_JOKER_ID = max(_SYMBOL_IDS) + 1
+
+# 6 种 (a, b, c) 排列在排序后的三个数字中的位置
+_PERMUTATIONS = ((0, 1, 2), (1, 0, 2), (0, 2, 1), (2, 0, 1), (1, 2, 0), (2, 1, 0))
+
+# 已构建的表：{'power': 次方表, (规则, 'codes'/'ids'): 算式编码表}（加锁构建，见 formula_table）
+_TABLES = {}
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise ImportError("未安装 NumPy，无法使用向量化判定")
+
+
+def _power_table():
+    """power[a, b] = a ∧ b（超出牌面范围或指数 > 10 时为 -1）"""
+    return _get_or_build(_TABLES, 'power', _build_power_table)
+
+
+def _build_power_table():
+    table = np.full((_N_NUMBERS, _N_NUMBERS), -1, dtype=np.int64)
+    for a in NUMBER_TILE_RANGE:
+        for b in range(min(_N_NUMBERS, 11)):
+            value = a ** b
+            if value in NUMBER_TILE_RANGE:
+                table[a, b] = value
+    return table
+
+
+def _encode(op_ids, n0, n1, n2):
+    """把 (运算符编号, 从小到大的三个数字) 编码成一个整数"""
+    return ((op_ids * _N_NUMBERS + n0) * _N_NUMBERS + n1) * _N_NUMBERS + n2
+
+
+def _formula_codes(require_sum_gte_10):
+    """
+    算式表的编码
+
+    返回：
+        (排序后的编码数组, 对应的算式编号数组)
+    """
+    return _get_or_build(_TABLES, (require_sum_gte_10, 'codes'),
+                         lambda: _build_formula_codes(require_sum_gte_10))
+
+
+def _build_formula_codes(require_sum_gte_10):
+    codes = []
+    for key in get_formula_table(require_sum_gte_10):
+        op = next(tile for tile in key if tile in SYMBOLS)
+        numbers = sorted(tile for tile in key if tile not in SYMBOLS)
+        codes.append(_encode(TILE_TO_ID[op], *numbers))
+    codes = np.array(codes, dtype=np.int64)
+    order = np.argsort(codes)
+    return codes[order], order.astype(np.int64)
+
+
+def _validate_plain(ids, require_sum_gte_10):
+    """没有万用牌的行：返回 (是否合法, 算式编号)"""
+    ids = np.sort(ids, axis=1)
+    # 排序后数字在前：三张数字 + 一张符号
+    structure = (ids[:, 2] < _N_NUMBERS) & np.isin(ids[:, 3], _SYMBOL_IDS)
+    numbers = np.where(structure[:, None], ids[:, :3], 0)
+    op = ids[:, 3]
+    power = _power_table()
+
+    valid = np.zeros(len(ids), dtype=bool)
+    for i, j, k in _PERMUTATIONS:
+        a, b, c = numbers[:, i], numbers[:, j], numbers[:, k]
+        plus = (a + b == c)
+        if require_sum_gte_10:
+            plus &= c >= 10
+        valid |= np.where(op == TILE_TO_ID[PLUS], plus,
+                          np.where(op == TILE_TO_ID[MULTIPLY], a * b == c,
+                                   power[a, b] == c))
+    valid &= structure
+
+    codes, formula_ids = _formula_codes(require_sum_gte_10)
+    code = _encode(op, numbers[:, 0], numbers[:, 1], numbers[:, 2])
+    pos = np.minimum(np.searchsorted(codes, code), len(codes) - 1)
+    return valid, np.where(valid, formula_ids[pos], -1)
+
+
+def _expand_jokers(ids, origin):
+    """把每张万用牌依次展开成它能代替的所有牌"""
+    candidates = {TILE_TO_ID[joker]: np.array([TILE_TO_ID[tile] for tile in values])
+                  for joker, values in JOKER_VALUES.items()}
+    for col in range(4):
+        column = ids[:, col]
+        plain = column < _FIRST_JOKER_ID
+        rows, origins = [ids[plain]], [origin[plain]]
+        for joker_id, values in candidates.items():
+            selected = column == joker_id
+            count = int(selected.sum())
+            if count == 0:
+                continue
+            expanded = np.repeat(ids[selected], len(values), axis=0)
+            expanded[:, col] = np.tile(values, count)
+            rows.append(expanded)
+            origins.append(np.repeat(origin[selected], len(values)))
+        ids, origin = np.concatenate(rows), np.concatenate(origins)
+    return ids, origin
+
+
+def validate_formulas(ids, require_sum_gte_10=True, resolve_jokers=False):
+    """
+    批量判断4张牌是否构成合法算式
+
+    参数：
+        ids: (N, 4) 牌编号数组
+        require_sum_gte_10: 是否要求加法算式的和>=10（进阶规则）
+        resolve_jokers: 是否展开有万用牌的行（否则这些行都不合法）
+
+    返回：
+        (valid, formula_ids)：(N,) 的布尔数组和算式编号数组
+        （get_formula_table(require_sum_gte_10) 中的下标，不合法时为 -1）
+    """
+    _require_numpy()
+    ids = np.asarray(ids, dtype=np.int64).reshape(-1, 4)
+    has_joker = (ids >= _FIRST_JOKER_ID).any(axis=1)
+
+    valid, formula_ids = _validate_plain(ids, require_sum_gte_10)
+    valid &= ~has_joker
+    formula_ids[has_joker] = -1
+
+    if resolve_jokers and has_joker.any():
+        rows = np.nonzero(has_joker)[0]
+        expanded, origin = _expand_jokers(ids[rows], rows)
+        expanded_valid, expanded_ids = _validate_plain(expanded, require_sum_gte_10)
+        origin, expanded_ids = origin[expanded_valid], expanded_ids[expanded_valid]
+        # 每行取编号最小的算式
+        best = np.full(len(ids), np.iinfo(np.int64).max)
+        np.minimum.at(best, origin, expanded_ids)
+        resolved = best != np.iinfo(np.int64).max
+        valid |= resolved
+        formula_ids[resolved] = best[resolved]
+
+    return valid, formula_ids
@@ -0,0 +1,320 @@
+"""
+算式表
+预先枚举牌面范围内（数字0-49）所有合法的算式，供手牌生成、听牌计算等模块查表使用
+
+算式统一用"标准形式"表示：4张牌按 tile_sort_key 排序后的元组，
+例如 1 + 9 = 10 表示为 ('+', 1, 9, 10)
+"""
+
+import os
+import pickle
+import threading
+from itertools import combinations_with_replacement, product
+from types import MappingProxyType
+
+from calculator_base.constants import (
+    PLUS, MULTIPLY, POWER, NUMBER_TILE_RANGE, ID_TO_TILE,
+    JOKER_TIAO, JOKER_TONG, JOKER_WAN, JOKER_SYMBOL,
+)
+from calculator_base.parser import tile_sort_key
+
+
+OPERATORS = (PLUS, MULTIPLY, POWER)
+
+# 万用牌能代替的牌（与 ArithmeticMahjong._check_formula_with_jokers 相同）
+JOKER_VALUES = {
+    JOKER_TIAO: tuple(range(10)),
+    JOKER_TONG: tuple(range(10, 20)),
+    JOKER_WAN: tuple(range(20, 50)),
+    JOKER_SYMBOL: (PLUS, MULTIPLY, POWER),
+}
+
+# 已构建的算式表缓存：{(require_sum_gte_10, bounded_power): tuple / frozenset / dict}
+_FORMULA_TABLES = {}
+_FORMULA_SETS = {}
+_COMPLETION_TABLES = {}
+_PARTIAL_SETS = {}
+_FORMULAS_BY_TILE = {}
+_GROUP_COMPLETION_INDEXES = {}
+_GROUP_RULE_INDEXES = {}
+
+# 规则位：标记一个组在哪些规则下有效（进阶规则的有效组都是新手规则的有效组）
+RULE_NEWBIE = 1
+RULE_ADVANCED = 2
+ALL_RULES = RULE_NEWBIE | RULE_ADVANCED
+
+# 构建表时加锁：多个线程同时请求同一张表时只构建一次。
+# 构建好的表都是不可变的（tuple / frozenset / 只读映射），读取时不需要加锁
+_BUILD_LOCK = threading.RLock()
+
+# 磁盘缓存目录（环境变量 SUANSHU_CACHE_DIR 设为空字符串时不使用磁盘缓存）
+CACHE_DIR_ENV = 'SUANSHU_CACHE_DIR'
+_DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'suanshumajiang')
+# 索引格式变化时修改版本号，旧的缓存文件自动失效
+_INDEX_VERSION = 1
+
+
+def _get_or_build(cache, cache_key, build):
+    """读取已构建的表，没有时加锁构建"""
+    table = cache.get(cache_key)
+    if table is None:
+        with _BUILD_LOCK:
+            table = cache.get(cache_key)
+            if table is None:
+                table = build()
+                cache[cache_key] = table
+    return table
+
+
+def formula_key(tiles):
+    """
+    获取一组牌的标准形式（与牌的顺序无关）
+
+    参数：
+        tiles: 牌的列表（int或str）
+
+    返回：
+        排序后的元组
+    """
+    return tuple(sorted(tiles, key=tile_sort_key))
+
+
+def _evaluate(op, a, b, bounded_power):
+    """计算 a op b，超出判定器限制的次方返回None"""
+    if op == PLUS:
+        return a + b
+    if op == MULTIPLY:
+        return a * b
+    # 次方：与 ArithmeticMahjong 保持一致的范围限制
+    if bounded_power and (a > 100 or b > 10):
+        return None
+    # a >= 2 时指数过大必然超出牌面范围，无需计算
+    if a >= 2 and b >= 6:
+        return None
+    return a ** b
+
+
+def _build_formula_table(require_sum_gte_10, bounded_power):
+    """枚举所有 a op b = c（a, b, c 都在牌面范围内）"""
+    keys = set()
+    for op in OPERATORS:
+        for a in NUMBER_TILE_RANGE:
+            for b in NUMBER_TILE_RANGE:
+                c = _evaluate(op, a, b, bounded_power)
+                if c is None or c not in NUMBER_TILE_RANGE:
+                    continue
+                if op == PLUS and require_sum_gte_10 and c < 10:
+                    continue
+                keys.add(formula_key([a, op, b, c]))
+    return tuple(sorted(keys, key=lambda key: [tile_sort_key(t) for t in key]))
+
+
+def get_formula_table(require_sum_gte_10=True, bounded_power=True):
+    """
+    获取所有合法算式的标准形式列表（按标准形式排序，顺序稳定）
+
+    参数：
+        require_sum_gte_10: 是否要求加法算式的和>=10（进阶规则）
+        bounded_power: 次方是否沿用判定器的范围限制（底数<=100，指数<=10）
+                       番数计算不做此限制，例如 1 ∧ 30 = 1
+
+    返回：
+        标准形式元组的元组
+    """
+    return _get_or_build(_FORMULA_TABLES, (require_sum_gte_10, bounded_power),
+                         lambda: _build_formula_table(require_sum_gte_10, bounded_power))
+
+
+def get_formula_set(require_sum_gte_10=True, bounded_power=True):
+    """获取所有合法算式标准形式的集合（用于O(1)判断）"""
+    return _get_or_build(_FORMULA_SETS, (require_sum_gte_10, bounded_power),
+                         lambda: frozenset(get_formula_table(require_sum_gte_10, bounded_power)))
+
+
+def get_completion_table(require_sum_gte_10=True, bounded_power=True):
+    """
+    获取"3张牌 -> 能补成算式的牌"的索引
+
+    参数同 get_formula_table
+
+    返回：
+        只读映射: {3张牌的标准形式: frozenset(能补成算式的牌)}，
+        不在映射中的3张牌不能补成算式（不含刻子）
+    """
+    def build():
+        completions = {}
+        for formula in get_formula_table(require_sum_gte_10, bounded_power):
+            for i, tile in enumerate(formula):
+                partial = formula[:i] + formula[i + 1:]
+                completions.setdefault(partial, set()).add(tile)
+        return MappingProxyType({partial: frozenset(tiles) for partial, tiles in completions.items()})
+
+    return _get_or_build(_COMPLETION_TABLES, (require_sum_gte_10, bounded_power), build)
+
+
+def get_partial_formula_set(require_sum_gte_10=True, bounded_power=True):
+    """
+    获取能补成算式的2张/3张牌的集合（标准形式）
+
+    参数同 get_formula_table
+
+    返回：
+        frozenset: 算式去掉1张或2张后的所有标准形式
+    """
+    def build():
+        partials = set()
+        for formula in get_formula_table(require_sum_gte_10, bounded_power):
+            for i in range(4):
+                partial = formula[:i] + formula[i + 1:]
+                partials.add(partial)
+                for j in range(3):
+                    partials.add(partial[:j] + partial[j + 1:])
+        return frozenset(partials)
+
+    return _get_or_build(_PARTIAL_SETS, (require_sum_gte_10, bounded_power), build)
+
+
+def get_formulas_by_tile(require_sum_gte_10=True, bounded_power=True):
+    """
+    获取"牌 -> 含这张牌的算式"的索引（不含万用牌）
+
+    参数同 get_formula_table
+
+    返回：
+        只读映射: {牌: ((牌, 张数), ...) 的元组}，
+        每个算式表示为它用到的每种牌及张数
+    """
+    def build():
+        by_tile = {}
+        for formula in get_formula_table(require_sum_gte_10, bounded_power):
+            usage = tuple((tile, formula.count(tile)) for tile in dict.fromkeys(formula))
+            for tile, _ in usage:
+                by_tile.setdefault(tile, []).append(usage)
+        return MappingProxyType({tile: tuple(usages) for tile, usages in by_tile.items()})
+
+    return _get_or_build(_FORMULAS_BY_TILE, (require_sum_gte_10, bounded_power), build)
+
+
+def _joker_for(tile):
+    """能代替这张牌的万用牌"""
+    for joker, values in JOKER_VALUES.items():
+        if tile in values:
+            return joker
+    return None
+
+
+def _build_group_completion_index(require_sum_gte_10):
+    """
+    枚举所有3张牌（数字0-49、符号、万用牌）能补成有效组的牌
+
+    含万用牌的4张牌是有效算式，当且仅当把其中一些牌换成对应的万用牌
+    之后能从某个合法算式得到，所以从算式表出发生成，不需要逐一尝试替换
+    """
+    tiles = sorted(ID_TO_TILE, key=tile_sort_key)
+    completions = {key: set() for key in combinations_with_replacement(tiles, 3)}
+
+    for formula in get_formula_table(require_sum_gte_10):
+        choices = [(tile, _joker_for(tile)) for tile in formula]
+        for variant in set(formula_key(combo) for combo in product(*choices)):
+            for i, tile in enumerate(variant):
+                completions[variant[:i] + variant[i + 1:]].add(tile)
+
+    # 刻子：4张相同的牌（万用牌也只能和相同的万用牌组成刻子）
+    for tile in ID_TO_TILE:
+        completions[(tile, tile, tile)].add(tile)
+
+    empty = frozenset()
+    return {key: frozenset(tiles) if tiles else empty for key, tiles in completions.items()}
+
+
+def get_cache_dir():
+    """磁盘缓存目录，不使用磁盘缓存时返回None"""
+    return os.environ.get(CACHE_DIR_ENV, _DEFAULT_CACHE_DIR) or None
+
+
+def _cache_path(name, suffix='.pickle'):
+    """磁盘缓存文件路径，不使用磁盘缓存时返回None"""
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    return os.path.join(cache_dir, f"{name}_v{_INDEX_VERSION}{suffix}")
+
+
+def _load_cached(path):
+    """读取磁盘缓存，文件不存在或已损坏时返回None"""
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _store_cached(path, data):
+    """写入磁盘缓存（先写临时文件再替换，写入失败时忽略）"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def get_group_completion_index(require_sum_gte_10=True):
+    """
+    获取"3张牌 -> 能补成有效组（算式或刻子）的牌"的索引
+
+    与 ArithmeticMahjong.is_valid_group 的判定完全相同：
+    万用牌可以按任意一种替换组成算式，刻子必须是4张相同的牌。
+    每种规则只构建一次，并缓存到磁盘（目录见 SUANSHU_CACHE_DIR）
+
+    参数：
+        require_sum_gte_10: 是否要求加法算式的和>=10（进阶规则）
+
+    返回：
+        只读映射: {3张牌的标准形式: frozenset(能补成有效组的牌，含万用牌)}，
+        包含所有牌面（ID_TO_TILE）中的3张组合；不在映射中说明有牌不在牌面范围内
+    """
+    def build():
+        path = _cache_path(f"group_completion_{'advanced' if require_sum_gte_10 else 'newbie'}")
+        index = _load_cached(path) if path else None
+        if index is None:
+            index = _build_group_completion_index(require_sum_gte_10)
+            if path:
+                _store_cached(path, index)
+        return MappingProxyType(index)
+
+    return _get_or_build(_GROUP_COMPLETION_INDEXES, require_sum_gte_10, build)
+
+
+def rule_bit(require_sum_gte_10):
+    """规则对应的规则位"""
+    return RULE_ADVANCED if require_sum_gte_10 else RULE_NEWBIE
+
+
+def get_group_rule_index():
+    """
+    获取两种规则合并的补全索引：每个能补成有效组的牌标记它在哪些规则下有效
+
+    返回：
+        只读映射: {3张牌的标准形式: {能补成有效组的牌: 规则位}}，
+        规则位为 RULE_NEWBIE / RULE_ADVANCED 的组合
+    """
+    def build():
+        newbie = get_group_completion_index(False)
+        advanced = get_group_completion_index(True)
+        index = {}
+        for key, tiles in newbie.items():
+            advanced_tiles = advanced.get(key, frozenset())
+            index[key] = {tile: RULE_NEWBIE | (RULE_ADVANCED if tile in advanced_tiles else 0)
+                          for tile in tiles}
+            for tile in advanced_tiles - tiles:
+                index[key][tile] = RULE_ADVANCED
+        return MappingProxyType(index)
+
+    return _get_or_build(_GROUP_RULE_INDEXES, ALL_RULES, build)
@@ -0,0 +1,284 @@
+"""
+手牌二进制编码模块
+把 Hand 对象编码成定长（64字节）的二进制记录，用于大批量存档和回放：
+读取时不需要再解析文本，可以用内存映射按记录随机访问
+
+记录格式（小端序）：
+    字节 0      : 鸣牌数(0-4, 3位) | 手牌是否已分组(第3位) | 是否有胡牌(第4位)
+                  | should_win_in_mode(第5-6位: 0=None, 1=False, 2=True)
+    字节 1-2    : 鸣牌面子类型（每个3位，最多4个）
+    字节 3      : 手牌部分的张数（已分组时为所有分组的总张数）
+    字节 4      : 胡牌方式编号（0表示无）
+    字节 5      : 胡牌类型编号（0表示无）
+    字节 6      : 胡牌
+    字节 7      : 胡牌在手牌部分中的位置（255表示不在手牌部分中）
+    字节 8-10   : 分组结束位置的位掩码（第i位为1表示第i张牌是一组的最后一张）
+    字节 11     : 保留
+    字节 12-63  : 牌（先鸣牌，后手牌部分），最多52张
+
+每张牌1个字节：低6位是牌编号（TILE_TO_ID），第6位是宝牌标记，第7位是万用牌代替标记
+
+文件格式：8字节文件头（MAGIC）+ 若干条记录
+"""
+
+import mmap
+import struct
+
+from calculator_base.constants import TILE_TO_ID, ID_TO_TILE
+from calculator_base.hand_structure import Hand, MeldedGroup, create_tile_from_value
+
+
+RECORD_SIZE = 64
+MAGIC = b'SSMJHND\x01'  # 最后一个字节是格式版本
+
+_HEADER = struct.Struct('<BHBBBBB3sB')
+_MAX_TILES = RECORD_SIZE - _HEADER.size
+_MAX_MELDS = 4
+_NO_POSITION = 255
+
+_DORA_BIT = 0x40
+_JOKER_USED_BIT = 0x80
+_ID_MASK = 0x3F
+
+# 编号一旦写入存档就不能改变，新的取值只能加在末尾
+MELD_TYPES = ('chi', 'peng', 'gang_ming', 'gang_an', 'single_gang')
+WINNING_METHODS = (None, '自摸', '杠上开花', '海底捞月', '抢杠', '天胡', '点胡')
+WIN_TYPES = (None, '算术麻将', '传统麻将', '八小对', '八仙过海', '四仙过海', '天龙', '地龙', '十三幺')
+
+_MELD_TILE_COUNTS = {'chi': 4, 'peng': 4, 'gang_ming': 5, 'gang_an': 5, 'single_gang': 1}
+_SHOULD_WIN_CODES = {None: 0, False: 1, True: 2}
+_SHOULD_WIN_VALUES = (None, False, True)
+
+
+def _encode_tile(tile):
+    """编码一张牌（Tile对象）"""
+    tile_id = TILE_TO_ID.get(tile.value)
+    if tile_id is None or isinstance(tile.value, bool):
+        raise ValueError(f"无法编码的牌: {tile.value!r}")
+    return tile_id | (_DORA_BIT if tile.is_dora else 0) | (_JOKER_USED_BIT if tile.is_joker_used else 0)
+
+
+def _decode_tile(byte):
+    """解码一张牌"""
+    return create_tile_from_value(ID_TO_TILE[byte & _ID_MASK],
+                                  bool(byte & _DORA_BIT), bool(byte & _JOKER_USED_BIT))
+
+
+def _code_of(values, value, name):
+    """取值在编号表中的位置"""
+    try:
+        return values.index(value)
+    except ValueError:
+        raise ValueError(f"无法编码的{name}: {value!r}") from None
+
+
+def encode_hand(hand):
+    """
+    把 Hand 对象编码成64字节的记录
+
+    参数：
+        hand: Hand对象
+
+    返回：
+        bytes（长度为 RECORD_SIZE）
+
+    异常：
+        ValueError: 鸣牌或牌数超出格式限制、牌不在牌面范围内、未知的胡牌方式等
+    """
+    if len(hand.melded_groups) > _MAX_MELDS:
+        raise ValueError(f"鸣牌面子最多{_MAX_MELDS}个，实际{len(hand.melded_groups)}个")
+
+    grouped = bool(hand.hand_groups)
+    if grouped and hand.hand_tiles:
+        raise ValueError("手牌不能同时有分组和未分组的牌")
+
+    meld_types = 0
+    tiles = []
+    for i, group in enumerate(hand.melded_groups):
+        meld_types |= _code_of(MELD_TYPES, group.group_type, '面子类型') << (3 * i)
+        tiles.extend(group.tiles)
+
+    hand_part = []
+    group_ends = 0
+    if grouped:
+        for group in hand.hand_groups:
+            if not group:
+                raise ValueError("手牌分组不能为空")
+            hand_part.extend(group)
+            group_ends |= 1 << (len(hand_part) - 1)
+    else:
+        hand_part = list(hand.hand_tiles)
+
+    tiles.extend(hand_part)
+    if len(tiles) > _MAX_TILES or len(hand_part) > 24:
+        raise ValueError(f"牌数超出格式限制: {len(tiles)}")
+
+    winning_byte = 0
+    winning_position = _NO_POSITION
+    if hand.winning_tile is not None:
+        winning_byte = _encode_tile(hand.winning_tile)
+        for i, tile in enumerate(hand_part):
+            if tile is hand.winning_tile:
+                winning_position = i
+                break
+
+    flags = (len(hand.melded_groups)
+             | (grouped << 3)
+             | ((hand.winning_tile is not None) << 4)
+             | (_SHOULD_WIN_CODES[hand.should_win_in_mode] << 5))
+
+    header = _HEADER.pack(
+        flags, meld_types, len(hand_part),
+        _code_of(WINNING_METHODS, hand.winning_method, '胡牌方式'),
+        _code_of(WIN_TYPES, hand.win_type, '胡牌类型'),
+        winning_byte, winning_position, group_ends.to_bytes(3, 'little'), 0,
+    )
+    body = bytes(_encode_tile(tile) for tile in tiles)
+    return header + body + bytes(_MAX_TILES - len(body))
+
+
+def decode_hand(record):
+    """
+    把64字节的记录解码成 Hand 对象
+
+    参数：
+        record: bytes / bytearray / memoryview（长度为 RECORD_SIZE）
+
+    返回：
+        Hand对象
+    """
+    if len(record) != RECORD_SIZE:
+        raise ValueError(f"记录长度必须是{RECORD_SIZE}字节，实际{len(record)}字节")
+
+    (flags, meld_types, n_hand, method_code, win_type_code,
+     winning_byte, winning_position, group_ends, _) = _HEADER.unpack_from(record)
+    tiles = record[_HEADER.size:]
+
+    melded_groups = []
+    offset = 0
+    for i in range(flags & 0x07):
+        group_type = MELD_TYPES[(meld_types >> (3 * i)) & 0x07]
+        count = _MELD_TILE_COUNTS[group_type]
+        melded_groups.append(MeldedGroup(
+            [_decode_tile(b) for b in tiles[offset:offset + count]], group_type))
+        offset += count
+
+    hand_part = [_decode_tile(b) for b in tiles[offset:offset + n_hand]]
+
+    winning_tile = None
+    if flags & 0x10:
+        if winning_position != _NO_POSITION:
+            winning_tile = hand_part[winning_position]
+        else:
+            winning_tile = _decode_tile(winning_byte)
+
+    hand_groups = []
+    if flags & 0x08:
+        ends = int.from_bytes(group_ends, 'little')
+        start = 0
+        for i in range(n_hand):
+            if ends >> i & 1:
+                hand_groups.append(hand_part[start:i + 1])
+                start = i + 1
+        hand_part = []
+
+    return Hand(
+        melded_groups=melded_groups,
+        hand_tiles=hand_part,
+        hand_groups=hand_groups,
+        winning_tile=winning_tile,
+        winning_method=WINNING_METHODS[method_code],
+        win_type=WIN_TYPES[win_type_code],
+        should_win_in_mode=_SHOULD_WIN_VALUES[(flags >> 5) & 0x03],
+    )
+
+
+def write_hands(path, hands):
+    """
+    把手牌写入文件（文件头 + 定长记录）
+
+    参数：
+        path: 文件路径
+        hands: Hand对象的可迭代对象
+
+    返回：
+        写入的记录数
+    """
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        for hand in hands:
+            f.write(encode_hand(hand))
+            count += 1
+    return count
+
+
+class HandFileReader:
+    """
+    用内存映射读取手牌文件
+
+    records() 返回的 memoryview 直接指向映射的内存（不复制），
+    关闭之前需要先释放（或不再持有）这些 memoryview
+
+    示例：
+        with HandFileReader(path) as reader:
+            for hand in reader.hands():
+                ...
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"不是手牌文件: {path}") from None
+
+        if self._mmap[:len(MAGIC)] != MAGIC or (len(self._mmap) - len(MAGIC)) % RECORD_SIZE:
+            self._mmap.close()
+            self._file.close()
+            raise ValueError(f"不是手牌文件: {path}")
+
+        self._view = memoryview(self._mmap)[len(MAGIC):]
+        self._count = len(self._view) // RECORD_SIZE
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """第 index 条记录（memoryview，不复制）"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start = index * RECORD_SIZE
+        return self._view[start:start + RECORD_SIZE]
+
+    def records(self, start=0, stop=None):
+        """依次生成记录（memoryview，不复制）"""
+        stop = self._count if stop is None else min(stop, self._count)
+        view = self._view
+        for offset in range(start * RECORD_SIZE, stop * RECORD_SIZE, RECORD_SIZE):
+            yield view[offset:offset + RECORD_SIZE]
+
+    def hands(self, start=0, stop=None):
+        """依次解码生成 Hand 对象（按需解码）"""
+        for record in self.records(start, stop):
+            hand = decode_hand(record)
+            record.release()
+            yield hand
+
+    def close(self):
+        """关闭文件（仍被持有的 memoryview 会导致 BufferError）"""
+        if self._mmap is None:
+            return
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
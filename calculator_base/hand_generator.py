@@ -0,0 +1,321 @@
+"""
+随机手牌生成器
+按照牌库（TILE_POOL）的张数限制发牌，用于压力测试和性能基准
+
+- 胡牌手牌（16/12/8/4张）：随机抽取若干个合法的算式/刻子拼成
+- 听牌手牌（15/11/7/3张）：在胡牌手牌的基础上随机拿掉一张
+- 可以附带鸣牌（吃/碰），返回Hand对象
+
+安装了 NumPy 时整批向量化生成（随机排列 + 张数校验），否则退回纯 Python 实现。
+相同的种子（在同一种实现下）总能得到相同的结果。
+"""
+
+import random
+
+from calculator_base.constants import (
+    SYMBOLS, JOKERS, TILE_TO_ID, ID_TO_TILE, NUM_TILE_IDS,
+)
+from calculator_base.hand_structure import Hand, MeldedGroup, create_tile_from_value
+from calculator_base.empty_listening_checker import TILE_POOL, get_joker_for_tile
+from calculator_base.formula_table import get_formula_table
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+WINNING_SIZES = (16, 12, 8, 4)
+READY_SIZES = (15, 11, 7, 3)
+
+# 向量化生成时每批处理的行数（控制内存占用）
+_CHUNK_SIZE = 65536
+
+# 连续多少次抽样都没有符合牌库张数的手牌时放弃（避免死循环）
+_MAX_RETRIES = 1000
+
+
+def build_wall():
+    """
+    按牌库配置构建完整的牌墙（未洗牌，顺序固定）
+
+    返回：
+        牌的列表
+    """
+    wall = []
+    for tile in ID_TO_TILE:
+        wall.extend([tile] * TILE_POOL.get(tile, 0))
+    return wall
+
+
+def _pool_counts():
+    """牌库中每个编号的张数"""
+    return [TILE_POOL.get(tile, 0) for tile in ID_TO_TILE]
+
+
+def _build_group_table(require_sum_gte_10):
+    """
+    牌库能凑出的所有组（算式 + 刻子），以牌编号表示
+
+    返回：
+        [(tile_ids, is_kezi), ...]
+    """
+    pool = _pool_counts()
+    groups = []
+    for formula in get_formula_table(require_sum_gte_10):
+        ids = tuple(TILE_TO_ID[t] for t in formula)
+        # 同一张牌在算式中出现多次时也不能超过牌库张数
+        if all(ids.count(i) <= pool[i] for i in ids):
+            groups.append((ids, False))
+    for tile_id, count in enumerate(pool):
+        if count >= 4 and ID_TO_TILE[tile_id] not in JOKERS:
+            groups.append(((tile_id,) * 4, True))
+    return groups
+
+
+# 每张牌对应的万用牌编号（没有则为-1）
+_JOKER_OF_ID = [
+    TILE_TO_ID[get_joker_for_tile(tile)] if get_joker_for_tile(tile) else -1
+    for tile in ID_TO_TILE
+]
+
+
+def _check_size(size, melds):
+    if size not in WINNING_SIZES and size not in READY_SIZES:
+        raise ValueError(f"不支持的手牌张数: {size}")
+    if melds < 0 or size + melds * 4 > 16:
+        raise ValueError(f"鸣牌组数不合法: {melds}（手牌{size}张）")
+
+
+def _to_output(row_ids, size, melds):
+    """把一行牌编号转换成输出格式（列表或Hand对象）"""
+    tiles = [ID_TO_TILE[i] for i in row_ids]
+    if melds == 0:
+        return tiles
+
+    melded_groups = []
+    for g in range(melds):
+        group_tiles = [create_tile_from_value(t) for t in tiles[g * 4:(g + 1) * 4]]
+        group_type = 'peng' if len(set(tiles[g * 4:(g + 1) * 4])) == 1 else 'chi'
+        melded_groups.append(MeldedGroup(group_tiles, group_type))
+
+    return Hand(
+        melded_groups=melded_groups,
+        hand_tiles=[create_tile_from_value(t) for t in tiles[melds * 4:]],
+        should_win_in_mode=size in WINNING_SIZES,
+    )
+
+
+# ============================================================
+# 纯 Python 实现
+# ============================================================
+
+def _retries_exhausted(size, melds):
+    return ValueError(f"连续{_MAX_RETRIES}次抽样都超出牌库张数，无法生成手牌（{size}张，鸣牌{melds}组）")
+
+
+def _generate_python(count, size, melds, seed, joker_rate, require_sum_gte_10):
+    rng = random.Random(seed)
+    groups = _build_group_table(require_sum_gte_10)
+    pool = _pool_counts()
+    n_groups = (size + 1) // 4 + melds
+    is_ready = size in READY_SIZES
+
+    rows = []
+    retries = 0
+    while len(rows) < count:
+        chosen = [groups[rng.randrange(len(groups))] for _ in range(n_groups)]
+
+        used = [0] * NUM_TILE_IDS
+        for ids, _ in chosen:
+            for i in ids:
+                used[i] += 1
+        if any(used[i] > pool[i] for i in range(NUM_TILE_IDS)):
+            retries += 1
+            if retries >= _MAX_RETRIES:
+                raise _retries_exhausted(size, melds)
+            continue
+        retries = 0
+
+        row = []
+        kezi_slots = []
+        for ids, is_kezi in chosen:
+            kezi_slots.extend([is_kezi] * 4)
+            row.extend(ids)
+
+        # 随机把算式中的牌换成万用牌（每种万用牌只有1张）
+        if joker_rate > 0:
+            for pos in range(len(row)):
+                joker_id = _JOKER_OF_ID[row[pos]]
+                if (joker_id >= 0 and not kezi_slots[pos]
+                        and used[joker_id] < pool[joker_id]
+                        and rng.random() < joker_rate):
+                    used[joker_id] += 1
+                    row[pos] = joker_id
+
+        meld_part = row[:melds * 4]
+        hand_part = row[melds * 4:]
+        if is_ready:
+            hand_part.pop(rng.randrange(len(hand_part)))
+        rng.shuffle(hand_part)
+        rows.append(meld_part + hand_part)
+
+    return rows
+
+
+# ============================================================
+# NumPy 向量化实现
+# ============================================================
+
+def _generate_numpy(count, size, melds, seed, joker_rate, require_sum_gte_10):
+    rng = np.random.default_rng(seed)
+    groups = _build_group_table(require_sum_gte_10)
+    group_ids = np.array([ids for ids, _ in groups], dtype=np.int16)
+    group_kezi = np.array([is_kezi for _, is_kezi in groups], dtype=bool)
+
+    # 每个组对每种牌的张数 (G, NUM_TILE_IDS)
+    group_counts = np.zeros((len(groups), NUM_TILE_IDS), dtype=np.int16)
+    for g, (ids, _) in enumerate(groups):
+        for i in ids:
+            group_counts[g, i] += 1
+
+    pool = np.array(_pool_counts(), dtype=np.int16)
+    joker_of = np.array(_JOKER_OF_ID, dtype=np.int16)
+    joker_ids = [TILE_TO_ID[j] for j in sorted(JOKERS)]
+
+    n_groups = (size + 1) // 4 + melds
+    n_tiles = n_groups * 4
+    n_meld_tiles = melds * 4
+    is_ready = size in READY_SIZES
+
+    chunks = []
+    produced = 0
+    retries = 0
+    while produced < count:
+        batch = min(_CHUNK_SIZE, count - produced)
+        # 抽样时多抽一些，抵消张数校验的拒绝率
+        choice = rng.integers(0, len(groups), size=(batch * 2, n_groups))
+        used = group_counts[choice].sum(axis=1)
+        accepted = choice[(used <= pool).all(axis=1)][:batch]
+        if len(accepted) == 0:
+            retries += 1
+            if retries >= _MAX_RETRIES:
+                raise _retries_exhausted(size, melds)
+            continue
+        retries = 0
+
+        rows = group_ids[accepted].reshape(len(accepted), n_tiles)
+
+        if joker_rate > 0:
+            used = group_counts[accepted].sum(axis=1)
+            replaceable = ~np.repeat(group_kezi[accepted], 4, axis=1)
+            candidates = replaceable & (rng.random(rows.shape) < joker_rate)
+            for joker_id in joker_ids:
+                mask = candidates & (joker_of[rows] == joker_id)
+                has = mask.any(axis=1) & (used[:, joker_id] < pool[joker_id])
+                first = mask.argmax(axis=1)
+                row_idx = np.nonzero(has)[0]
+                rows[row_idx, first[row_idx]] = joker_id
+
+        meld_part = rows[:, :n_meld_tiles]
+        hand_part = rows[:, n_meld_tiles:]
+        if is_ready:
+            drop = rng.integers(0, hand_part.shape[1], size=len(hand_part))
+            keep = np.ones(hand_part.shape, dtype=bool)
+            keep[np.arange(len(hand_part)), drop] = False
+            hand_part = hand_part[keep].reshape(len(hand_part), hand_part.shape[1] - 1)
+        hand_part = rng.permuted(hand_part, axis=1)
+
+        chunks.append(np.concatenate([meld_part, hand_part], axis=1))
+        produced += len(accepted)
+
+    if not chunks:
+        return np.empty((0, n_tiles - is_ready), dtype=np.int16)
+    return np.concatenate(chunks, axis=0)
+
+
+# ============================================================
+# 对外接口
+# ============================================================
+
+def generate_hand_ids(count, size=16, melds=0, seed=None, joker_rate=0.0,
+                      require_sum_gte_10=True, use_numpy=None):
+    """
+    批量生成手牌，以牌编号（见 constants.TILE_TO_ID）表示
+
+    参数：
+        count: 生成的手牌数量
+        size: 手牌（不含鸣牌）张数，胡牌 16/12/8/4，听牌 15/11/7/3
+        melds: 鸣牌组数，每组4张，排在每行最前面
+        seed: 随机种子
+        joker_rate: 算式中每张牌被换成万用牌的概率（受万用牌张数限制）
+        require_sum_gte_10: 使用的算式规则
+        use_numpy: 是否使用 NumPy（默认有则用）
+
+    返回：
+        NumPy 可用时为 (count, size + melds*4) 的数组，否则为列表的列表
+    """
+    _check_size(size, melds)
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    if use_numpy and not NUMPY_AVAILABLE:
+        raise ImportError("未安装 NumPy，无法使用向量化生成")
+
+    if use_numpy:
+        return _generate_numpy(count, size, melds, seed, joker_rate, require_sum_gte_10)
+    return _generate_python(count, size, melds, seed, joker_rate, require_sum_gte_10)
+
+
+def generate_hands(count, size=16, melds=0, seed=None, joker_rate=0.0,
+                   require_sum_gte_10=True, use_numpy=None):
+    """
+    批量生成手牌
+
+    参数同 generate_hand_ids
+
+    返回：
+        手牌列表。没有鸣牌时每手牌是牌的列表（可直接传给 can_win / is_ready），
+        有鸣牌时是Hand对象（鸣牌为吃/碰）
+
+    注意：生成的胡牌只保证能分组，不保证达到起胡番数
+    """
+    rows = generate_hand_ids(count, size, melds, seed, joker_rate,
+                             require_sum_gte_10, use_numpy)
+    return [_to_output([int(i) for i in row], size, melds) for row in rows]
+
+
+def deal_random_hands(count, size=15, seed=None, use_numpy=None):
+    """
+    从洗好的牌墙中直接发牌（不保证胡牌或听牌）
+
+    参数：
+        count: 发牌次数（每次都重新洗牌）
+        size: 每手牌的张数
+        seed: 随机种子
+        use_numpy: 是否使用 NumPy（默认有则用）
+
+    返回：
+        NumPy 可用时为 (count, size) 的牌编号数组，否则为牌编号列表的列表
+    """
+    wall_ids = [TILE_TO_ID[t] for t in build_wall()]
+    if size > len(wall_ids):
+        raise ValueError(f"牌墙只有{len(wall_ids)}张牌")
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+
+    if use_numpy:
+        rng = np.random.default_rng(seed)
+        wall = np.array(wall_ids, dtype=np.int16)
+        chunks = []
+        for start in range(0, count, _CHUNK_SIZE):
+            batch = min(_CHUNK_SIZE, count - start)
+            walls = rng.permuted(np.broadcast_to(wall, (batch, len(wall))), axis=1)
+            chunks.append(walls[:, :size])
+        if not chunks:
+            return np.empty((0, size), dtype=np.int16)
+        return np.concatenate(chunks, axis=0)
+
+    rng = random.Random(seed)
+    return [rng.sample(wall_ids, size) for _ in range(count)]
@@ -0,0 +1,343 @@
+"""
+对局中的手牌状态
+对局中手牌每轮只变一张（摸一张、打一张），HandState 在摸牌/打牌时增量维护：
+
+- 算术麻将：保留"去掉哪3张牌后其余的牌能全部分组"的集合（听牌就是这些3张牌能补成
+  有效组的牌）。打牌后新的集合由两部分组成：原来含打出的牌的3张换成摸进的牌，
+  以及摸进的牌所在的每个有效组之外的牌再搜索一次；不含摸进的牌的组不重新搜索。
+  子手牌的搜索结果由 SharedPartitioner 整局缓存
+- 传统麻将：按花色分开计算，每种花色按张数缓存能组成的面子/将的数量，
+  摸牌/打牌只改变一两种花色，其余花色直接查缓存，每张候选牌只需合并各花色的结果
+- 分组方案：只在 wait_groups 时才计算
+- 听牌：打出摸进的牌（摸切）或回到以前出现过的手牌时直接复用
+- 自摸判断：摸牌时只看摸到的牌是否在听牌中，不需要搜索
+- 剩余张数：手牌和场上可见的牌的计数随摸牌/打牌/看到的牌更新
+
+随机听牌手牌随机摸打时，每轮（摸牌 + 打牌）的耗时约为（1个CPU，多次测量的范围）：
+没有万用牌时中位数1ms、99%的轮次3-7ms以内；有万用牌时含万用牌的组多得多，
+中位数1.5-3ms、90%的轮次6-10ms以内，但约1%的轮次超过10ms（最慢20-50ms），
+这些轮次达不到每轮10ms以内。
+
+用法：
+    state = HandState(hand)          # 15张（或11/7/3张）
+    state.waits                       # {胡牌类型: [听的牌]}
+    win_types = state.draw(tile)      # 摸牌，返回能胡的胡牌类型
+    state.discard(tile)               # 打牌，听牌随之更新
+    state.see(tile)                   # 场上其他人打出/鸣的牌
+"""
+
+from collections import Counter
+
+from calculator_base.constants import SYMBOLS
+from calculator_base.parser import tile_sort_key
+from calculator_base.discard_advisor import SharedPartitioner, tile_live_count, near_sequence
+
+
+# 传统麻将的花色：有顺子的花色和只能组成刻子/将的字牌
+_NUMBERED_SUITS = ('条', '筒', '万')
+_SUITS = _NUMBERED_SUITS + ('风', '箭')
+_MAX_MELDS = 4
+_MAX_PAIRS = 2
+
+
+def _sort_tiles(tiles):
+    return sorted(tiles, key=lambda x: (x not in SYMBOLS, x))
+
+
+class _TraditionalWaits:
+    """
+    按花色计算的传统麻将听牌（结果与逐张调用 can_win_traditional_counting 相同）
+
+    16张牌能胡，当且仅当每种花色的牌（连同这种花色的万用牌）能各自组成若干面子和将，
+    合计4个面子、2个将，用掉的0（能代替所有牌）不超过手里的张数；剩下的0自己成组
+    """
+
+    def __init__(self, checker):
+        self.checker = checker
+        # {(花色, 张数, 同花色万用牌数, 可用的0): frozenset((面子数, 将数, 用掉的0))}
+        self._options = {}
+        self._candidates = {suit: [] for suit in _SUITS}
+        for num, (suit, value) in checker.num_to_tile.items():
+            if suit in self._candidates:
+                self._candidates[suit].append((num, value))
+
+    def waits(self, tiles):
+        """15张牌听的牌（算术麻将的数字表示）"""
+        faces, jokers = self.checker.convert_to_tiles(tiles)
+        if faces is None:
+            return frozenset()
+        generic = sum(1 for _, joker_type in jokers if joker_type == 0)
+        typed = Counter(joker_type for _, joker_type in jokers if joker_type != 0)
+        counts = {suit: Counter() for suit in _SUITS}
+        for suit, value in faces:
+            counts[suit][value] += 1
+
+        tables = {suit: self._suit_options(suit, counts[suit], typed[suit], generic)
+                  for suit in _SUITS}
+        result = set()
+        for suit in _SUITS:
+            rest = {(0, 0, 0)}
+            for other in _SUITS:
+                if other != suit:
+                    rest = self._combine(rest, tables[other], generic)
+            suit_counts = counts[suit]
+            for num, value in self._candidates[suit]:
+                suit_counts[value] += 1
+                options = self._suit_options(suit, suit_counts, typed[suit], generic)
+                suit_counts[value] -= 1
+                if self._combine(rest, options, generic):
+                    result.add(num)
+        return frozenset(result)
+
+    @staticmethod
+    def _combine(left, right, generic):
+        return {(m1 + m2, p1 + p2, g1 + g2)
+                for m1, p1, g1 in left for m2, p2, g2 in right
+                if m1 + m2 <= _MAX_MELDS and p1 + p2 <= _MAX_PAIRS and g1 + g2 <= generic}
+
+    def _suit_options(self, suit, counts, typed, generic):
+        key = tuple(sorted((value, count) for value, count in counts.items() if count > 0))
+        return self._search(suit, key, typed, generic)
+
+    def _search(self, suit, counts, typed, generic):
+        """
+        一种花色的牌能组成的 (面子数, 将数, 用掉的0)
+
+        与 _search_counting 相同：每次处理最小的一张牌所在的组，
+        缺牌时先用同花色的万用牌，再用0
+        """
+        key = (suit, counts, typed, generic)
+        options = self._options.get(key)
+        if options is not None:
+            return options
+
+        result = set()
+        if not counts:
+            # 只剩同花色的万用牌：自己成组，不够时用0补
+            for melds in range(_MAX_MELDS + 1):
+                for pairs in range(_MAX_PAIRS + 1):
+                    size = 3 * melds + 2 * pairs
+                    if melds + pairs <= typed <= size and size - typed <= generic:
+                        result.add((melds, pairs, size - typed))
+        else:
+            first = counts[0][0]
+            groups = [((first, first), 0, 1), ((first,) * 3, 1, 0)]
+            if suit in _NUMBERED_SUITS:
+                groups += [((start, start + 1, start + 2), 1, 0)
+                           for start in (first, first - 1, first - 2) if 1 <= start <= 7]
+            for group, melds, pairs in groups:
+                remaining = dict(counts)
+                left, used = typed, 0
+                for value in group:
+                    if remaining.get(value, 0) > 0:
+                        remaining[value] -= 1
+                    elif left > 0:
+                        left -= 1
+                    elif used < generic:
+                        used += 1
+                    else:
+                        break
+                else:
+                    rest = tuple((value, count) for value, count in remaining.items() if count > 0)
+                    for m, p, g in self._search(suit, rest, left, generic - used):
+                        if m + melds <= _MAX_MELDS and p + pairs <= _MAX_PAIRS:
+                            result.add((m + melds, p + pairs, g + used))
+
+        options = frozenset(result)
+        self._options[key] = options
+        return options
+
+
+class HandState:
+    """
+    可变的手牌状态（手牌张数在 4n-1 张和 4n 张之间交替）
+
+    参数：
+        hand: 初始手牌（15/11/7/3张，或摸牌后的16/12/8/4张）
+        mjong: ArithmeticMahjong对象（默认进阶规则）
+        visible_tiles: 场上已经可见的牌（用于计算剩余张数）
+        check_traditional: 是否维护传统麻将听牌
+
+    属性：
+        tiles: 当前手牌（排序后的列表）
+        waits: 当前的听牌 {胡牌类型: [听的牌]}（摸牌后是摸牌前的听牌）
+    """
+
+    def __init__(self, hand, mjong=None, visible_tiles=(), check_traditional=True):
+        if mjong is None:
+            from calculator_base.mahjong_checker import ArithmeticMahjong
+            mjong = ArithmeticMahjong()
+        if len(hand) % 4 not in (0, 3):
+            raise ValueError(f"手牌张数应为4n-1或4n，实际{len(hand)}张")
+
+        self.mjong = mjong
+        self._tiles = Counter(hand)
+        self._used = Counter(hand)
+        self._used.update(visible_tiles)
+        self._partitioner = SharedPartitioner(mjong)
+        self._traditional = None
+        if check_traditional and mjong.traditional_checker is not None:
+            self._traditional = _TraditionalWaits(mjong.traditional_checker)
+        self._waits_cache = {}  # {排序后的手牌元组: ({胡牌类型: 听的牌的集合}, 剩下的3张牌的集合)}
+        self._drawn = None
+        self._key = ()
+        self._waits = {}
+        self._leftovers = None  # 去掉后其余的牌能全部分组的3张牌（4n-1张时）
+        if len(hand) % 4 == 3:
+            self._update_waits()
+
+    # ------------------------------------------------------------
+    # 状态
+    # ------------------------------------------------------------
+
+    @property
+    def tiles(self):
+        return sorted(self._tiles.elements(), key=tile_sort_key)
+
+    def __len__(self):
+        return sum(self._tiles.values())
+
+    @property
+    def waits(self):
+        return {win_type: _sort_tiles(tiles) for win_type, tiles in self._waits.items()}
+
+    @property
+    def is_ready(self):
+        return bool(self._waits)
+
+    def wait_groups(self, win_type, tile):
+        """
+        听某张牌时的分组方案（需要时才计算）
+
+        返回：
+            分组列表（十三幺、天龙、地龙为空列表）；不听这张牌时返回None
+        """
+        if tile not in self._waits.get(win_type, ()):
+            return None
+        test_hand = list(self._key) + [tile]
+        if win_type == '算术麻将':
+            return self._partitioner.partition(test_hand)[1]
+        if win_type == '传统麻将':
+            return self.mjong.traditional_checker.can_win_traditional_counting(test_hand)[1]
+        if win_type == '八小对':
+            return self.mjong.eight_pairs_checker.can_win_eight_pairs(test_hand)[1]
+        return []
+
+    def live_waits(self):
+        """
+        每张听牌的剩余情况（手牌和场上可见的牌以外）
+
+        返回：
+            {听的牌: (状态, 剩余张数)}，状态为 'available' | 'need_joker' | 'empty'
+        """
+        wait_tiles = set()
+        for tiles in self._waits.values():
+            wait_tiles.update(tiles)
+        return {tile: tile_live_count(tile, self._used) for tile in _sort_tiles(wait_tiles)}
+
+    # ------------------------------------------------------------
+    # 摸牌 / 打牌
+    # ------------------------------------------------------------
+
+    def draw(self, tile):
+        """
+        摸一张牌
+
+        返回：
+            能胡的胡牌类型列表（摸到的牌在听牌中的胡牌类型）
+        """
+        if len(self) % 4 != 3:
+            raise ValueError("手牌已经是4n张，需要先打出一张")
+        self._tiles[tile] += 1
+        self._used[tile] += 1
+        self._drawn = tile
+        return [win_type for win_type, tiles in self._waits.items() if tile in tiles]
+
+    def discard(self, tile):
+        """
+        打出一张牌，更新听牌
+
+        返回：
+            打牌后的听牌 {胡牌类型: [听的牌]}
+        """
+        if len(self) % 4 != 0:
+            raise ValueError("手牌是4n-1张，需要先摸一张")
+        if self._tiles[tile] == 0:
+            raise ValueError(f"手牌中没有 {tile}")
+        self._tiles[tile] -= 1
+        if self._tiles[tile] == 0:
+            del self._tiles[tile]
+        # 打出的牌仍然可见，剩余张数不变
+        drawn, self._drawn = self._drawn, None
+        if tile != drawn:
+            self._update_waits(drawn, tile)
+        return self.waits
+
+    def see(self, *tiles):
+        """记下场上可见的牌（其他人打出或鸣的牌）"""
+        self._used.update(tiles)
+
+    def _update_waits(self, drawn=None, discarded=None):
+        self._key = key = tuple(self.tiles)
+        cached = self._waits_cache.get(key)
+        if cached is None:
+            leftovers = self._next_leftovers(key, drawn, discarded)
+            cached = (self._compute_waits(list(key), leftovers), leftovers)
+            self._waits_cache[key] = cached
+        self._waits, self._leftovers = cached
+
+    def _next_leftovers(self, tiles, drawn, discarded):
+        """
+        打牌后去掉哪3张牌其余的牌能全部分组
+
+        剩下的3张含摸进的牌：就是原来含打出的牌的3张，把打出的牌换成摸进的牌；
+        摸进的牌在某个有效组里：只搜索这个组之外的牌
+        """
+        if self._leftovers is None or drawn is None:
+            return self._partitioner.leftovers(tiles)
+        result = set()
+        for partial in self._leftovers:
+            if discarded in partial:
+                rest = list(partial)
+                rest.remove(discarded)
+                rest.append(drawn)
+                result.add(tuple(sorted(rest, key=tile_sort_key)))
+        for _, rest in self._partitioner.groups_with(tiles, drawn):
+            result |= self._partitioner.leftovers(rest)
+        return frozenset(result)
+
+    def _compute_waits(self, tiles, leftovers):
+        """{胡牌类型: 听的牌的集合}（与 is_ready 的胡牌类型和顺序相同）"""
+        waits = {}
+        arith = self._partitioner.waits_from_leftovers(leftovers)
+        if arith:
+            waits['算术麻将'] = arith
+
+        if self._traditional is not None and len(tiles) == 15:
+            trad = self._traditional.waits(tiles)
+            if trad:
+                waits['传统麻将'] = trad
+
+        if self.mjong.eight_pairs_checker is not None:
+            is_ready, ready_tiles = self.mjong.eight_pairs_checker.is_ready_eight_pairs(tiles)
+            if is_ready:
+                waits['八小对'] = frozenset(ready_tiles)
+
+        for win_type, is_ready_func in self._special_checks(tiles):
+            is_ready, ready_tiles = is_ready_func(tiles)
+            if is_ready:
+                waits[win_type] = frozenset(ready_tiles)
+        return waits
+
+    def _special_checks(self, tiles):
+        """十三幺、天龙、地龙（只有15张时；差一张也凑不出龙的不检查）"""
+        checker = self.mjong.special_winning_checker
+        if checker is None or len(tiles) != 15:
+            return []
+        numbers = {t for t in tiles if isinstance(t, int)}
+        checks = [('十三幺', checker.is_ready_shi_san_yao)]
+        if near_sequence(numbers, 16, (1,)):
+            checks.append(('天龙', checker.is_ready_tian_long))
+        if near_sequence(numbers, 12, (1, 2, 3, 4)):
+            checks.append(('地龙', checker.is_ready_di_long))
+        return checks
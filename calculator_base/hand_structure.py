@@ -250,6 +250,34 @@ class Hand:
         """
         return [tile.to_simple_value() for tile in self.hand_tiles]
     
+    def copy(self) -> 'Hand':
+        """
+        复制手牌（牌、面子、分组都是新对象，修改副本不影响原手牌）
+        
+        同一张牌在多处出现时（如模式1的胡牌也在分组中），副本中仍是同一个对象
+        """
+        copied = {}
+
+        def copy_tile(tile):
+            if tile is None:
+                return None
+            new_tile = copied.get(id(tile))
+            if new_tile is None:
+                new_tile = Tile(tile.value, tile.is_dora, tile.is_joker_used, tile.joker_type)
+                copied[id(tile)] = new_tile
+            return new_tile
+
+        return Hand(
+            melded_groups=[MeldedGroup([copy_tile(t) for t in group.tiles], group.group_type)
+                           for group in self.melded_groups],
+            hand_tiles=[copy_tile(t) for t in self.hand_tiles],
+            hand_groups=[[copy_tile(t) for t in group] for group in self.hand_groups],
+            winning_tile=copy_tile(self.winning_tile),
+            winning_method=self.winning_method,
+            win_type=self.win_type,
+            should_win_in_mode=self.should_win_in_mode
+        )
+    
     def get_all_tiles_simple(self) -> List[Union[int, str]]:
         """
         获取所有牌的简单表示（包括鸣牌和手牌）
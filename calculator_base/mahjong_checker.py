@@ -1,11 +1,18 @@
 from itertools import combinations, product
 from collections import Counter
+from functools import partial, cached_property
 
 from calculator_base.constants import (
     PLUS, MULTIPLY, POWER, SYMBOLS,
     JOKER_TIAO, JOKER_TONG, JOKER_WAN, JOKER_SYMBOL, JOKERS,
-    ALL_TILES,
+    ALL_TILES, TILE_TO_ID,
 )
+from calculator_base.formula_table import get_group_completion_index
+from calculator_base.result_cache import ResultCache
+from calculator_base.fingerprint import canonical_key
+from calculator_base.search_budget import SearchBudgetExceeded
+from calculator_base.exact_cover import ExactCoverPartitioner
+from calculator_base.prefilter import prefilter, PrefilterStats
 
 from calculator_base.parser import (
     parse_hand, format_hand, tile_sort_key,
@@ -22,7 +29,7 @@ except ImportError:
 
 # 导入番数计算器
 try:
-    from fan_calculator.fan_calculator import calculate_fan, format_fan_result
+    from fan_calculator.fan_calculator import FanCalculator, calculate_fan, format_fan_result
     FAN_CALCULATOR_AVAILABLE = True
 except ImportError:
     FAN_CALCULATOR_AVAILABLE = False
@@ -45,10 +52,56 @@ except ImportError:
     SPECIAL_WINNING_AVAILABLE = False
     print("警告: 未找到 special_winning_checker.py，特使胡法功能将不可用")
 
+class WaitDetails:
+    """
+    iter_ready 产出的一张听牌的详细信息
+    分组方案（需要时）和番数在第一次访问时才计算
+    """
+
+    def __init__(self, mjong, hand, tile, win_type, groups=None, find_groups=None, with_fan=True):
+        """
+        参数:
+            mjong: ArithmeticMahjong对象（用于计算番数）
+            hand: 听牌的手牌
+            tile: 听的牌
+            win_type: 胡牌类型（与 is_ready 详细信息中的 win_type 相同）
+            groups: 已知的分组方案
+            find_groups: 没有已知的分组方案时，求分组方案的函数（无参数）
+            with_fan: 是否计算番数（部分组合不计算）
+        """
+        self.tile = tile
+        self.win_type = win_type
+        self._mjong = mjong
+        self._hand = hand
+        self._find_groups = find_groups
+        self._with_fan = with_fan
+        if groups is not None:
+            self.groups = groups
+
+    @cached_property
+    def groups(self):
+        """胡牌的分组方案"""
+        return self._find_groups() if self._find_groups is not None else []
+
+    @cached_property
+    def fan_info(self):
+        """番数信息（格式与 can_win 相同），部分组合为None"""
+        if not self._with_fan:
+            return None
+        return self._mjong._calculate_fan(self._hand + [self.tile], self.groups, self.win_type, None)
+
+    def as_dict(self):
+        """转换成 is_ready(return_details=True) 中单张听牌的详细信息格式"""
+        return {'groups': self.groups, 'win_type': self.win_type, 'fan_info': self.fan_info}
+
+
 class ArithmeticMahjong:
     """算术麻将胡牌判定器（支持万用牌和番数计算）"""
 
-    def __init__(self, require_sum_gte_10=True, min_fan=None):
+    # 选番数最高的分组方案时最多计算这么多种方案的番数（有万用牌时方案可能有几百种）
+    MAX_FAN_PARTITIONS = 64
+
+    def __init__(self, require_sum_gte_10=True, min_fan=None, result_cache=None):
         """
         初始化算术麻将判定器
 
@@ -57,6 +110,8 @@ class ArithmeticMahjong:
                                True: 进阶规则，加法和必须>=10，起胡8番（默认）
                                False: 新手规则，加法和可以<10，起胡0番
             min_fan: int, 起胡番数（可选，如果不指定则根据规则自动设置）
+            result_cache: 持久化结果缓存（可选），ResultCache对象或缓存文件路径
+                          can_win / is_ready 会先查缓存，没有时再搜索
         """
         # 使用 parser 模块的常量
         self.symbols = SYMBOLS
@@ -71,6 +126,17 @@ class ArithmeticMahjong:
             # 新手规则：0番起胡；进阶规则：8番起胡
             self.min_fan = 8 if require_sum_gte_10 else 0
 
+        # 分组搜索前的筛查统计（prefilter），hit_rate 为不需要搜索的比例
+        self.prefilter_stats = PrefilterStats()
+
+        # 与另一种规则的判定器共用的分组搜索（由 multi_rule.MultiRuleMahjong 设置）
+        self.shared_search = None
+
+        # 持久化结果缓存
+        if result_cache is not None and not isinstance(result_cache, ResultCache):
+            result_cache = ResultCache(result_cache)
+        self.result_cache = result_cache
+
         # 所有可能的牌（从 parser 模块导入）
         self.all_tiles = ALL_TILES.copy()
 
@@ -225,7 +291,17 @@ class ArithmeticMahjong:
             return True
         return self.is_valid_formula(tiles)
 
-    def can_win(self, hand, winning_method=None, has_melded=False):
+    def _is_valid_last_group(self, tiles):
+        """
+        判断排序后的4张牌是否构成有效组（查补全索引）
+        有牌不在牌面范围内时按 is_valid_group 判断
+        """
+        completions = get_group_completion_index(self.require_sum_gte_10).get(tuple(tiles[:3]))
+        if completions is None or tiles[3] not in TILE_TO_ID:
+            return self.is_valid_group(tiles)
+        return tiles[3] in completions
+
+    def can_win(self, hand, winning_method=None, has_melded=False, budget=None):
         """
         判断给定的牌是否能胡牌
         会检查：
@@ -239,6 +315,8 @@ class ArithmeticMahjong:
         hand: 牌的列表，例如 [1, 2, 3, '+', 5, 5, 5, 5, ...]
         winning_method: 胡牌方式（可选），如 '自摸', '抢杠', '杠上开花' 等
         has_melded: 是否有鸣牌（如果有，不检查传统麻将）
+        budget: 搜索预算 SearchBudget（可选）。预算用完时没搜完的胡法按不能胡处理，
+                并标记 budget.truncated
         
         返回: (是否能胡, 分组方案, 胡牌类型, 番数信息)
               番数信息格式: {
@@ -247,6 +325,14 @@ class ArithmeticMahjong:
                   'can_start': 是否满足起胡条件
               }
         """
+        if self.result_cache is None:
+            return self._can_win_uncached(hand, winning_method, has_melded, budget)
+        return self._cached_result(
+            'can_win', hand, (winning_method, has_melded),
+            lambda: self._can_win_uncached(hand, winning_method, has_melded, budget), budget)
+
+    def _can_win_uncached(self, hand, winning_method=None, has_melded=False, budget=None):
+        """can_win 的判定过程（不查结果缓存）"""
         hand_len = len(hand)
         
         # 首先检查5个特殊胜利（不限牌数，因为可能有单张杠）
@@ -256,55 +342,55 @@ class ArithmeticMahjong:
             # 八仙过海
             can_win_bx, _ = self.special_winning_checker.can_win_ba_xian_guo_hai(hand)
             if can_win_bx:
-                fan_info = self._calculate_fan(hand, [], "八仙过海", winning_method)
+                fan_info = self._calculate_fan(hand, [], "八仙过海", winning_method, threshold=True)
                 win_options.append(("八仙过海", [], fan_info))
             
             # 四仙过海
             can_win_sx, _ = self.special_winning_checker.can_win_si_xian_guo_hai(hand)
             if can_win_sx:
-                fan_info = self._calculate_fan(hand, [], "四仙过海", winning_method)
+                fan_info = self._calculate_fan(hand, [], "四仙过海", winning_method, threshold=True)
                 win_options.append(("四仙过海", [], fan_info))
             
             # 天龙
             can_win_tl, _ = self.special_winning_checker.can_win_tian_long(hand)
             if can_win_tl:
-                fan_info = self._calculate_fan(hand, [], "天龙", winning_method)
+                fan_info = self._calculate_fan(hand, [], "天龙", winning_method, threshold=True)
                 win_options.append(("天龙", [], fan_info))
             
             # 地龙
             can_win_dl, _ = self.special_winning_checker.can_win_di_long(hand)
             if can_win_dl:
-                fan_info = self._calculate_fan(hand, [], "地龙", winning_method)
+                fan_info = self._calculate_fan(hand, [], "地龙", winning_method, threshold=True)
                 win_options.append(("地龙", [], fan_info))
             
             # 十三幺
             can_win_ssy, _ = self.special_winning_checker.can_win_shi_san_yao(hand)
             if can_win_ssy:
-                fan_info = self._calculate_fan(hand, [], "十三幺", winning_method)
+                fan_info = self._calculate_fan(hand, [], "十三幺", winning_method, threshold=True)
                 win_options.append(("十三幺", [], fan_info))
         
         # 算术麻将：16张
         if hand_len == 16:
             # 继续收集其他可能的胡法
             
-            # 1. 检查算术麻将胡法（4+4+4+4）
-            can_win_arith, groups_arith = self._partition_optimized(hand)
-            if can_win_arith:
-                fan_info_arith = self._calculate_fan(hand, groups_arith, "算术麻将", winning_method)
+            # 1. 检查算术麻将胡法（4+4+4+4），有多种分组时取番数最高的
+            groups_arith, fan_info_arith = self._best_arith_partition(hand, winning_method, budget, threshold=True)
+            if groups_arith is not None:
                 win_options.append(("算术麻将", groups_arith, fan_info_arith))
             
             # 2. 如果没有鸣牌，检查传统麻将（3+3+3+3+2+2）
             if not has_melded and self.traditional_checker is not None:
-                can_win_trad, groups_trad = self.traditional_checker.can_win_traditional(hand)
+                can_win_trad, groups_trad = self._search_within_budget(
+                    self.traditional_checker.can_win_traditional, hand, budget)
                 if can_win_trad:
-                    fan_info_trad = self._calculate_fan(hand, groups_trad, "传统麻将", winning_method)
+                    fan_info_trad = self._calculate_fan(hand, groups_trad, "传统麻将", winning_method, threshold=True)
                     win_options.append(("传统麻将", groups_trad, fan_info_trad))
             
             # 3. 检查八小对（2+2+2+2+2+2+2+2）- 16张！
             if self.eight_pairs_checker is not None:
                 can_win_eight, pairs = self.eight_pairs_checker.can_win_eight_pairs(hand)
                 if can_win_eight:
-                    fan_info_eight = self._calculate_fan(hand, pairs, "八小对", winning_method)
+                    fan_info_eight = self._calculate_fan(hand, pairs, "八小对", winning_method, threshold=True)
                     win_options.append(("八小对", pairs, fan_info_eight))
             
             # 4. 如果有多个可能的胡法，选择最优的
@@ -331,16 +417,17 @@ class ArithmeticMahjong:
             
             # 检查传统麻将胡法
             if self.traditional_checker is not None:
-                can_win_trad, result_trad = self.traditional_checker.can_win_traditional(hand)
+                can_win_trad, result_trad = self._search_within_budget(
+                    self.traditional_checker.can_win_traditional, hand, budget)
                 if can_win_trad:
-                    fan_info_trad = self._calculate_fan(hand, result_trad, "传统麻将", winning_method)
+                    fan_info_trad = self._calculate_fan(hand, result_trad, "传统麻将", winning_method, threshold=True)
                     win_options.append(("传统麻将", result_trad, fan_info_trad))
             
             # 检查八小对胡法（7对）
             if self.eight_pairs_checker is not None:
                 can_win_eight, pairs = self.eight_pairs_checker.can_win_eight_pairs(hand)
                 if can_win_eight:
-                    fan_info_eight = self._calculate_fan(hand, pairs, "八小对", winning_method)
+                    fan_info_eight = self._calculate_fan(hand, pairs, "八小对", winning_method, threshold=True)
                     win_options.append(("八小对", pairs, fan_info_eight))
             
             # 选择最优的胡法
@@ -364,10 +451,13 @@ class ArithmeticMahjong:
             # 其他张数都不能胡牌
             return False, [], None, None
 
-    def _calculate_fan(self, hand, groups, win_type, winning_method=None):
+    def _calculate_fan(self, hand, groups, win_type, winning_method=None, threshold=False):
         """
         计算番数
         
+        threshold: 为True时先用起胡判定模式，总番数达不到起胡番数时直接返回None
+                   （can_win 只选达到起胡番数的胡法）
+        
         返回番数信息字典
         """
         if not FAN_CALCULATOR_AVAILABLE:
@@ -382,7 +472,13 @@ class ArithmeticMahjong:
                 hand_obj = parse_mode1_already_won(hand_str)
                 # 设置win_type，防止番数计算时违反不拆移原则
                 hand_obj.win_type = win_type
-                fan_result = calculate_fan(hand_obj, min_fan=self.min_fan)
+                if threshold:
+                    decision = FanCalculator(self.min_fan).evaluate_threshold(hand_obj)
+                    if not decision.reached:
+                        return None
+                    fan_result = decision.fan_results
+                else:
+                    fan_result = calculate_fan(hand_obj, min_fan=self.min_fan)
                 
                 # 计算起胡番（排除单张杠宝牌）
                 starting_fan = fan_result.get_starting_fan(hand_obj)
@@ -625,22 +721,100 @@ class ArithmeticMahjong:
         
         return result
 
-    def _partition_optimized(self, tiles):
+    def _search_within_budget(self, search, hand, budget):
+        """执行一次搜索，预算用完时按没有找到处理（budget.truncated 已被标记）"""
+        try:
+            return search(hand, budget=budget)
+        except SearchBudgetExceeded:
+            return False, []
+
+    def _exact_cover(self, tiles, budget=None):
+        """手牌的精确覆盖搜索，有牌不在牌面范围内时返回None"""
+        if self.shared_search is not None and budget is None:
+            view = self.shared_search.view(tiles, self.require_sum_gte_10)
+            if view is not None:
+                return view
+        try:
+            return ExactCoverPartitioner(tiles, self.require_sum_gte_10, budget)
+        except ValueError:
+            return None
+
+    def _passes_prefilter(self, tiles):
+        """分组搜索前按张数筛查（prefilter），并记录到 prefilter_stats"""
+        reason = prefilter(tiles, self.require_sum_gte_10)
+        self.prefilter_stats.record(reason)
+        return reason is None
+
+    def _partition_optimized(self, tiles, budget=None):
         """
         优化的分组算法
-        使用剪枝和优先策略提高效率
+        先按张数筛查，再用精确覆盖搜索（exact_cover）；
+        有牌不在牌面范围内时用带剪枝的递归分组
         """
+        if not self._passes_prefilter(tiles):
+            return False, []
+        partitioner = self._exact_cover(tiles, budget)
+        if partitioner is not None:
+            groups = partitioner.first()
+            return (True, groups) if groups is not None else (False, [])
         tiles = sorted(tiles, key=tile_sort_key)
-        return self._try_partition_with_pruning(tiles, [])
+        return self._try_partition_with_pruning(tiles, [], budget)
+
+    def _iter_arith_partitions(self, tiles, budget=None):
+        """列举算术麻将的所有分组方案（不能用精确覆盖时只有递归分组找到的一种）"""
+        if not self._passes_prefilter(tiles):
+            return
+        partitioner = self._exact_cover(tiles, budget)
+        if partitioner is not None:
+            yield from partitioner
+            return
+        success, groups = self._try_partition_with_pruning(sorted(tiles, key=tile_sort_key), [], budget)
+        if success:
+            yield groups
 
-    def _try_partition_with_pruning(self, remaining, groups):
+    def _best_arith_partition(self, hand, winning_method=None, budget=None, threshold=False):
+        """
+        在16张牌的所有算术麻将分组方案中选番数最高的
+
+        组相同（不计顺序）的方案只计算一次番数；最多计算 MAX_FAN_PARTITIONS 种方案，
+        预算用完时在已经找到的方案中选；threshold 为True时只计算达到起胡番数的方案的番数
+
+        返回: (分组方案, 番数信息)，不能分组时返回 (None, None)
+        """
+        best_groups, best_fan_info = None, None
+        seen = set()
+        try:
+            for groups in self._iter_arith_partitions(hand, budget):
+                if not FAN_CALCULATOR_AVAILABLE:
+                    return groups, None
+                key = tuple(sorted(canonical_key(group) for group in groups))
+                if key in seen:
+                    continue
+                if len(seen) >= self.MAX_FAN_PARTITIONS:
+                    break
+                seen.add(key)
+                fan_info = self._calculate_fan(hand, groups, "算术麻将", winning_method, threshold)
+                if best_groups is None or (
+                        fan_info and (best_fan_info is None
+                                      or fan_info['total_fan'] > best_fan_info['total_fan'])):
+                    best_groups, best_fan_info = groups, fan_info
+        except SearchBudgetExceeded:
+            pass
+        return best_groups, best_fan_info
+
+    def _try_partition_with_pruning(self, remaining, groups, budget=None):
         """
         带剪枝的递归分组
         优化策略：
         1. 优先尝试刻子（匹配更快）
         2. 使用计数器减少重复计算
         3. 早期剪枝不可能的分支
+
+        budget: 搜索预算（可选），用完时抛出 SearchBudgetExceeded
         """
+        if budget is not None:
+            budget.tick()
+
         # 成功条件
         if len(remaining) == 0:
             return True, groups
@@ -649,6 +823,12 @@ class ArithmeticMahjong:
         if len(remaining) % 4 != 0:
             return False, []
 
+        # 最后一组：直接查补全索引
+        if len(remaining) == 4:
+            if self._is_valid_last_group(remaining):
+                return True, groups + [list(remaining)]
+            return False, []
+
         # 优化1：优先尝试刻子
         counter = Counter(remaining)
         for tile, count in counter.items():
@@ -660,7 +840,8 @@ class ArithmeticMahjong:
 
                 success, result = self._try_partition_with_pruning(
                     new_remaining,
-                    groups + [[tile, tile, tile, tile]]
+                    groups + [[tile, tile, tile, tile]],
+                    budget
                 )
                 if success:
                     return True, result
@@ -682,14 +863,30 @@ class ArithmeticMahjong:
 
                 success, result = self._try_partition_with_pruning(
                     new_remaining,
-                    groups + [group]
+                    groups + [group],
+                    budget
                 )
                 if success:
                     return True, result
 
         return False, []
 
-    def is_ready(self, hand, return_details=False):
+    def _result_key(self, kind, hand, args):
+        """结果缓存的键：规则参数 + 调用参数 + 手牌的规范化字节串"""
+        prefix = repr((kind, self.require_sum_gte_10, self.min_fan, args)).encode()
+        return prefix + canonical_key(list(hand))
+
+    def _cached_result(self, kind, hand, args, compute, budget=None):
+        """先查持久化结果缓存，没有时计算并写入（因预算用完而不完整的结果不写入）"""
+        key = self._result_key(kind, hand, args)
+        result = self.result_cache.get(key)
+        if result is None:
+            result = compute()
+            if budget is None or not budget.truncated:
+                self.result_cache.put(key, result)
+        return result
+
+    def is_ready(self, hand, return_details=False, budget=None):
         """
         判断给定的牌是否听牌，以及听什么牌（支持万用牌）
         支持：
@@ -700,6 +897,8 @@ class ArithmeticMahjong:
 
         hand: 牌的列表
         return_details: 是否返回详细信息（包括牌型组合和番数）
+        budget: 搜索预算 SearchBudget（可选）。预算用完时返回已经找到的听牌，
+                并标记 budget.truncated（可能的听牌会先被检查）
         
         返回: (是否听牌, 听牌信息字典)
         
@@ -726,6 +925,99 @@ class ArithmeticMahjong:
                   '八小对': { ... }
               }
         """
+        if self.result_cache is None:
+            return self._is_ready_uncached(hand, return_details, budget)
+        return self._cached_result(
+            'is_ready', hand, (return_details,),
+            lambda: self._is_ready_uncached(hand, return_details, budget), budget)
+
+    def _rank_wait_candidates(self, hand, candidates, require_sum_gte_10=None):
+        """
+        按可能性排列候选的听牌，并去掉不可能的牌
+
+        胡牌时听的牌一定与手里的某3张牌组成一组，所以只保留能补全其中某3张的牌，
+        能补全的3张组合越多越先检查。手里有不在牌面范围内的牌时不去掉任何牌
+
+        require_sum_gte_10: 按哪种规则的有效组排列（默认本判定器的规则）
+        """
+        if require_sum_gte_10 is None:
+            require_sum_gte_10 = self.require_sum_gte_10
+        index = get_group_completion_index(require_sum_gte_10)
+        scores = Counter()
+        for three in set(combinations(sorted(hand, key=tile_sort_key), 3)):
+            completions = index.get(three)
+            if completions is None:
+                return sorted(candidates, key=tile_sort_key)
+            scores.update(completions)
+        ranked = [tile for tile in candidates if scores[tile] > 0]
+        ranked.sort(key=lambda tile: (-scores[tile], tile_sort_key(tile)))
+        return ranked
+
+    def _iter_arith_waits(self, hand, budget=None):
+        """
+        逐个找出算术麻将的听牌（可能性高的先检查）
+
+        hand: 15/11/7/3张牌
+        budget: 搜索预算（可选），用完时停止
+
+        产出: (听的牌, 分组方案, 胡牌类型)，15张时胡牌类型为'算术麻将'，
+              其他张数为'算术麻将（部分）'
+        """
+        num_groups = (len(hand) + 1) // 4
+        if num_groups == 4:
+            search = self._partition_optimized
+            win_type = '算术麻将'
+        else:
+            search = partial(self._partition_optimized_n_groups, n=num_groups)
+            win_type = '算术麻将（部分）'
+
+        # 扩展搜索范围：包括牌库中没有的20-49的数字
+        extended_tiles = self.all_tiles.copy()
+        for i in range(20, 50):
+            extended_tiles.add(i)
+
+        if self.shared_search is not None and budget is None:
+            # 两种规则一起判定时，逐张试听牌也只做一次
+            waits = self.shared_search.arith_waits(
+                hand, lambda: self._arith_waits_by_rule(hand, extended_tiles))
+            if waits is not None:
+                for tile, groups in waits[self.require_sum_gte_10]:
+                    yield tile, groups, win_type
+                return
+
+        for tile in self._rank_wait_candidates(hand, extended_tiles):
+            if budget is not None:
+                try:
+                    budget.check()
+                except SearchBudgetExceeded:
+                    return
+            success, groups = self._search_within_budget(search, hand + [tile], budget)
+            if success:
+                yield tile, groups, win_type
+
+    def _arith_waits_by_rule(self, hand, candidates):
+        """
+        两种规则下的算术麻将听牌（共用搜索 shared_search 时调用）
+
+        进阶规则的有效组都是新手规则的有效组，进阶规则的听牌都是新手规则的听牌，
+        所以按新手规则排列、筛查候选牌，每张候选牌做一次同时搜索两种规则的精确覆盖
+
+        返回: {规则: [(听的牌, 分组方案), ...]}，两种规则的听牌都按新手规则的顺序
+        """
+        waits = {True: [], False: []}
+        for tile in self._rank_wait_candidates(hand, candidates, require_sum_gte_10=False):
+            tiles = hand + [tile]
+            reason = prefilter(tiles, False)
+            self.prefilter_stats.record(reason)
+            if reason is not None:
+                continue
+            for require_sum_gte_10, groups in self.shared_search.first_by_rule(tiles).items():
+                if groups is not None:
+                    waits[require_sum_gte_10].append((tile, groups))
+        return waits
+
+    def _is_ready_uncached(self, hand, return_details=False, budget=None):
+        """is_ready 的判定过程（不查结果缓存）"""
         hand_len = len(hand)
 
         # 检查手牌数量是否合法
@@ -738,39 +1030,23 @@ class ArithmeticMahjong:
         arith_ready_tiles = set()
         arith_details = {}  # 存储详细信息
 
-        # 扩展搜索范围：包括牌库中没有的20-49的数字
-        extended_tiles = self.all_tiles.copy()
-        for i in range(20, 50):
-            extended_tiles.add(i)
-
-        for tile in extended_tiles:
-            test_hand = hand + [tile]
-            target_len = hand_len + 1
-
-            if target_len == 16:  # 完整胡牌
-                success, groups = self._partition_optimized(test_hand)
-                if success:
-                    arith_ready_tiles.add(tile)
-                    if return_details:
-                        # 计算番数
-                        fan_info = self._calculate_fan(test_hand, groups, "算术麻将", None)
-                        arith_details[tile] = {
-                            'groups': groups,
-                            'win_type': '算术麻将',
-                            'fan_info': fan_info
-                        }
-            elif target_len in [12, 8, 4]:  # 部分组合
-                num_groups = target_len // 4
-                success, groups = self._partition_optimized_n_groups(test_hand, num_groups)
-                if success:
-                    arith_ready_tiles.add(tile)
-                    if return_details:
-                        # 部分组合暂不计算番数
-                        arith_details[tile] = {
-                            'groups': groups,
-                            'win_type': '算术麻将（部分）',
-                            'fan_info': None
-                        }
+        for tile, groups, win_type in self._iter_arith_waits(hand, budget):
+            arith_ready_tiles.add(tile)
+            if return_details:
+                # 完整胡牌时取番数最高的分组方案，部分组合暂不计算番数
+                # 预算用完时在已经找到的方案中选，一个都没找到时用听牌搜索找到的方案
+                fan_info = None
+                if win_type == '算术麻将':
+                    best_groups, fan_info = self._best_arith_partition(hand + [tile], budget=budget)
+                    if best_groups is None:
+                        fan_info = self._calculate_fan(hand + [tile], groups, win_type, None)
+                    else:
+                        groups = best_groups
+                arith_details[tile] = {
+                    'groups': groups,
+                    'win_type': win_type,
+                    'fan_info': fan_info
+                }
 
         if arith_ready_tiles:
             if return_details:
@@ -809,13 +1085,14 @@ class ArithmeticMahjong:
         if hand_len == 15:
             # 检查传统麻将听牌
             if self.traditional_checker is not None:
-                is_ready_trad, trad_tiles = self.traditional_checker.is_ready_traditional(hand)
+                is_ready_trad, trad_tiles = self.traditional_checker.is_ready_traditional(hand, budget)
                 if is_ready_trad:
                     if return_details:
                         trad_details = {}
                         for tile in trad_tiles:
                             test_hand = hand + [tile]
-                            can_win_trad, groups_trad = self.traditional_checker.can_win_traditional(test_hand)
+                            can_win_trad, groups_trad = self._search_within_budget(
+                                self.traditional_checker.can_win_traditional, test_hand, budget)
                             if can_win_trad:
                                 fan_info = self._calculate_fan(test_hand, groups_trad, "传统麻将", None)
                                 trad_details[tile] = {
@@ -962,6 +1239,60 @@ class ArithmeticMahjong:
 
         return len(ready_info) > 0, ready_info
 
+    def iter_ready(self, hand, budget=None):
+        """
+        逐个产出听牌：每确认一张就立即产出，不等所有胡法都检查完
+        检查顺序：算术麻将 → 八小对 → 十三幺 → 天龙 → 地龙 → 传统麻将（最慢的放最后）
+
+        hand: 牌的列表（15/11/7/3张，只有15张时检查算术麻将以外的胡法）
+        budget: 搜索预算 SearchBudget（可选），用完时停止产出并标记 budget.truncated
+
+        产出: (胡法, 听的牌, WaitDetails)
+              胡法与 is_ready 返回的字典的键相同；
+              WaitDetails 的分组方案和番数在访问时才计算
+
+        示例:
+            for win_type, tile, details in mjong.iter_ready(hand):
+                print(win_type, tile)
+        """
+        hand = list(hand)
+        if len(hand) not in (15, 11, 7, 3):
+            return
+
+        for tile, groups, win_type in self._iter_arith_waits(hand, budget):
+            if win_type == '算术麻将':
+                # 与 is_ready 相同，使用番数最高的分组方案（预算用完时同样退回已经找到的方案）
+                yield '算术麻将', tile, WaitDetails(
+                    self, hand, tile, win_type,
+                    find_groups=lambda tile=tile, groups=groups: (
+                        self._best_arith_partition(hand + [tile], budget=budget)[0] or groups))
+            else:
+                yield '算术麻将', tile, WaitDetails(self, hand, tile, win_type, groups=groups, with_fan=False)
+
+        if len(hand) != 15:
+            return
+
+        if self.eight_pairs_checker is not None:
+            checker = self.eight_pairs_checker
+            is_ready_eight, tiles = checker.is_ready_eight_pairs(hand)
+            for tile in (tiles if is_ready_eight else []):
+                yield '八小对', tile, WaitDetails(
+                    self, hand, tile, '八小对',
+                    find_groups=lambda tile=tile: checker.can_win_eight_pairs(hand + [tile])[1])
+
+        if self.special_winning_checker is not None:
+            checker = self.special_winning_checker
+            for win_type, is_ready_special in (('十三幺', checker.is_ready_shi_san_yao),
+                                               ('天龙', checker.is_ready_tian_long),
+                                               ('地龙', checker.is_ready_di_long)):
+                is_ready_type, tiles = is_ready_special(hand)
+                for tile in (tiles if is_ready_type else []):
+                    yield win_type, tile, WaitDetails(self, hand, tile, win_type, groups=[])
+
+        if self.traditional_checker is not None:
+            for tile, groups in self.traditional_checker.iter_ready_traditional(hand, budget):
+                yield '传统麻将', tile, WaitDetails(self, hand, tile, '传统麻将', groups=groups)
+
     def display_ready_interactive(self, hand):
         """
         交互式显示听牌信息
@@ -1049,21 +1380,22 @@ class ArithmeticMahjong:
         
         print("\n" + "=" * 70)
 
-    def _partition_optimized_n_groups(self, tiles, n):
+    def _partition_optimized_n_groups(self, tiles, n, budget=None):
         """
         判断能否分成n组有效组合
         tiles: 牌列表
         n: 目标组数
+        budget: 搜索预算（可选）
         """
         if len(tiles) != n * 4:
             return False, []
 
         if n == 1:
-            # 只需要一组
-            return self.is_valid_group(tiles), [tiles] if self.is_valid_group(tiles) else []
+            # 只需要一组：查补全索引
+            valid = self._is_valid_last_group(sorted(tiles, key=tile_sort_key))
+            return valid, [tiles] if valid else []
 
-        tiles_sorted = sorted(tiles, key=tile_sort_key)
-        return self._try_partition_with_pruning(tiles_sorted, [])
+        return self._partition_optimized(tiles, budget)
 
     def format_result(self, success, groups, win_type=None, fan_info=None):
         """格式化输出结果（包括番数）"""
@@ -0,0 +1,197 @@
+"""
+新手、进阶两种规则一起判定
+两种规则的唯一区别是加法算式 a + b = c 是否允许 c < 10，
+进阶规则的有效组都是新手规则的有效组。
+
+MultiRuleMahjong 持有两种规则的判定器，它们共用：
+- 算术麻将分组搜索：每种牌的组合只做一次同时搜索两种规则的精确覆盖
+  （exact_cover.MultiRuleExactCover，组按规则位标记）
+- 逐张试听牌：每手牌只按新手规则排列、筛查一次候选牌，每张候选牌的一次搜索
+  同时得到两种规则的结果，两种规则只在组的规则位上分开
+- 与规则无关的传统麻将搜索（含万用牌展开，最慢）：每手牌只做一次
+
+两个判定器仍然依次调用，先调用的做搜索，后调用的直接取共用的结果；
+八小对、十三幺、天龙、地龙和番数计算每种规则各算一次。
+
+用法：
+    checker = MultiRuleMahjong()
+    results = checker.is_ready(hand)
+    results[True]   # 进阶规则的 is_ready 结果
+    results[False]  # 新手规则的 is_ready 结果
+"""
+
+import threading
+
+from calculator_base.constants import TILE_TO_ID
+from calculator_base.exact_cover import MultiRuleExactCover
+from calculator_base.fingerprint import canonical_key
+from calculator_base.formula_table import formula_key
+
+
+class _RuleView:
+    """共用搜索结果中一种规则的部分（用法与 ExactCoverPartitioner 相同）"""
+
+    def __init__(self, shared, key, require_sum_gte_10):
+        self._shared = shared
+        self._key = key
+        self._rule = require_sum_gte_10
+
+    def first(self):
+        return self._shared._first_by_rule(self._key)[self._rule]
+
+    def __iter__(self):
+        return iter(self._shared._all_by_rule(self._key)[self._rule])
+
+
+class SharedRuleSearch:
+    """
+    两种规则共用的分组搜索结果（按牌的组合缓存，线程安全）
+
+    参数：
+        max_entries: 最多缓存多少种牌的组合（超过时淘汰最早的）
+    """
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._first = {}        # {牌的组合: {规则: 分组方案或None}}
+        self._all = {}          # {牌的组合: {规则: [分组方案, ...]}}
+        self._traditional = {}  # {(方法名, 规范化手牌): 结果}
+        self._waits = {}        # {规范化手牌: {规则: [(听的牌, 分组方案), ...]}}
+
+    def _remember(self, cache, key, compute):
+        with self._lock:
+            value = cache.get(key)
+        if value is None:
+            value = compute()
+            with self._lock:
+                if len(cache) >= self.max_entries:
+                    cache.pop(next(iter(cache)))
+                cache[key] = value
+        return value
+
+    def view(self, tiles, require_sum_gte_10):
+        """
+        一种规则下的分组搜索（ArithmeticMahjong 调用）
+
+        返回：
+            有 first() 和迭代的对象；有牌不在牌面范围内时返回None
+        """
+        if not all(tile in TILE_TO_ID for tile in tiles):
+            return None
+        return _RuleView(self, formula_key(tiles), require_sum_gte_10)
+
+    def _first_by_rule(self, key):
+        with self._lock:
+            partitions = self._all.get(key)
+        if partitions is not None:
+            return {rule: groups[0] if groups else None for rule, groups in partitions.items()}
+        return self._remember(self._first, key, lambda: MultiRuleExactCover(key).first_by_rule())
+
+    def first_by_rule(self, tiles):
+        """
+        两种规则下各找一种分组方案（牌都要在牌面范围内）
+
+        返回：
+            {True: 分组方案或None, False: 分组方案或None}
+        """
+        return self._first_by_rule(formula_key(tiles))
+
+    def arith_waits(self, hand, compute):
+        """
+        两种规则下算术麻将的听牌（每手牌只计算一次）
+
+        返回：
+            {规则: [(听的牌, 分组方案), ...]}；有牌不在牌面范围内时返回None（不共用）
+        """
+        if not all(tile in TILE_TO_ID for tile in hand):
+            return None
+        return self._remember(self._waits, canonical_key(list(hand)), compute)
+
+    def _all_by_rule(self, key):
+        return self._remember(self._all, key, lambda: MultiRuleExactCover(key).all_by_rule())
+
+    def traditional(self, name, hand, compute):
+        """传统麻将判定的结果（与规则无关，每手牌只计算一次）"""
+        return self._remember(self._traditional, (name, canonical_key(list(hand))), compute)
+
+    def clear(self):
+        with self._lock:
+            self._first.clear()
+            self._all.clear()
+            self._traditional.clear()
+            self._waits.clear()
+
+
+class _SharedTraditionalChecker:
+    """让两种规则的判定器共用传统麻将判定结果（不带搜索预算的调用）"""
+
+    def __init__(self, checker, shared):
+        self._checker = checker
+        self._shared = shared
+
+    def __getattr__(self, name):
+        return getattr(self._checker, name)
+
+    def can_win_traditional(self, hand, budget=None):
+        if budget is not None:
+            return self._checker.can_win_traditional(hand, budget)
+        return self._shared.traditional(
+            'can_win', hand, lambda: self._checker.can_win_traditional(hand))
+
+    def iter_ready_traditional(self, hand, budget=None):
+        if budget is not None:
+            return self._checker.iter_ready_traditional(hand, budget)
+        return iter(self._shared.traditional(
+            'ready', hand, lambda: list(self._checker.iter_ready_traditional(hand))))
+
+    def is_ready_traditional(self, hand, budget=None):
+        ready_tiles = [num for num, _ in self.iter_ready_traditional(hand, budget)]
+        return len(ready_tiles) > 0, ready_tiles
+
+
+class MultiRuleMahjong:
+    """
+    同时按新手、进阶两种规则判定
+
+    参数：
+        min_fans: {require_sum_gte_10: 起胡番数}（可选，默认与 ArithmeticMahjong 相同）
+        max_entries: 共用的搜索结果最多缓存多少项
+
+    属性：
+        checkers: {True: 进阶规则的 ArithmeticMahjong, False: 新手规则的 ArithmeticMahjong}
+    """
+
+    def __init__(self, min_fans=None, max_entries=100_000):
+        from calculator_base.mahjong_checker import ArithmeticMahjong
+
+        min_fans = min_fans or {}
+        self.shared = SharedRuleSearch(max_entries)
+        self.checkers = {}
+        for require_sum_gte_10 in (True, False):
+            mjong = ArithmeticMahjong(require_sum_gte_10, min_fans.get(require_sum_gte_10))
+            mjong.shared_search = self.shared
+            if mjong.traditional_checker is not None:
+                mjong.traditional_checker = _SharedTraditionalChecker(
+                    mjong.traditional_checker, self.shared)
+            self.checkers[require_sum_gte_10] = mjong
+
+    def can_win(self, hand, winning_method=None, has_melded=False, budget=None):
+        """
+        两种规则下的 can_win
+
+        返回：
+            {True: 进阶规则的结果, False: 新手规则的结果}
+        """
+        return {rule: mjong.can_win(hand, winning_method, has_melded, budget)
+                for rule, mjong in self.checkers.items()}
+
+    def is_ready(self, hand, return_details=False, budget=None):
+        """
+        两种规则下的 is_ready
+
+        返回：
+            {True: 进阶规则的结果, False: 新手规则的结果}
+        """
+        return {rule: mjong.is_ready(hand, return_details, budget)
+                for rule, mjong in self.checkers.items()}
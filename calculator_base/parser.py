@@ -3,6 +3,11 @@
 集中管理所有牌面常量、符号别名和解析函数
 """
 
+import re
+import threading
+from collections import OrderedDict
+from functools import wraps
+
 from calculator_base.constants import *
 from calculator_base.hand_structure import MeldedGroup, create_tile_from_value, Hand
 
@@ -145,29 +150,24 @@ def validate_hand(hand, expected_len=None):
 # 新增：复杂模式解析函数
 # ============================================================
 
-def _normalize_brackets(text: str) -> str:
-    """
-    统一括号格式：全角转半角
-    
-    参数：
-        text: 输入文本
-    
-    返回：
-        转换后的文本
-    """
-    # 圆括号
-    text = text.replace('（', '(').replace('）', ')')
-    # 方括号
-    text = text.replace('【', '[').replace('】', ']')
-    # 花括号
-    text = text.replace('｛', '{').replace('｝', '}')
-    return text
+# 结构字符（包括全角括号）单独成token；空格、制表符、换行和逗号是分隔符，
+# 其他空白字符（如全角空格）不是分隔符，只去掉token两端的
+_STRUCTURE_CHARS = r'()\[\]{}|/（）【】｛｝'
+_TOKEN_PATTERN = re.compile(
+    rf'[{_STRUCTURE_CHARS}]'
+    rf'|[^\s,，{_STRUCTURE_CHARS}](?:[^ \t\n,，{_STRUCTURE_CHARS}]*[^\s,，{_STRUCTURE_CHARS}])?'
+)
+
+# 全角括号转半角
+_FULL_WIDTH_BRACKETS = {'（': '(', '）': ')', '【': '[', '】': ']', '｛': '{', '｝': '}'}
 
 
 def _tokenize_complex(text: str):
     """
     将复杂输入分词成token列表
     保留括号、分隔符等结构信息
+
+    一个正则一次扫描出所有token；只有输入中有非ASCII字符时才需要转换全角括号
     
     参数：
         text: 输入文本
@@ -175,38 +175,15 @@ def _tokenize_complex(text: str):
     返回：
         token列表
     """
-    text = _normalize_brackets(text)
-    
-    # 替换逗号为空格
-    text = text.replace(',', ' ').replace('，', ' ')
-    
-    tokens = []
-    current_token = ''
-    
-    for char in text:
-        if char in '()[]{}|/':
-            # 遇到结构字符，先保存当前token
-            if current_token.strip():
-                tokens.append(current_token.strip())
-                current_token = ''
-            tokens.append(char)
-        elif char in ' \t\n':
-            # 遇到空白，保存当前token
-            if current_token.strip():
-                tokens.append(current_token.strip())
-                current_token = ''
-        else:
-            current_token += char
-    
-    # 保存最后一个token
-    if current_token.strip():
-        tokens.append(current_token.strip())
-    
-    return tokens
+    tokens = _TOKEN_PATTERN.findall(text)
+    if text.isascii():
+        return tokens
+    return [_FULL_WIDTH_BRACKETS.get(token, token) for token in tokens]
 
-def _parse_tile_token(token: str):
+
+def _parse_tile_token_slow(token: str):
     """
-    解析单个牌的token，支持d和w后缀
+    解析单个牌的token，支持d和w后缀（逐个检查后缀和别名）
     
     参数：
         token: 牌的token字符串（如 "11d", "12w", "11dw", "11wd", "+", "5"）
@@ -255,6 +232,148 @@ def _parse_tile_token(token: str):
         raise ValueError(f"无法识别的牌token: '{token}'")
 
 
+def _build_tile_token_table():
+    """
+    预先解析所有别名和0-49的数字加上各种后缀（'', d, w, dw, wd）的token
+
+    每一项都由 _parse_tile_token_slow 得到，所以查表结果与逐个解析完全相同
+    """
+    bases = list(SYMBOL_ALIASES) + list(JOKER_ALIASES) + [str(n) for n in NUMBER_TILE_RANGE]
+    table = {}
+    for base in bases:
+        for suffix in ('', 'd', 'w', 'dw', 'wd'):
+            token = base + suffix
+            try:
+                table[token] = _parse_tile_token_slow(token)
+            except ValueError:
+                continue
+    return table
+
+
+# token -> (value, is_dora, is_joker_used)
+_TILE_TOKEN_TABLE = _build_tile_token_table()
+
+
+def _parse_tile_token(token: str):
+    """
+    解析单个牌的token，支持d和w后缀
+    
+    参数：
+        token: 牌的token字符串（如 "11d", "12w", "11dw", "11wd", "+", "5"）
+    
+    返回：
+        (value, is_dora, is_joker_used)
+        - value: int或str
+        - is_dora: bool
+        - is_joker_used: bool
+    
+    异常：
+        ValueError: 无法识别的token
+    """
+    result = _TILE_TOKEN_TABLE.get(token)
+    if result is None:
+        # 表中没有的token（如超出范围的数字）按原方法解析
+        return _parse_tile_token_slow(token)
+    return result
+
+
+# ============================================================
+# 解析缓存（可选，默认关闭）
+# ============================================================
+
+# 缓存中保存的是原始Hand对象，只返回副本，调用方修改副本不会影响缓存
+_parse_cache = None  # OrderedDict: {(模式, 输入字符串): Hand}，关闭时为None
+_parse_cache_maxsize = 0
+_parse_cache_hits = 0
+_parse_cache_misses = 0
+_parse_cache_lock = threading.Lock()
+
+
+def enable_parse_cache(maxsize=1024):
+    """
+    开启模式1-4的解析缓存（LRU，最多缓存 maxsize 个输入）
+
+    相同的输入字符串（去掉首尾空白后）直接返回缓存的Hand对象的副本
+    """
+    global _parse_cache, _parse_cache_maxsize
+    if maxsize <= 0:
+        raise ValueError(f"缓存大小必须大于0: {maxsize}")
+    with _parse_cache_lock:
+        if _parse_cache is None:
+            _parse_cache = OrderedDict()
+        _parse_cache_maxsize = maxsize
+        while len(_parse_cache) > maxsize:
+            _parse_cache.popitem(last=False)
+
+
+def disable_parse_cache():
+    """关闭解析缓存并清空"""
+    global _parse_cache, _parse_cache_maxsize
+    with _parse_cache_lock:
+        _parse_cache = None
+        _parse_cache_maxsize = 0
+
+
+def clear_parse_cache():
+    """清空解析缓存和命中计数（不改变开关状态）"""
+    global _parse_cache_hits, _parse_cache_misses
+    with _parse_cache_lock:
+        if _parse_cache is not None:
+            _parse_cache.clear()
+        _parse_cache_hits = 0
+        _parse_cache_misses = 0
+
+
+def parse_cache_info():
+    """
+    获取解析缓存状态
+
+    返回：
+        dict: {'enabled', 'hits', 'misses', 'size', 'maxsize'}
+    """
+    with _parse_cache_lock:
+        return {
+            'enabled': _parse_cache is not None,
+            'hits': _parse_cache_hits,
+            'misses': _parse_cache_misses,
+            'size': len(_parse_cache) if _parse_cache is not None else 0,
+            'maxsize': _parse_cache_maxsize,
+        }
+
+
+def _cached_parse(parse_func):
+    """解析函数的缓存装饰器（缓存关闭时直接调用原函数）"""
+    @wraps(parse_func)
+    def wrapper(hand_str: str):
+        global _parse_cache_hits, _parse_cache_misses
+        if _parse_cache is None:
+            return parse_func(hand_str)
+
+        key = (parse_func.__name__, hand_str.strip())
+        with _parse_cache_lock:
+            cache = _parse_cache
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                cache.move_to_end(key)
+                _parse_cache_hits += 1
+            else:
+                _parse_cache_misses += 1
+        if cached is not None:
+            return cached.copy()
+
+        # 解析出错时直接抛出异常，不缓存
+        hand = parse_func(hand_str)
+        with _parse_cache_lock:
+            if _parse_cache is not None:
+                _parse_cache[key] = hand.copy()
+                _parse_cache.move_to_end(key)
+                while len(_parse_cache) > _parse_cache_maxsize:
+                    _parse_cache.popitem(last=False)
+        return hand
+
+    return wrapper
+
+
 def _parse_melded_group(tokens: list, start_idx: int):
     """
     从tokens中解析一个鸣牌面子（圆括号包裹的部分）
@@ -331,6 +450,7 @@ def _parse_melded_group(tokens: list, start_idx: int):
     return melded_group, end_idx
 
 
+@_cached_parse
 def parse_mode1_already_won(hand_str: str):
     """
     模式1：16张已胡番数模式
@@ -489,6 +609,7 @@ def parse_mode1_already_won(hand_str: str):
     return hand
 
 
+@_cached_parse
 def parse_mode2_check_win(hand_str: str):
     """
     模式2：16张是否胡模式
@@ -564,6 +685,7 @@ def parse_mode2_check_win(hand_str: str):
     return hand
 
 
+@_cached_parse
 def parse_mode3_ready_with_meld(hand_str: str):
     """
     模式3：有鸣牌听牌模式（15张）
@@ -619,6 +741,7 @@ def parse_mode3_ready_with_meld(hand_str: str):
     return hand
 
 
+@_cached_parse
 def parse_mode4_ready_no_meld(hand_str: str):
     """
     模式4：无鸣牌听牌模式（15张）
@@ -0,0 +1,140 @@
+"""
+分组搜索前的快速筛查
+只看每种牌的张数，用必要条件排除不可能分成有效组的牌，不需要搜索。
+is_ready 逐张试听牌时，大部分候选牌在这里就被排除。
+
+- 符号张数：算式恰好含一张符号，刻子是4张相同的牌，
+  符号张数必须能拆成"算式数 + 4 × 符号刻子数"，其余的组只能是数字刻子
+- 数字牌的搭档：张数不是4的倍数的数字牌至少有一张在算式中，
+  手里必须有能和它组成的算式用到的其余的牌（有万用牌时不检查）
+
+ArithmeticMahjong 在每次分组搜索前调用，结果记录在 prefilter_stats 中
+"""
+
+import threading
+from collections import Counter
+
+from calculator_base.constants import SYMBOLS, JOKER_SYMBOL, JOKERS, TILE_TO_ID
+from calculator_base.formula_table import get_formulas_by_tile
+
+
+# 算式中占符号位置的牌
+_SYMBOLIC = SYMBOLS | {JOKER_SYMBOL}
+
+REJECT_SYMBOLS = 'symbols'
+REJECT_PARTNERS = 'partners'
+
+
+def symbol_counts_feasible(tiles):
+    """
+    按符号张数判断能否分组（必要条件）
+
+    参数：
+        tiles: 牌的列表，或 {牌: 张数}
+
+    返回：
+        bool
+    """
+    counts = tiles if isinstance(tiles, dict) else Counter(tiles)
+    n_groups = sum(counts.values()) // 4
+    symbolic = sum(count for tile, count in counts.items() if tile in _SYMBOLIC)
+    symbol_kezi = sum(count // 4 for tile, count in counts.items() if tile in _SYMBOLIC)
+    number_kezi = sum(count // 4 for tile, count in counts.items() if tile not in _SYMBOLIC)
+
+    for n_symbol_kezi in range(symbol_kezi + 1):
+        n_formulas = symbolic - 4 * n_symbol_kezi
+        n_number_kezi = n_groups - n_formulas - n_symbol_kezi
+        if n_formulas >= 0 and 0 <= n_number_kezi <= number_kezi:
+            return True
+    return False
+
+
+def partners_feasible(counts, require_sum_gte_10=True):
+    """
+    判断每张必须进算式的数字牌是否有能组成算式的搭档（必要条件）
+
+    参数：
+        counts: {牌: 张数}
+        require_sum_gte_10: 使用的算式规则
+
+    返回：
+        bool（有万用牌或不在牌面范围内的牌时总是True）
+    """
+    if any(tile in JOKERS or tile not in TILE_TO_ID for tile in counts):
+        return True
+    formulas_by_tile = get_formulas_by_tile(require_sum_gte_10)
+    for tile, count in counts.items():
+        if tile in _SYMBOLIC or count % 4 == 0:
+            continue
+        if not any(all(counts.get(other, 0) >= k for other, k in usage)
+                   for usage in formulas_by_tile.get(tile, ())):
+            return False
+    return True
+
+
+def prefilter(tiles, require_sum_gte_10=True):
+    """
+    分组搜索前的筛查
+
+    参数：
+        tiles: 牌的列表
+        require_sum_gte_10: 使用的算式规则
+
+    返回：
+        None 表示可能可以分组（需要搜索）；
+        否则返回排除的原因（REJECT_SYMBOLS / REJECT_PARTNERS）
+    """
+    counts = Counter(tiles)
+    if not symbol_counts_feasible(counts):
+        return REJECT_SYMBOLS
+    if not partners_feasible(counts, require_sum_gte_10):
+        return REJECT_PARTNERS
+    return None
+
+
+class PrefilterStats:
+    """
+    筛查的统计（多线程共用同一个判定器时加锁更新）
+
+    属性：
+        checked: 筛查的次数
+        rejected: {原因: 排除的次数}
+    """
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, reason):
+        with self._lock:
+            self.checked += 1
+            if reason is not None:
+                self.rejected[reason] += 1
+
+    @property
+    def hit_rate(self):
+        """被排除（不需要搜索）的比例"""
+        with self._lock:
+            return sum(self.rejected.values()) / self.checked if self.checked else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.checked = 0
+            self.rejected.clear()
+
+    def as_dict(self):
+        with self._lock:
+            checked, rejected = self.checked, dict(self.rejected)
+        return {'checked': checked, 'rejected': rejected,
+                'hit_rate': sum(rejected.values()) / checked if checked else 0.0}
+
+    # 判定器会被传给进程池，锁不能序列化
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
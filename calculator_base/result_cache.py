@@ -0,0 +1,159 @@
+"""
+判定结果的持久化缓存（sqlite3）
+把 can_win / is_ready 的结果按"规范化手牌 + 规则参数"保存到磁盘，
+进程重启后仍然可以直接使用
+
+- 写入先放在内存中，攒够一批再一起写入（一个事务）
+- 超过最大条数时按最近使用时间淘汰
+- 使用 WAL 模式，多个进程可以同时读写同一个缓存文件
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class ResultCache:
+    """
+    基于 sqlite3 的结果缓存
+
+    参数：
+        path: 缓存文件路径
+        max_entries: 最多保存的条数（超过时淘汰最久未使用的）
+        batch_size: 攒够多少条写入后提交一次
+        timeout: 等待其他进程释放写锁的秒数
+
+    示例：
+        cache = ResultCache("results.sqlite")
+        mjong = ArithmeticMahjong(result_cache=cache)
+        ...
+        cache.close()
+    """
+
+    def __init__(self, path, max_entries=1_000_000, batch_size=256, timeout=30.0):
+        if max_entries <= 0:
+            raise ValueError(f"max_entries必须大于0: {max_entries}")
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.RLock()
+        self._pending = {}   # {键: 序列化后的值}，尚未写入
+        self._touched = set()  # 命中过、需要更新使用时间的键
+        self._conn = None
+        self._pid = None
+        self._connect()
+
+    def _connect(self):
+        """打开数据库（fork 之后的子进程会重新打开自己的连接）"""
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key BLOB PRIMARY KEY, value BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)")
+        conn.commit()
+        self._conn = conn
+        self._pid = os.getpid()
+
+    def _connection(self):
+        if self._conn is None:
+            raise ValueError("缓存已关闭")
+        if self._pid != os.getpid():
+            # 子进程不能使用父进程的连接，也不写入父进程未提交的数据
+            self._pending.clear()
+            self._touched.clear()
+            self._connect()
+        return self._conn
+
+    def get(self, key):
+        """
+        读取缓存
+
+        参数：
+            key: bytes
+
+        返回：
+            缓存的值，没有时返回None
+        """
+        with self._lock:
+            data = self._pending.get(key)
+            if data is None:
+                row = self._connection().execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                data = row[0]
+                self._touched.add(key)
+                if len(self._touched) >= self.batch_size:
+                    self.flush()
+            self.hits += 1
+        return pickle.loads(data)
+
+    def put(self, key, value):
+        """写入缓存（攒够 batch_size 条后自动提交）"""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._pending[key] = data
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """把攒下的写入一次提交，并在超过最大条数时淘汰"""
+        with self._lock:
+            conn = self._connection()
+            if not self._pending and not self._touched:
+                return
+            now = time.time_ns()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)",
+                    [(key, data, now) for key, data in self._pending.items()])
+                conn.executemany(
+                    "UPDATE results SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in self._touched if key not in self._pending])
+                excess = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    conn.execute(
+                        "DELETE FROM results WHERE key IN "
+                        "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (excess,))
+            self._pending.clear()
+            self._touched.clear()
+
+    def __len__(self):
+        """已保存的条数（包括尚未提交的）"""
+        with self._lock:
+            self.flush()
+            return self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+            with self._connection() as conn:
+                conn.execute("DELETE FROM results")
+
+    def close(self):
+        """提交剩余的写入并关闭"""
+        with self._lock:
+            if self._conn is None:
+                return
+            if self._pid == os.getpid():
+                self.flush()
+                self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,64 @@
+"""
+搜索预算
+给 can_win / is_ready 的搜索设置时间上限和/或节点数上限。
+预算用完时搜索立即停止，返回已经找到的结果，并在预算对象上标记 truncated，
+调用者据此知道结果可能不完整（例如听牌只列出了一部分）。
+
+用法：
+    budget = SearchBudget(time_limit=0.05)
+    is_ready, info = mjong.is_ready(hand, budget=budget)
+    if budget.truncated:
+        ...  # info 中只有已经找到的听牌
+"""
+
+import time
+
+
+class SearchBudgetExceeded(Exception):
+    """预算用完（在搜索内部抛出，由 can_win / is_ready 捕获）"""
+
+
+class SearchBudget:
+    """
+    一次调用的搜索预算（计时从创建时开始，不要在多次调用之间共用）
+
+    参数：
+        time_limit: 最多搜索的秒数（None表示不限）
+        max_nodes: 最多搜索的节点数（None表示不限）
+
+    属性：
+        nodes: 已经搜索的节点数
+        truncated: 搜索是否因为预算用完而提前停止
+    """
+
+    # 每搜索这么多个节点才读一次时钟
+    CLOCK_INTERVAL = 64
+
+    def __init__(self, time_limit=None, max_nodes=None):
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.truncated = False
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    def _exceeded(self):
+        self.truncated = True
+        raise SearchBudgetExceeded()
+
+    def check(self):
+        """检查预算（总是读时钟），用完时抛出 SearchBudgetExceeded"""
+        if self.truncated:
+            raise SearchBudgetExceeded()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            self._exceeded()
+
+    def tick(self):
+        """搜索一个节点，用完时抛出 SearchBudgetExceeded"""
+        self.nodes += 1
+        if self.truncated:
+            raise SearchBudgetExceeded()
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            self._exceeded()
+        if (self._deadline is not None and self.nodes % self.CLOCK_INTERVAL == 0
+                and time.perf_counter() > self._deadline):
+            self._exceeded()
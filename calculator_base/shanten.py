@@ -0,0 +1,155 @@
+"""
+向听数计算模块（算术麻将）
+计算手牌离听牌还差几张牌：最少换几张牌才能听牌
+
+把手牌拆成若干"块"：完整的组（算式/刻子，4张）、差1张的组（3张）、
+差2张的组（2张）、单张。每块都必须能补成算式或刻子，
+能否补成算式通过预先计算的2张/3张子集表（formula_table）判断。
+
+    向听数 = 4 × 组数 - 块中的牌数 - 1
+
+听牌为0，已经胡牌（16张分成4组）为-1
+"""
+
+from collections import Counter
+from functools import lru_cache
+from itertools import product
+
+from calculator_base.constants import JOKERS
+from calculator_base.parser import tile_sort_key
+from calculator_base.formula_table import (
+    JOKER_VALUES, get_formula_set, get_partial_formula_set,
+)
+
+
+# 块判断结果最多缓存的组合数（LRU）
+BLOCK_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=BLOCK_CACHE_SIZE)
+def _is_block(tiles, require_sum_gte_10):
+    """
+    判断1-4张牌能否补成一组（算式或刻子）
+
+    参数：
+        tiles: 排序后的牌元组
+        require_sum_gte_10: 使用的算式规则
+
+    返回：
+        bool
+    """
+    if len(tiles) == 1 or len(set(tiles)) == 1:
+        # 单张总能补成算式（x × 1 = x）；相同的牌可以补成刻子
+        result = True
+    else:
+        table = (get_formula_set(require_sum_gte_10) if len(tiles) == 4
+                 else get_partial_formula_set(require_sum_gte_10))
+        normal = [t for t in tiles if t not in JOKERS]
+        choices = [JOKER_VALUES[t] for t in tiles if t in JOKERS]
+        # 与 is_valid_formula 相同：万用牌的任意一种替换能组成算式即可
+        result = any(
+            tuple(sorted(normal + list(combo), key=tile_sort_key)) in table
+            for combo in product(*choices)
+        )
+    return result
+
+
+def _candidate_blocks(tiles, counts, require_sum_gte_10):
+    """
+    列出手牌中所有能补成一组的2-4张牌（按牌面去重）
+
+    块的子集也是块，所以不是块的组合不用再往下扩展
+
+    参数：
+        tiles: 排序后的不同牌面
+        counts: 每种牌面的张数
+
+    返回：
+        [(张数, 每种牌面用了几张)]，按张数从多到少排序
+    """
+    blocks = []
+
+    def extend(start, block, used):
+        if len(block) >= 2:
+            if not _is_block(tuple(block), require_sum_gte_10):
+                return
+            blocks.append((len(block), tuple(used)))
+        if len(block) == 4:
+            return
+        for i in range(start, len(tiles)):
+            if used[i] < counts[i]:
+                block.append(tiles[i])
+                used[i] += 1
+                extend(i, block, used)
+                used[i] -= 1
+                block.pop()
+
+    extend(0, [], [0] * len(tiles))
+    blocks.sort(key=lambda item: item[0], reverse=True)
+    return blocks
+
+
+def _max_block_tiles(hand, n_groups, require_sum_gte_10):
+    """
+    最多能有多少张牌放进 n_groups 个块里
+
+    先从候选块中选出至多 n_groups 个互不重叠的多张块，
+    剩下的组用单张补齐（单张总能补成一组）
+    """
+    n_tiles = len(hand)
+    counter = Counter(hand)
+    tiles = sorted(counter, key=tile_sort_key)
+    counts = [counter[tile] for tile in tiles]
+
+    # 每种牌面的张数占 width 位，最高位是保护位：减去一个块后保护位都在，说明牌够用。
+    # 保护位要大于最多的张数，也不能小于一个块的张数（4），减过头时不会借到下一种牌
+    width = max(3, max(counts, default=0).bit_length()) + 1
+    top = 1 << (width - 1)
+    guard = sum(top << (width * i) for i in range(len(tiles)))
+    state = sum((top + n) << (width * i) for i, n in enumerate(counts))
+    blocks = [
+        (size, sum(n << (width * i) for i, n in enumerate(used)))
+        for size, used in _candidate_blocks(tiles, counts, require_sum_gte_10)
+    ]
+
+    best = min(n_tiles, n_groups)
+    limit = min(n_tiles, 4 * n_groups)
+
+    def search(candidates, groups_left, placed, state):
+        nonlocal best
+        used = placed + min(groups_left, n_tiles - placed)
+        if used > best:
+            best = used
+        if groups_left == 0 or best >= limit:
+            return
+        for index, (size, vector) in enumerate(candidates):
+            # 每多一个块最多多放 张数-1 张牌（候选块按张数降序排列）
+            if used + (size - 1) * groups_left <= best:
+                break
+            rest = state - vector
+            search([block for block in candidates[index:] if (rest - block[1]) & guard == guard],
+                   groups_left - 1, placed + size, rest)
+            if best >= limit:
+                return
+
+    search(blocks, n_groups, 0, state)
+    return best
+
+
+def calculate_shanten(hand, require_sum_gte_10=True, n_groups=None):
+    """
+    计算算术麻将向听数（只考虑算式和刻子，不考虑传统麻将、八小对等）
+
+    参数：
+        hand: 牌的列表（不含鸣牌）
+        require_sum_gte_10: 使用的算式规则（进阶规则为True）
+        n_groups: 目标组数（默认按张数计算，15/16张为4组）
+
+    返回：
+        int: 向听数（听牌为0，已胡牌为-1）
+    """
+    if n_groups is None:
+        n_groups = (len(hand) + 3) // 4
+
+    used = _max_block_tiles(hand, n_groups, require_sum_gte_10)
+    return 4 * n_groups - used - 1
@@ -0,0 +1,156 @@
+"""
+进程间共享的只读表（内存映射文件）
+补全索引（formula_table.get_group_completion_index）在每个进程中都是一个
+几万项的字典。进程池中每个工作进程各建一份，内存随进程数线性增长。
+
+这里把补全索引存成定长的位掩码数组文件：
+    下标 = 3张牌按 tile_sort_key 的名次 (i, j, k) 组成的 i*N*N + j*N + k
+    值   = 64位掩码，第 r 位表示名次为 r 的牌能补成有效组
+文件只生成一次，工作进程用只读内存映射打开：所有进程共用操作系统的
+页缓存，不复制、不重建，每个进程的内存占用不随进程数增长。
+
+用法（进程池的初始化函数）：
+    ProcessPoolExecutor(initializer=use_shared_tables)
+"""
+
+import mmap
+import os
+import threading
+from array import array
+from collections.abc import Mapping
+from itertools import combinations_with_replacement
+
+from calculator_base.constants import ID_TO_TILE
+from calculator_base.parser import tile_sort_key
+from calculator_base import formula_table
+
+
+_MAGIC = b'SSMJIDX\x01'  # 最后一个字节是格式版本
+
+# 按 tile_sort_key 排好的所有牌，标准形式中的牌按名次递增
+_RANKED_TILES = tuple(sorted(ID_TO_TILE, key=tile_sort_key))
+_RANK = {tile: rank for rank, tile in enumerate(_RANKED_TILES)}
+_N = len(_RANKED_TILES)
+
+
+def _slot(a, b, c):
+    """3张牌（标准形式）在数组中的下标，不是标准形式时返回None"""
+    ra = _RANK.get(a)
+    rb = _RANK.get(b)
+    rc = _RANK.get(c)
+    if ra is None or rb is None or rc is None or not ra <= rb <= rc:
+        return None
+    return (ra * _N + rb) * _N + rc
+
+
+def write_completion_file(path, require_sum_gte_10=True):
+    """
+    把补全索引写成位掩码数组文件（先写临时文件再替换）
+
+    参数：
+        path: 文件路径
+        require_sum_gte_10: 使用的算式规则
+    """
+    masks = array('Q', bytes(8 * _N ** 3))
+    for key, tiles in formula_table.get_group_completion_index(require_sum_gte_10).items():
+        mask = 0
+        for tile in tiles:
+            mask |= 1 << _RANK[tile]
+        masks[_slot(*key)] = mask
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(_MAGIC)
+        masks.tofile(f)
+    os.replace(tmp_path, path)
+
+
+class SharedCompletionIndex(Mapping):
+    """
+    内存映射的补全索引（只读）
+
+    与 get_group_completion_index 返回的字典用法相同：
+    {3张牌的标准形式: frozenset(能补成有效组的牌)}
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(_MAGIC)] != _MAGIC or len(self._mmap) != len(_MAGIC) + 8 * _N ** 3:
+            self._mmap.close()
+            raise ValueError(f"不是补全索引文件: {path}")
+        self._masks = memoryview(self._mmap)[len(_MAGIC):].cast('Q')
+        # 掩码 -> frozenset（不同的掩码只有几千种）
+        self._decoded = {0: frozenset()}
+
+    def _decode(self, mask):
+        tiles = self._decoded.get(mask)
+        if tiles is None:
+            tiles = frozenset(_RANKED_TILES[r] for r in range(_N) if mask >> r & 1)
+            self._decoded[mask] = tiles
+        return tiles
+
+    def get(self, key, default=None):
+        if len(key) != 3:
+            return default
+        slot = _slot(*key)
+        if slot is None:
+            return default
+        return self._decode(self._masks[slot])
+
+    def __getitem__(self, key):
+        result = self.get(key)
+        if result is None:
+            raise KeyError(key)
+        return result
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __iter__(self):
+        return combinations_with_replacement(_RANKED_TILES, 3)
+
+    def __len__(self):
+        return _N * (_N + 1) * (_N + 2) // 6
+
+    def close(self):
+        """释放内存映射"""
+        self._masks.release()
+        self._mmap.close()
+
+
+def open_completion_index(require_sum_gte_10=True, cache_dir=None):
+    """
+    打开（第一次使用时生成）内存映射的补全索引
+
+    参数：
+        require_sum_gte_10: 使用的算式规则
+        cache_dir: 文件所在目录（默认使用 formula_table 的磁盘缓存目录）
+
+    返回：
+        SharedCompletionIndex
+    """
+    cache_dir = cache_dir or formula_table.get_cache_dir()
+    if cache_dir is None:
+        raise ValueError(f"没有可用的缓存目录，请传入 cache_dir 或设置 {formula_table.CACHE_DIR_ENV}")
+    rule = 'advanced' if require_sum_gte_10 else 'newbie'
+    path = os.path.join(cache_dir, f"group_completion_{rule}_v{formula_table._INDEX_VERSION}.bin")
+    try:
+        return SharedCompletionIndex(path)
+    except (OSError, ValueError):
+        write_completion_file(path, require_sum_gte_10)
+        return SharedCompletionIndex(path)
+
+
+def use_shared_tables(cache_dir=None):
+    """
+    让当前进程使用内存映射的补全索引（两种规则）
+
+    之后 get_group_completion_index 直接返回共享的索引，不再构建或读取字典。
+    可以作为进程池的 initializer；在创建进程池之前先在主进程中调用一次，
+    文件就只生成一次
+    """
+    for require_sum_gte_10 in (True, False):
+        formula_table._GROUP_COMPLETION_INDEXES[require_sum_gte_10] = open_completion_index(
+            require_sum_gte_10, cache_dir)
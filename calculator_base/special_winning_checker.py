@@ -166,9 +166,11 @@ class SpecialWinningChecker:
         
         # 去重
         unique_numbers = set(numbers)
+        if len(unique_numbers) < 12:
+            return False, None
         
-        # 尝试所有可能的首项和公差
-        for start in range(50):  # 首项<50
+        # 尝试所有可能的首项和公差（首项一定是手中的数字，且<50）
+        for start in sorted(unique_numbers):
             for diff in range(1, 5):  # 公差1-4
                 # 检查是否存在12项等差数列
                 sequence = [start + i * diff for i in range(12)]
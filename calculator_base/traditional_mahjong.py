@@ -10,6 +10,7 @@ from calculator_base.constants import (
     PLUS, MULTIPLY, POWER, SYMBOLS,
     JOKER_TIAO, JOKER_TONG, JOKER_WAN, JOKER_SYMBOL, JOKERS,
 )
+from calculator_base.search_budget import SearchBudgetExceeded
 
 
 class TraditionalMahjongChecker:
@@ -91,13 +92,14 @@ class TraditionalMahjongChecker:
         
         return tiles, jokers
     
-    def can_win_traditional(self, hand):
+    def can_win_traditional(self, hand, budget=None):
         """
         判断是否能按传统麻将规则胡牌（4组面子+2对将）
         支持万用牌
         
         参数:
             hand: 算术麻将手牌列表（应该是16张）
+            budget: 搜索预算 SearchBudget（可选），用完时抛出 SearchBudgetExceeded
         
         返回:
             (是否能胡, 胡牌组合)
@@ -110,9 +112,9 @@ class TraditionalMahjongChecker:
             return False, []
         
         # 尝试所有万用牌的分配方案
-        return self._try_win_with_jokers(tiles, jokers)
+        return self._try_win_with_jokers(tiles, jokers, budget)
     
-    def _try_win_with_jokers(self, tiles, jokers):
+    def _try_win_with_jokers(self, tiles, jokers, budget=None):
         """
         尝试使用万用牌组成胡牌
         """
@@ -124,12 +126,15 @@ class TraditionalMahjongChecker:
         all_possible_tiles = self._get_all_possible_tiles()
         
         # 递归尝试所有万用牌的分配
-        return self._try_joker_assignments(tiles, jokers, all_possible_tiles, 0, [])
+        return self._try_joker_assignments(tiles, jokers, all_possible_tiles, 0, [], budget)
     
-    def _try_joker_assignments(self, tiles, jokers, all_tiles, joker_idx, assignments):
+    def _try_joker_assignments(self, tiles, jokers, all_tiles, joker_idx, assignments, budget=None):
         """
         递归尝试所有万用牌的替换方案
         """
+        if budget is not None:
+            budget.tick()
+
         if joker_idx >= len(jokers):
             # 所有万用牌都已分配，检查是否能胡
             test_tiles = tiles + assignments
@@ -156,7 +161,7 @@ class TraditionalMahjongChecker:
         for tile in possible:
             new_assignments = assignments + [tile]
             success, result = self._try_joker_assignments(
-                tiles, jokers, all_tiles, joker_idx + 1, new_assignments
+                tiles, jokers, all_tiles, joker_idx + 1, new_assignments, budget
             )
             if success:
                 return True, result
@@ -331,32 +336,193 @@ class TraditionalMahjongChecker:
         
         return False
     
-    def is_ready_traditional(self, hand):
+    def can_win_traditional_counting(self, hand):
+        """
+        判断是否能按传统麻将规则胡牌（结果与 can_win_traditional 相同）
+
+        不枚举万用牌的所有替换方案，而是按张数搜索，缺牌时才用万用牌补上，
+        手里有多张万用牌（包括0）时也很快。分组方案可能与 can_win_traditional 不同
+
+        参数:
+            hand: 算术麻将手牌列表（应该是16张）
+
+        返回:
+            (是否能胡, 胡牌组合)
+        """
+        tiles, jokers = self.convert_to_tiles(hand)
+        if tiles is None:
+            return False, []
+
+        if len(tiles) + len(jokers) != 16:
+            return False, []
+
+        counter = Counter(tiles)
+        # 万用牌按类型计数：'条'/'筒'/'万'/'箭' 或 0（代替所有牌）
+        wild = Counter(joker[1] for joker in jokers)
+
+        groups = []
+        if self._search_counting(counter, wild, 4, 2, groups):
+            pairs = [g for g in groups if g[0] == '将']
+            melds = [g for g in groups if g[0] != '将']
+            return True, pairs + melds
+        return False, []
+
+    def _take(self, counter, wild, tile):
+        """
+        取出一张牌：有这张牌就用这张牌，否则用能代替它的万用牌
+        （同花色的万用牌优先，0留给其他牌）
+
+        返回: 用掉的牌的来源（tile / 万用牌类型），拿不到返回None
+        """
+        if counter[tile] > 0:
+            counter[tile] -= 1
+            return tile
+
+        suit = tile[0]
+        typed = suit if suit in ('条', '筒', '万', '箭') else None
+        if typed is not None and wild[typed] > 0:
+            wild[typed] -= 1
+            return typed
+        if wild[0] > 0:
+            wild[0] -= 1
+            return 0
+        return None
+
+    def _give_back(self, counter, wild, taken):
+        """撤销 _take：taken 为 [(牌, 来源), ...]"""
+        for tile, source in taken:
+            if source == tile:
+                counter[tile] += 1
+            else:
+                wild[source] += 1
+
+    def _try_group(self, counter, wild, group_tiles, melds_left, pairs_left, groups, record):
+        """尝试用 group_tiles 组成一组，然后继续搜索"""
+        taken = []
+        for tile in group_tiles:
+            source = self._take(counter, wild, tile)
+            if source is None:
+                self._give_back(counter, wild, taken)
+                return False
+            taken.append((tile, source))
+
+        groups.append(record)
+        if self._search_counting(counter, wild, melds_left, pairs_left, groups):
+            return True
+        groups.pop()
+        self._give_back(counter, wild, taken)
+        return False
+
+    def _search_counting(self, counter, wild, melds_left, pairs_left, groups):
+        """按张数递归搜索：每次处理最小的一张牌所在的组"""
+        first_tile = None
+        for tile in sorted(tile for tile, count in counter.items() if count > 0):
+            first_tile = tile
+            break
+
+        if first_tile is None:
+            return self._search_wild_only(wild, melds_left, pairs_left, groups)
+
+        suit, value = first_tile
+
+        # 将
+        if pairs_left > 0:
+            pair = [first_tile, first_tile]
+            if self._try_group(counter, wild, pair, melds_left, pairs_left - 1,
+                               groups, ('将', first_tile, first_tile)):
+                return True
+
+        if melds_left == 0:
+            return False
+
+        # 刻子
+        pung = [first_tile] * 3
+        if self._try_group(counter, wild, pung, melds_left - 1, pairs_left,
+                           groups, ('刻子', first_tile, first_tile, first_tile)):
+            return True
+
+        # 顺子：第一张牌可以在顺子的任意位置（前面的牌只能由万用牌代替）
+        if suit in ('条', '筒', '万'):
+            for start in (value, value - 1, value - 2):
+                if start < 1 or start > 7:
+                    continue
+                chow = [(suit, start), (suit, start + 1), (suit, start + 2)]
+                if self._try_group(counter, wild, chow, melds_left - 1, pairs_left,
+                                   groups, ('顺子',) + tuple(chow)):
+                    return True
+
+        return False
+
+    def _search_wild_only(self, wild, melds_left, pairs_left, groups):
+        """只剩万用牌时：同一组里的万用牌必须能代替同一张牌"""
+        if melds_left == 0 and pairs_left == 0:
+            return sum(wild.values()) == 0
+
+        typed = [t for t in ('条', '筒', '万', '箭') if wild[t] > 0]
+        if not typed and wild[0] == 0:
+            return False
+        joker_type = typed[0] if typed else 0
+        tile = {'条': ('条', 1), '筒': ('筒', 1), '万': ('万', 1), '箭': ('箭', '中'), 0: ('条', 1)}[joker_type]
+
+        options = []
+        if melds_left > 0:
+            options.append((3, melds_left - 1, pairs_left, ('刻子', tile, tile, tile)))
+        if pairs_left > 0:
+            options.append((2, melds_left, pairs_left - 1, ('将', tile, tile)))
+
+        for size, new_melds, new_pairs, record in options:
+            used_typed = min(size, wild[joker_type]) if joker_type != 0 else 0
+            used_any = size - used_typed
+            if wild[0] < used_any:
+                continue
+            wild[joker_type] -= used_typed
+            wild[0] -= used_any
+            groups.append(record)
+            if self._search_wild_only(wild, new_melds, new_pairs, groups):
+                return True
+            groups.pop()
+            wild[joker_type] += used_typed
+            wild[0] += used_any
+
+        return False
+
+    def is_ready_traditional(self, hand, budget=None):
         """
         判断15张牌是否听牌（传统麻将）
         支持万用牌
         
         参数:
             hand: 15张牌的列表
+            budget: 搜索预算 SearchBudget（可选），用完时返回已经找到的听牌
         
         返回:
             (是否听牌, 听的牌列表)
         """
+        ready_tiles = [num for num, _ in self.iter_ready_traditional(hand, budget)]
+        return len(ready_tiles) > 0, ready_tiles
+
+    def iter_ready_traditional(self, hand, budget=None):
+        """
+        逐个找出15张牌的传统麻将听牌（找到一张就产出一张）
+
+        参数:
+            hand: 15张牌的列表
+            budget: 搜索预算 SearchBudget（可选），用完时停止
+
+        产出:
+            (听的牌, 胡牌组合)
+        """
         if len(hand) != 15:
-            return False, []
-        
+            return
+
         # 所有可能的牌（算术麻将的数字表示）
-        all_possible_nums = self._get_all_possible_nums()
-        
-        ready_tiles = []
-        
-        for num in all_possible_nums:
-            test_hand = hand + [num]
-            can_win, _ = self.can_win_traditional(test_hand)
+        for num in self._get_all_possible_nums():
+            try:
+                can_win, groups = self.can_win_traditional(hand + [num], budget)
+            except SearchBudgetExceeded:
+                return
             if can_win:
-                ready_tiles.append(num)
-        
-        return len(ready_tiles) > 0, ready_tiles
+                yield num, groups
     
     def _get_all_possible_nums(self):
         """获取所有可能的牌（算术麻将数字表示）"""
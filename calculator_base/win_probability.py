@@ -0,0 +1,226 @@
+"""
+胡牌概率估计模块（蒙特卡洛模拟）
+给定15张听牌手牌和场上可见的牌，估计在N次摸牌内自摸胡牌的概率和期望番数
+
+模拟假设：
+- 剩余牌墙 = 牌库（TILE_POOL）- 手牌 - 可见牌，随机洗牌后依次摸牌
+- 听牌后不改变手牌，摸到不能胡的牌直接打出
+- 只统计自摸，且胡牌必须满足起胡番数
+"""
+
+import os
+import random
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from calculator_base.constants import JOKERS
+from calculator_base.empty_listening_checker import TILE_POOL
+
+
+# 听牌结果缓存：{(手牌, 规则, 起胡番): {牌: 番数}}
+_OUTCOME_CACHE = {}
+_OUTCOME_CACHE_MAX = 256
+_OUTCOME_CACHE_LOCK = threading.Lock()
+
+
+def remaining_wall(hand, visible_tiles=()):
+    """
+    计算剩余牌墙
+
+    参数：
+        hand: 手牌列表（包括鸣牌）
+        visible_tiles: 场上可见的牌（其他玩家的鸣牌、牌河等）
+
+    返回：
+        剩余牌的列表（顺序固定）
+    """
+    used = Counter(hand)
+    used.update(visible_tiles)
+
+    wall = []
+    for tile, total in TILE_POOL.items():
+        wall.extend([tile] * max(0, total - used.get(tile, 0)))
+    return wall
+
+
+def build_outcome_table(mjong, hand, winning_method='自摸'):
+    """
+    计算摸到每张牌时的结果（只计算一次，之后从缓存读取）
+
+    参数：
+        mjong: ArithmeticMahjong对象
+        hand: 15张手牌
+        winning_method: 胡牌方式（默认自摸）
+
+    返回：
+        dict: {能胡的牌: 番数}，不在字典中的牌不能胡
+    """
+    cache_key = (tuple(sorted(map(str, hand))), mjong.require_sum_gte_10,
+                 mjong.min_fan, winning_method)
+    with _OUTCOME_CACHE_LOCK:
+        cached = _OUTCOME_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    is_ready, ready_info = mjong.is_ready(hand, return_details=True)
+
+    candidates = set()
+    if is_ready:
+        for info in ready_info.values():
+            candidates.update(info['tiles'])
+    # 万用牌能否胡由判定器自己尝试替换
+    candidates.update(JOKERS)
+
+    outcomes = {}
+    for tile in candidates:
+        can_win, _, _, fan_info = mjong.can_win(hand + [tile], winning_method=winning_method)
+        if can_win:
+            outcomes[tile] = fan_info['total_fan'] if fan_info else 0
+
+    with _OUTCOME_CACHE_LOCK:
+        if len(_OUTCOME_CACHE) >= _OUTCOME_CACHE_MAX:
+            _OUTCOME_CACHE.pop(next(iter(_OUTCOME_CACHE)))
+        _OUTCOME_CACHE[cache_key] = outcomes
+    return outcomes
+
+
+def _simulate_batch(wall, outcomes, draws, trials, seed):
+    """
+    模拟一批对局（进程池的工作函数，必须在模块顶层）
+
+    返回：
+        (胡牌次数, 胡牌番数之和)
+    """
+    rng = random.Random(seed)
+    draws = min(draws, len(wall))
+    wins = 0
+    fan_sum = 0
+    for _ in range(trials):
+        for tile in rng.sample(wall, draws):
+            fan = outcomes.get(tile)
+            if fan is not None:
+                wins += 1
+                fan_sum += fan
+                break
+    return wins, fan_sum
+
+
+def _half_width(wins, trials, z):
+    """Wilson 区间的半宽"""
+    if trials == 0:
+        return float('inf')
+    p = wins / trials
+    denominator = 1 + z * z / trials
+    spread = z * ((p * (1 - p) / trials + z * z / (4 * trials * trials)) ** 0.5)
+    return spread / denominator
+
+
+def estimate_win_probability(hand, visible_tiles=(), draws=10, mjong=None,
+                             target_half_width=0.01, confidence=0.95,
+                             batch_size=2000, min_trials=2000, max_trials=200000,
+                             workers=None, executor=None, seed=None):
+    """
+    估计在N次摸牌内自摸胡牌的概率和期望番数
+
+    参数：
+        hand: 15张手牌（包括鸣牌）
+        visible_tiles: 场上可见的牌
+        draws: 摸牌次数
+        mjong: ArithmeticMahjong对象（默认进阶规则）
+        target_half_width: 胡牌概率置信区间的目标半宽，达到后提前停止
+        confidence: 置信水平
+        batch_size: 每批模拟的对局数
+        min_trials / max_trials: 最少/最多模拟的对局数
+        workers: 进程数（0或1表示在当前进程中模拟，None表示CPU核数）
+        executor: 外部传入的Executor（可选，优先于workers）
+        seed: 随机种子（结果只取决于种子，与进程数无关）
+
+    返回：
+        dict: {
+            'win_probability': 胡牌概率,
+            'half_width': 置信区间半宽,
+            'expected_fan': 期望番数（不胡计0番）,
+            'expected_fan_given_win': 胡牌时的平均番数,
+            'trials': 模拟对局数,
+            'wins': 胡牌次数,
+            'converged': 是否达到目标精度,
+            'winning_tiles': {能胡的牌: 番数}
+        }
+    """
+    if mjong is None:
+        from calculator_base.mahjong_checker import ArithmeticMahjong
+        mjong = ArithmeticMahjong()
+
+    outcomes = build_outcome_table(mjong, list(hand))
+    wall = remaining_wall(hand, visible_tiles)
+    if not outcomes or not wall:
+        # 没有能胡的牌（或已无牌可摸），概率必然为0
+        return _build_estimate(0, 0, 0, 0.0, outcomes)
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    seed_rng = random.Random(seed)
+    wins = 0
+    fan_sum = 0
+    trials = 0
+
+    def finished():
+        if trials >= max_trials:
+            return True
+        return trials >= min_trials and _half_width(wins, trials, z) <= target_half_width
+
+    if executor is None and workers in (0, 1):
+        while not finished():
+            n = min(batch_size, max_trials - trials)
+            batch_wins, batch_fan = _simulate_batch(wall, outcomes, draws, n, seed_rng.getrandbits(64))
+            wins += batch_wins
+            fan_sum += batch_fan
+            trials += n
+        return _build_estimate(wins, fan_sum, trials, _half_width(wins, trials, z), outcomes,
+                               target_half_width)
+
+    own_executor = executor is None
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        # 保持若干批在途；按提交顺序汇总，保证结果只取决于种子
+        in_flight = 2 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        submitted = 0
+        while True:
+            while len(pending) < in_flight and submitted < max_trials:
+                n = min(batch_size, max_trials - submitted)
+                future = pool.submit(_simulate_batch, wall, outcomes, draws, n, seed_rng.getrandbits(64))
+                pending.append((n, future))
+                submitted += n
+            if not pending:
+                break
+            n, future = pending.popleft()
+            batch_wins, batch_fan = future.result()
+            wins += batch_wins
+            fan_sum += batch_fan
+            trials += n
+            if finished():
+                break
+        for _, future in pending:
+            future.cancel()
+    finally:
+        if own_executor:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return _build_estimate(wins, fan_sum, trials, _half_width(wins, trials, z), outcomes,
+                           target_half_width)
+
+
+def _build_estimate(wins, fan_sum, trials, half_width, outcomes, target_half_width=0.0):
+    """汇总模拟结果"""
+    return {
+        'win_probability': wins / trials if trials else 0.0,
+        'half_width': half_width,
+        'expected_fan': fan_sum / trials if trials else 0.0,
+        'expected_fan_given_win': fan_sum / wins if wins else 0.0,
+        'trials': trials,
+        'wins': wins,
+        'converged': half_width <= target_half_width,
+        'winning_tiles': outcomes,
+    }
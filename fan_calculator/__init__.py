@@ -12,11 +12,18 @@ from fan_calculator.fan_calculator import (
     format_fan_result
 )
 
+from fan_calculator.fan_threshold import (
+    FanThreshold,
+    evaluate_threshold
+)
+
 from fan_calculator.fan_base import (
     FanType,
     FanResult,
     FanResults,
-    apply_exclusion_rules
+    apply_exclusion_rules,
+    apply_exclusion_mask,
+    fan_mask
 )
 
 __all__ = [
@@ -25,8 +32,12 @@ __all__ = [
     'get_total_fan',
     'can_win_with_fan',
     'format_fan_result',
+    'FanThreshold',
+    'evaluate_threshold',
     'FanType',
     'FanResult',
     'FanResults',
     'apply_exclusion_rules',
+    'apply_exclusion_mask',
+    'fan_mask',
 ]
@@ -4,7 +4,7 @@
 """
 
 from enum import Enum
-from typing import List, Set, Dict, Tuple
+from typing import List, Set, Dict, Tuple, Iterable, Optional
 from calculator_base.hand_structure import Hand, Tile, MeldedGroup
 from calculator_base.parser import PLUS, MULTIPLY, POWER, SYMBOLS
 
@@ -88,6 +88,30 @@ class FanType(Enum):
         self.fan_name = name
 
 
+# 每个番种一个二进制位（按定义的顺序），FanType.bit 为 1 << 序号
+FAN_TYPES: List[FanType] = list(FanType)
+for _index, _fan_type in enumerate(FAN_TYPES):
+    _fan_type.bit = 1 << _index
+
+
+def fan_mask(fan_types: Iterable[FanType]) -> int:
+    """番种集合的位掩码"""
+    mask = 0
+    for fan_type in fan_types:
+        mask |= fan_type.bit
+    return mask
+
+
+def fan_types_in_mask(mask: int) -> List[FanType]:
+    """位掩码中的番种（按定义的顺序）"""
+    fan_types = []
+    while mask:
+        low = mask & -mask
+        fan_types.append(FAN_TYPES[low.bit_length() - 1])
+        mask ^= low
+    return fan_types
+
+
 # 牌面张数映射（用于平胡、鸳鸯等判断）
 TILE_COUNTS = {
     # 数字牌
@@ -162,8 +186,54 @@ class FanResults:
     """番数计算的完整结果"""
     
     def __init__(self):
-        self.results: List[FanResult] = []
-        self.excluded: List[Tuple[FanType, str]] = []  # 被排除的番种及原因
+        self._results: Optional[List[FanResult]] = []
+        self._excluded: Optional[List[Tuple[FanType, str]]] = []  # 被排除的番种及原因
+        self._mask = 0
+        self._counts: Dict[FanType, int] = {}
+        self._exclusion_source = None
+    
+    @classmethod
+    def from_mask(cls, mask: int, counts: Dict[FanType, int] = None) -> 'FanResults':
+        """
+        由番种位掩码创建（批量计算用，番种明细在第一次访问时才生成）
+        
+        参数：
+            mask: 番种位掩码
+            counts: {番种: 数量}（不在其中的番种数量为1）
+        """
+        fan_results = cls()
+        fan_results._results = None
+        fan_results._mask = mask
+        fan_results._counts = counts or {}
+        return fan_results
+    
+    @property
+    def results(self) -> List[FanResult]:
+        if self._results is None:
+            self._results = [FanResult(fan_type, self._counts.get(fan_type, 1))
+                             for fan_type in fan_types_in_mask(self._mask)]
+        return self._results
+    
+    @results.setter
+    def results(self, results: List[FanResult]):
+        self._results = results
+    
+    @property
+    def excluded(self) -> List[Tuple[FanType, str]]:
+        if self._excluded is None:
+            self._excluded = _exclusion_reasons(*self._exclusion_source)
+        return self._excluded
+    
+    @excluded.setter
+    def excluded(self, excluded: List[Tuple[FanType, str]]):
+        self._excluded = excluded
+    
+    @property
+    def mask(self) -> int:
+        """所有番种的位掩码"""
+        if self._results is None:
+            return self._mask
+        return fan_mask(r.fan_type for r in self._results)
     
     def add(self, fan_result: FanResult):
         """添加一个番种结果"""
@@ -274,6 +344,65 @@ FAN_EXCLUSIONS = {
 }
 
 
+def _transitive_exclusion_masks() -> List[int]:
+    """每个番种（按位的序号）直接或间接排除的番种的位掩码"""
+    masks = [fan_mask(FAN_EXCLUSIONS.get(fan_type, ())) for fan_type in FAN_TYPES]
+    changed = True
+    while changed:
+        changed = False
+        for index, mask in enumerate(masks):
+            closure = mask
+            for lower in fan_types_in_mask(mask):
+                closure |= masks[lower.bit.bit_length() - 1]
+            if closure != mask:
+                masks[index] = closure
+                changed = True
+    return masks
+
+
+# EXCLUSION_MASKS[序号]：这个番种直接或间接（例如大三元→三刻子→暗刻）排除的番种
+EXCLUSION_MASKS: List[int] = _transitive_exclusion_masks()
+
+
+def excluded_mask(present: int) -> int:
+    """出现的番种（位掩码）排除的所有番种的位掩码"""
+    excluded = 0
+    while present:
+        low = present & -present
+        excluded |= EXCLUSION_MASKS[low.bit_length() - 1]
+        present ^= low
+    return excluded
+
+
+def apply_exclusion_mask(present: int) -> int:
+    """
+    对位掩码应用不重复规则
+    
+    参数：
+        present: 出现的番种的位掩码
+    
+    返回：
+        不被排除的番种的位掩码
+    """
+    return present & ~excluded_mask(present)
+
+
+def _exclusion_reasons(results: List[FanResult], present: int, excluded: int) -> List[Tuple[FanType, str]]:
+    """被排除的番种及原因（按出现的番种的顺序）"""
+    reasons = []
+    recorded = 0
+    for result in results:
+        for excluded_type in FAN_EXCLUSIONS.get(result.fan_type, ()):
+            if excluded_type.bit & present:
+                reasons.append((excluded_type, f"被{result.fan_type.fan_name}包含"))
+                recorded |= excluded_type.bit
+    for result in results:
+        if result.fan_type.bit & excluded & ~recorded:
+            reasons.append((result.fan_type, "被其他番种包含"))
+            recorded |= result.fan_type.bit
+    return reasons
+
+
 def apply_exclusion_rules(fan_results: FanResults) -> FanResults:
     """
     应用不重复规则，排除被包含的番种
@@ -282,35 +411,16 @@ def apply_exclusion_rules(fan_results: FanResults) -> FanResults:
         fan_results: 原始番数结果
     
     返回：
-        应用规则后的番数结果
+        应用规则后的番数结果（被排除的番种及原因在访问 excluded 时才生成）
     """
-    # 创建新结果
-    final_results = FanResults()
-    
-    # 获取所有已有的番种
-    present_fan_types = {r.fan_type for r in fan_results.results}
-    
-    # 收集所有应该被排除的番种
-    excluded_types = set()
-    for result in fan_results.results:
-        if result.fan_type in FAN_EXCLUSIONS:
-            for excluded_type in FAN_EXCLUSIONS[result.fan_type]:
-                if excluded_type in present_fan_types:
-                    excluded_types.add(excluded_type)
-                    final_results.exclude(
-                        excluded_type,
-                        f"被{result.fan_type.fan_name}包含"
-                    )
-    
-    # 添加未被排除的番种
-    for result in fan_results.results:
-        if result.fan_type not in excluded_types:
-            final_results.add(result)
-        else:
-            # 记录被排除的番种（如果还没记录）
-            if not any(ft == result.fan_type for ft, _ in final_results.excluded):
-                final_results.exclude(result.fan_type, "被其他番种包含")
+    results = fan_results.results
+    present = fan_results.mask
+    excluded = excluded_mask(present)
     
+    final_results = FanResults()
+    final_results.results = [r for r in results if not r.fan_type.bit & excluded]
+    final_results._excluded = None
+    final_results._exclusion_source = (list(results), present, excluded)
     return final_results
 
 
@@ -355,6 +465,51 @@ def is_power_of_2(n: int) -> bool:
     return n > 0 and (n & (n - 1)) == 0
 
 
+# 数字的性质位（全X类番种：所有数字都有某个性质，就是所有数字性质位的交中有这一位）
+NUM_ODD = 1 << 0            # 奇数
+NUM_EVEN = 1 << 1           # 偶数
+NUM_ONE_DIGIT = 1 << 2      # 一位数（0-9）
+NUM_TWO_DIGIT = 1 << 3      # 两位数（10及以上）
+NUM_COMPOSITE = 1 << 4      # 合数
+NUM_POWER_OF_2 = 1 << 5     # 2的幂（包括1）
+NUM_MULTIPLE_OF_3 = 1 << 6  # 3的倍数
+NUM_TWO = 1 << 7            # 2
+
+
+def _number_properties(n: int) -> int:
+    mask = NUM_EVEN if n % 2 == 0 else NUM_ODD
+    mask |= NUM_ONE_DIGIT if 0 <= n <= 9 else 0
+    mask |= NUM_TWO_DIGIT if n >= 10 else 0
+    mask |= NUM_COMPOSITE if is_composite(n) else 0
+    mask |= NUM_POWER_OF_2 if is_power_of_2(n) else 0
+    mask |= NUM_MULTIPLE_OF_3 if n % 3 == 0 else 0
+    mask |= NUM_TWO if n == 2 else 0
+    return mask
+
+
+# NUMBER_PROPERTIES[n]：牌面范围内（0-49）每个数字的性质位
+NUMBER_PROPERTIES = [_number_properties(n) for n in range(50)]
+
+
+def number_masks(numbers: Iterable[int]) -> Tuple[int, int]:
+    """
+    所有数字性质位的交和并
+    
+    参数：
+        numbers: 数字列表
+    
+    返回：
+        (所有数字都有的性质, 至少一个数字有的性质)；没有数字时为 (0, 0)
+    """
+    all_of = -1
+    any_of = 0
+    for n in numbers:
+        mask = NUMBER_PROPERTIES[n] if 0 <= n < 50 else _number_properties(n)
+        all_of &= mask
+        any_of |= mask
+    return (all_of, any_of) if any_of else (0, 0)
+
+
 def get_all_number_tiles(hand: Hand) -> List[int]:
     """
     获取所有数字牌（包括鸣牌和万用牌替代的，但不包括单张杠）
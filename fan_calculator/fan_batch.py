@@ -0,0 +1,241 @@
+"""
+算术麻将番数计算 - 批量计算（NumPy 向量化）
+整批已经胡牌的手牌编码成数组（每行一手牌，空位的牌编号为 -1）：
+
+- ids: (N, W) 计番的牌（不含单张杠）的牌编号（见 constants.TILE_TO_ID），W >= 16
+- joker: (N, W) 是否是万用牌代替的
+- dora: (N, W) 是否是宝牌
+
+基于数字和牌面信息的番种（全偶数、全一位、鸳鸯、平胡、宝牌等）都是对每张牌的性质
+做归约，按列运算一次算出整批；算式、比较、场上信息等番种仍逐手计算，
+再按 FanCalculator.calculate 的顺序合并，结果与 FanCalculator.calculate 相同。
+
+有单张杠或者有牌不在牌面范围内的手牌，整手按 FanCalculator.calculate 计算。
+
+需要 NumPy，不从 fan_calculator 包导出：from fan_calculator.fan_batch import calculate_batch
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+from calculator_base.constants import SYMBOLS, TILE_TO_ID, ID_TO_TILE
+from calculator_base.hand_structure import Hand
+from fan_calculator.fan_base import (
+    FanType, FanResult, FanResults, NUMBER_PROPERTIES, get_tile_count, get_all_tiles_for_fan,
+    NUM_ODD, NUM_EVEN, NUM_ONE_DIGIT, NUM_TWO_DIGIT, NUM_COMPOSITE,
+    NUM_POWER_OF_2, NUM_MULTIPLE_OF_3, NUM_TWO,
+)
+from fan_calculator.fan_threshold import FAN_CHECKERS, finalize_fans
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# 所有数字都有某个性质才成立的番种
+_ALL_OF_FANS = {
+    FanType.QI_YI_SE: NUM_ODD,
+    FanType.QUAN_ER_MI: NUM_POWER_OF_2,
+    FanType.QUAN_ER_WEI: NUM_TWO_DIGIT,
+    FanType.QUAN_YI_WEI: NUM_ONE_DIGIT,
+    FanType.QUAN_SAN_BEI: NUM_MULTIPLE_OF_3,
+    FanType.QUAN_HE_SHU: NUM_COMPOSITE,
+    FanType.QUAN_OU_SHU: NUM_EVEN,
+}
+
+# 没有数字有某个性质才成立的番种
+_NONE_OF_FANS = {
+    FanType.WU_HE_SHU: NUM_COMPOSITE,
+    FanType.DUAN_ER: NUM_TWO,
+}
+
+# 按列计算的番种
+BATCH_FAN_TYPES = frozenset(_ALL_OF_FANS) | frozenset(_NONE_OF_FANS) | {
+    FanType.QUAN_DUO_BEI, FanType.QUAN_CAI, FanType.PING_HU, FanType.YANG_YANG, FanType.BAO_PAI,
+}
+
+_TABLES = None
+# 多线程同时第一次调用时只构建一次
+_BUILD_LOCK = threading.Lock()
+
+
+def _tables():
+    """
+    按牌编号的查找表，多出的最后一项是空位（编号 -1）的值
+
+    返回：
+        {表名: 数组}
+    """
+    global _TABLES
+    if _TABLES is None:
+        with _BUILD_LOCK:
+            if _TABLES is None:
+                _TABLES = _build_tables()
+    return _TABLES
+
+
+def _build_tables():
+    values = list(ID_TO_TILE)
+    is_number = [isinstance(value, int) for value in values]
+    counts = [get_tile_count(value) for value in values]
+    return {
+        # 性质位的交：不是数字的牌和空位不影响（所有位都是1）
+        'all_of': np.array([NUMBER_PROPERTIES[v] if num else -1
+                            for v, num in zip(values, is_number)] + [-1], dtype=np.int64),
+        'any_of': np.array([NUMBER_PROPERTIES[v] if num else 0
+                            for v, num in zip(values, is_number)] + [0], dtype=np.int64),
+        # 求公约数时不是数字的牌和空位记为0（gcd(n, 0) = n）
+        'number': np.array([v if num else 0 for v, num in zip(values, is_number)] + [0],
+                           dtype=np.int64),
+        'count_gte_4': np.array([count >= 4 for count in counts] + [True]),
+        'cai': np.array([value in SYMBOLS or count <= 2
+                         for value, count in zip(values, counts)] + [True]),
+        # 牌面张数等于2的牌（鸳鸯）
+        'rare_ids': [i for i, count in enumerate(counts) if count == 2],
+    }
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise ImportError("未安装 NumPy，无法使用向量化计算")
+
+
+class HandBatch:
+    """
+    编码后的一批手牌
+
+    属性：
+        hands: 原来的Hand对象列表
+        ids / joker / dora: 按列计算的数组（见模块说明），每行对应 rows 中的一手牌
+        rows: 按列计算的手牌在 hands 中的下标
+        scalar_rows: 逐手计算的手牌在 hands 中的下标（有单张杠，或有牌不在牌面范围内）
+    """
+
+    def __init__(self, hands: List[Hand], width: int = 16):
+        _require_numpy()
+        self.hands = list(hands)
+        self.rows = []
+        self.scalar_rows = []
+        encoded = []
+        for i, hand in enumerate(self.hands):
+            tiles = get_all_tiles_for_fan(hand, include_single_gang=False)
+            if (any(group.group_type == 'single_gang' for group in hand.melded_groups)
+                    or not all(tile.value in TILE_TO_ID for tile in tiles)):
+                self.scalar_rows.append(i)
+                continue
+            self.rows.append(i)
+            encoded.append(tiles)
+            width = max(width, len(tiles))
+
+        n = len(encoded)
+        self.ids = np.full((n, width), -1, dtype=np.int16)
+        self.joker = np.zeros((n, width), dtype=bool)
+        self.dora = np.zeros((n, width), dtype=bool)
+        for r, tiles in enumerate(encoded):
+            k = len(tiles)
+            self.ids[r, :k] = [TILE_TO_ID[tile.value] for tile in tiles]
+            self.joker[r, :k] = [tile.is_joker_used for tile in tiles]
+            self.dora[r, :k] = [tile.is_dora for tile in tiles]
+
+
+def column_fans(ids, joker=None, dora=None) -> Dict[FanType, 'np.ndarray']:
+    """
+    按列计算基于数字和牌面信息的番种
+
+    参数：
+        ids: (N, W) 牌编号数组（空位为 -1）
+        joker: (N, W) 是否是万用牌代替的（可选，默认都不是）
+        dora: (N, W) 是否是宝牌（可选，默认都不是）
+
+    返回：
+        {番种: (N,) 数组}，值为番种的数量（0表示没有这个番种），
+        全多倍的值是数字的最大公约数（没有数字牌时为 -1）
+    """
+    _require_numpy()
+    tables = _tables()
+    ids = np.asarray(ids, dtype=np.intp)
+    joker = np.zeros(ids.shape, dtype=bool) if joker is None else np.asarray(joker, dtype=bool)
+    dora = np.zeros(ids.shape, dtype=bool) if dora is None else np.asarray(dora, dtype=bool)
+
+    all_of = np.bitwise_and.reduce(tables['all_of'][ids], axis=1)
+    any_of = np.bitwise_or.reduce(tables['any_of'][ids], axis=1)
+    has_number = any_of != 0
+
+    fans = {}
+    for fan_type, bit in _ALL_OF_FANS.items():
+        fans[fan_type] = (has_number & (all_of & bit != 0)).astype(np.int64)
+    for fan_type, bit in _NONE_OF_FANS.items():
+        fans[fan_type] = (any_of & bit == 0).astype(np.int64)
+
+    common_divisor = np.gcd.reduce(tables['number'][ids], axis=1)
+    fans[FanType.QUAN_DUO_BEI] = np.where(
+        has_number, np.where(common_divisor >= 4, common_divisor, 0), -1)
+
+    # 全彩允许万用牌，平胡不允许空位以外的牌面张数小于4
+    fans[FanType.QUAN_CAI] = (tables['cai'][ids] | joker).all(axis=1).astype(np.int64)
+    fans[FanType.PING_HU] = tables['count_gte_4'][ids].all(axis=1).astype(np.int64)
+
+    # 鸳鸯：每种牌面张数等于2的牌（不计万用牌代替的）每2张算一对
+    pairs = np.zeros(len(ids), dtype=np.int64)
+    for tile_id in tables['rare_ids']:
+        pairs += ((ids == tile_id) & ~joker).sum(axis=1) // 2
+    fans[FanType.YANG_YANG] = pairs
+
+    fans[FanType.BAO_PAI] = (dora & (ids >= 0)).sum(axis=1)
+    return fans
+
+
+def _column_result(fan_type: FanType, value: int) -> Optional[FanResult]:
+    """按列计算的值转换成与逐手计算相同的 FanResult"""
+    if fan_type == FanType.QUAN_DUO_BEI:
+        if value == -1:
+            return FanResult(fan_type, reason="无数字牌")
+        return FanResult(fan_type, reason=f"{value}的倍数") if value else None
+    if not value:
+        return None
+    if fan_type == FanType.YANG_YANG:
+        return FanResult(fan_type, count=value, reason=f"{value}对")
+    if fan_type == FanType.BAO_PAI:
+        return FanResult(fan_type, count=value, reason=f"{value}张dora")
+    return FanResult(fan_type)
+
+
+def calculate_batch(hands: List[Hand]) -> List[FanResults]:
+    """
+    批量计算番数
+
+    参数：
+        hands: Hand对象列表（已经胡牌的手牌）
+
+    返回：
+        FanResults对象列表，与逐手调用 FanCalculator.calculate 的结果相同
+    """
+    from fan_calculator.fan_calculator import calculate_fan
+
+    batch = HandBatch(hands)
+    columns = column_fans(batch.ids, batch.joker, batch.dora)
+    # 按 FanCalculator.calculate 的顺序：(番种, 按列计算的值或None, 检查函数)
+    plan = [(fan_type, columns[fan_type].tolist() if fan_type in columns else None, check)
+            for fan_type, check in FAN_CHECKERS]
+
+    results = [None] * len(batch.hands)
+    for r, i in enumerate(batch.rows):
+        hand = batch.hands[i]
+        all_fans = FanResults()
+        for fan_type, column, check in plan:
+            if column is None:
+                fan = check(hand)
+            elif column[r]:
+                fan = _column_result(fan_type, column[r])
+            else:
+                continue
+            if fan:
+                all_fans.add(fan)
+        results[i] = finalize_fans(all_fans)
+
+    for i in batch.scalar_rows:
+        results[i] = calculate_fan(batch.hands[i])
+    return results
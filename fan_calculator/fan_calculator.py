@@ -11,6 +11,7 @@ from fan_calculator.fan_tile_info import check_all_tile_info_fans
 from fan_calculator.fan_comparison import check_all_comparison_fans
 from fan_calculator.fan_special import check_all_special_fans
 from fan_calculator.fan_context import check_all_context_fans
+from fan_calculator.fan_threshold import FanThreshold, evaluate_threshold, finalize_fans
 
 
 class FanCalculator:
@@ -77,19 +78,7 @@ class FanCalculator:
         for fan in context_fans.results:
             all_fans.add(fan)
         
-        # 7. 应用不重复规则
-        final_fans = apply_exclusion_rules(all_fans)
-        
-        # 8. 检查无番胡
-        # 如果没有任何番种，则为无番胡（8番）
-        if len(final_fans.results) == 0:
-            from fan_calculator.fan_base import FanType, FanResult
-            final_fans.add(FanResult(FanType.WU_FAN_HU))
-        
-        # 9. 按番值排序
-        final_fans.sort_by_value()
-        
-        return final_fans
+        return finalize_fans(all_fans)
     
     def can_win(self, hand: Hand) -> bool:
         """
@@ -101,8 +90,22 @@ class FanCalculator:
         返回：
             是否可以胡牌（番数 >= min_fan）
         """
-        result = self.calculate(hand)
-        return result.get_total_fan() >= self.min_fan
+        return self.evaluate_threshold(hand).reached
+    
+    def evaluate_threshold(self, hand: Hand) -> FanThreshold:
+        """
+        起胡判定模式：只判断总番数是否达到起胡番数
+        
+        番种（除可以叠加的以外）按番值从大到小检查，达到起胡番数或已经不可能达到时就停止，
+        完整的番种明细在访问 fan_results 时才计算
+        
+        参数：
+            hand: Hand对象（已经胡牌的手牌）
+        
+        返回：
+            FanThreshold对象（reached 与 calculate(hand).get_total_fan() >= min_fan 相同）
+        """
+        return evaluate_threshold(hand, self.min_fan)
     
     def format_result(self, fan_results: FanResults, verbose: bool = False) -> str:
         """
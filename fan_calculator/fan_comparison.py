@@ -6,8 +6,8 @@
 from typing import Optional, List, Tuple, Set
 from collections import Counter
 from calculator_base.hand_structure import Hand, Tile
-from calculator_base.parser import PLUS, MULTIPLY, POWER, SYMBOLS
 from fan_calculator.fan_base import FanType, FanResult, FanResults
+from fan_calculator.fan_features import group_features
 
 
 def normalize_formula(tiles: List[Tile]) -> Optional[Tuple]:
@@ -23,56 +23,10 @@ def normalize_formula(tiles: List[Tile]) -> Optional[Tuple]:
     
     返回：
         标准化的元组 (op, a, b, c) 或 None（如果不是算式）
+
+    合法算式的标准形式在 fan_features 中预先算好
     """
-    if len(tiles) != 4:
-        return None
-    
-    # 找到符号
-    op = None
-    numbers = []
-    
-    for tile in tiles:
-        if tile.value in SYMBOLS:
-            if op is not None:
-                return None  # 多个符号，无效
-            op = tile.value
-        else:
-            numbers.append(tile.value)
-    
-    if op is None or len(numbers) != 3:
-        return None  # 不是有效算式
-    
-    # 根据运算符标准化
-    # 需要识别哪个是结果
-    # 尝试所有可能的组合
-    for i in range(3):
-        for j in range(3):
-            if i == j:
-                continue
-            k = 3 - i - j  # 第三个数的索引
-            
-            a, b, c = numbers[i], numbers[j], numbers[k]
-            
-            # 验证是否满足运算关系
-            valid = False
-            try:
-                if op == PLUS and a + b == c:
-                    valid = True
-                elif op == MULTIPLY and a * b == c:
-                    valid = True
-                elif op == POWER and a ** b == c:
-                    valid = True
-            except (OverflowError, ValueError):
-                continue
-            
-            if valid:
-                # 标准化：对于加法和乘法，保证 a <= b
-                if op in [PLUS, MULTIPLY]:
-                    a, b = min(a, b), max(a, b)
-                
-                return (op, a, b, c)
-    
-    return None
+    return group_features(tiles).key
 
 
 def is_formula_group(tiles: List[Tile]) -> bool:
@@ -0,0 +1,133 @@
+"""
+算术麻将番数计算 - 组的特征表
+预先计算牌面范围内所有合法算式的特征，基于组的番种检查（四同式、三同式、
+两般高、一般高、全带彩、次方、加一色等）查表后只做整数比较：
+
+- key: 标准化的算式 (op, a, b, c)，与 normalize_formula 相同；不是算式时为None
+- operator: 第一张符号（没有符号时为None）
+- symbol_count: 符号张数
+- has_rare: 是否有牌面张数等于2的牌
+- tens: 10的倍数的张数
+- is_kezi: 是否是刻子（4张相同的牌）
+
+按组中牌值的顺序缓存（次方不满足交换律，标准化的结果可能与顺序有关），
+最多缓存 GROUP_CACHE_SIZE 种（LRU），万用牌代替出的组很多时不会无限增长。
+不在表中的组（刻子、传统麻将的组、万用牌代替后超出牌面范围的算式等）
+第一次遇到时计算。
+"""
+
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from itertools import permutations
+
+from calculator_base.constants import PLUS, MULTIPLY, POWER, SYMBOLS
+from calculator_base.formula_table import get_formula_table, formula_key
+from fan_calculator.fan_base import get_tile_count
+
+
+GroupFeatures = namedtuple('GroupFeatures', 'key operator symbol_count has_rare tens is_kezi')
+
+# {标准形式: GroupFeatures}（番数计算不限制次方的范围，也不要求和>=10）
+_FORMULA_FEATURES = None
+_BUILD_LOCK = threading.Lock()
+
+# 按牌值的元组（按组中的顺序）缓存的组数
+GROUP_CACHE_SIZE = 65536
+
+
+def _normalize(values):
+    """标准化算式（与 fan_comparison.normalize_formula 的规则相同）"""
+    if len(values) != 4:
+        return None
+
+    op = None
+    numbers = []
+    for value in values:
+        if value in SYMBOLS:
+            if op is not None:
+                return None  # 多个符号，无效
+            op = value
+        else:
+            numbers.append(value)
+    if op is None or len(numbers) != 3:
+        return None
+
+    for i in range(3):
+        for j in range(3):
+            if i == j:
+                continue
+            a, b, c = numbers[i], numbers[j], numbers[3 - i - j]
+            if op == PLUS:
+                valid = a + b == c
+            elif op == MULTIPLY:
+                valid = a * b == c
+            else:
+                # a >= 2 时 a ** b >= 2 ** b，指数超过 c 的位数时不可能相等，不必计算
+                valid = (a < 2 or b <= max(c, 0).bit_length()) and a ** b == c
+            if valid:
+                if op in (PLUS, MULTIPLY):
+                    a, b = min(a, b), max(a, b)
+                return (op, a, b, c)
+    return None
+
+
+def _compute(values):
+    symbols = [value for value in values if value in SYMBOLS]
+    return GroupFeatures(
+        key=_normalize(values),
+        operator=symbols[0] if symbols else None,
+        symbol_count=len(symbols),
+        has_rare=any(get_tile_count(value) == 2 for value in values),
+        tens=sum(1 for value in values if isinstance(value, int) and value % 10 == 0),
+        is_kezi=len(values) == 4 and len(set(values)) == 1,
+    )
+
+
+def _build_formula_features():
+    features = {}
+    for key in get_formula_table(require_sum_gte_10=False, bounded_power=False):
+        # 有多种读法的次方（2 ∧ 4 = 4 ∧ 2 = 16，0 ∧ 1 = 0 和 0 ∧ 0 = 1），
+        # 标准化的结果与牌的顺序有关，不放入表中
+        if key[0] == POWER and len({_normalize((POWER,) + numbers)
+                                    for numbers in permutations(key[1:])}) > 1:
+            continue
+        features[key] = _compute(key)
+    return features
+
+
+def get_formula_features():
+    """
+    获取所有合法算式的特征表
+
+    返回：
+        {标准形式: GroupFeatures}
+    """
+    global _FORMULA_FEATURES
+    if _FORMULA_FEATURES is None:
+        with _BUILD_LOCK:
+            if _FORMULA_FEATURES is None:
+                _FORMULA_FEATURES = _build_formula_features()
+    return _FORMULA_FEATURES
+
+
+def group_features(tiles):
+    """
+    获取一组牌的特征
+
+    参数：
+        tiles: Tile对象的列表（或牌值的列表）
+
+    返回：
+        GroupFeatures
+    """
+    try:
+        values = tuple([tile.value for tile in tiles])
+    except AttributeError:
+        values = tuple(tiles)
+    return _features_of_values(values)
+
+
+@lru_cache(maxsize=GROUP_CACHE_SIZE)
+def _features_of_values(values):
+    return get_formula_features().get(formula_key(values)) or _compute(values)
@@ -12,6 +12,7 @@ from fan_calculator.fan_base import (
     FanType, FanResult, FanResults,
     get_all_tiles_for_fan
 )
+from fan_calculator.fan_features import group_features
 
 
 def is_formula_group(tiles: List[Tile]) -> bool:
@@ -27,8 +28,7 @@ def is_formula_group(tiles: List[Tile]) -> bool:
     if len(tiles) != 4:
         return False
     
-    symbol_count = sum(1 for t in tiles if t.value in SYMBOLS)
-    return symbol_count == 1
+    return group_features(tiles).symbol_count == 1
 
 
 def is_kezi_group(tiles: List[Tile]) -> bool:
@@ -41,11 +41,7 @@ def is_kezi_group(tiles: List[Tile]) -> bool:
     返回：
         是否是刻子
     """
-    if len(tiles) != 4:
-        return False
-    
-    values = [t.value for t in tiles]
-    return len(set(values)) == 1
+    return group_features(tiles).is_kezi
 
 
 def get_formula_operator(tiles: List[Tile]) -> Optional[str]:
@@ -58,10 +54,7 @@ def get_formula_operator(tiles: List[Tile]) -> Optional[str]:
     返回：
         运算符（+, ×, ∧）或None
     """
-    for tile in tiles:
-        if tile.value in SYMBOLS:
-            return tile.value
-    return None
+    return group_features(tiles).operator
 
 
 def count_formulas_by_operator(hand: Hand) -> Tuple[int, int, int]:
@@ -74,34 +67,17 @@ def count_formulas_by_operator(hand: Hand) -> Tuple[int, int, int]:
     返回：
         (加法数量, 乘法数量, 次方数量)
     """
-    plus_count = 0
-    multiply_count = 0
-    power_count = 0
-    
-    # 从手牌分组中统计
-    if hand.hand_groups:
-        for group in hand.hand_groups:
-            if is_formula_group(group):
-                op = get_formula_operator(group)
-                if op == PLUS:
-                    plus_count += 1
-                elif op == MULTIPLY:
-                    multiply_count += 1
-                elif op == POWER:
-                    power_count += 1
-    
+    groups = list(hand.hand_groups or [])
     # 从鸣牌中统计（吃牌也是算式）
-    for melded_group in hand.melded_groups:
-        if melded_group.group_type == 'chi':
-            tiles = melded_group.tiles
-            if is_formula_group(tiles):
-                op = get_formula_operator(tiles)
-                if op == PLUS:
-                    plus_count += 1
-                elif op == MULTIPLY:
-                    multiply_count += 1
-                elif op == POWER:
-                    power_count += 1
+    groups += [melded_group.tiles for melded_group in hand.melded_groups
+               if melded_group.group_type == 'chi']
+    
+    counts = Counter()
+    for group in groups:
+        features = group_features(group)
+        if len(group) == 4 and features.symbol_count == 1:
+            counts[features.operator] += 1
+    plus_count, multiply_count, power_count = counts[PLUS], counts[MULTIPLY], counts[POWER]
     
     return plus_count, multiply_count, power_count
 
@@ -0,0 +1,235 @@
+"""
+算术麻将番数计算 - 起胡判定模式
+只判断总番数是否达到起胡番数，结果一确定就停止：
+
+- 先检查可以叠加的番种（宝牌、暗刻等，番值小但张数不定），其余按番值从大到小检查
+- 下界：已经找到、且不会再被还没检查的番种排除的番数
+- 上界：已经找到的番数（应用不重复规则后）+ 还没检查的番种最多能贡献的番数
+- 下界 >= 起胡番数时达到，上界 < 起胡番数时达不到
+
+完整的番种明细（FanResults）只在需要时才计算。
+"""
+
+from functools import cached_property
+
+from calculator_base.hand_structure import Hand
+from fan_calculator.fan_base import (
+    FanType, FanResult, FanResults, FAN_TYPES, EXCLUSION_MASKS, fan_types_in_mask,
+    apply_exclusion_rules, get_all_tiles_for_fan,
+)
+from fan_calculator import (
+    fan_number_based as _number, fan_formula_based as _formula, fan_tile_info as _tile_info,
+    fan_comparison as _comparison, fan_special as _special, fan_context as _context,
+)
+
+
+# (番种, 检查函数)，与 FanCalculator.calculate 检查的番种和顺序相同（批量计算也按这个顺序合并）
+FAN_CHECKERS = [
+    (FanType.QI_YI_SE, _number.check_qi_yi_se),
+    (FanType.WU_HE_SHU, _number.check_wu_he_shu),
+    (FanType.QUAN_ER_MI, _number.check_quan_er_mi),
+    (FanType.QUAN_ER_WEI, _number.check_quan_er_wei),
+    (FanType.QUAN_DUO_BEI, _number.check_quan_duo_bei),
+    (FanType.QUAN_YI_WEI, _number.check_quan_yi_wei),
+    (FanType.QUAN_SAN_BEI, _number.check_quan_san_bei),
+    (FanType.QUAN_HE_SHU, _number.check_quan_he_shu),
+    (FanType.QUAN_OU_SHU, _number.check_quan_ou_shu),
+    (FanType.DUAN_ER, _number.check_duan_er),
+    (FanType.DA_SAN_YUAN, _formula.check_da_san_yuan),
+    (FanType.SI_KE_ZI, _formula.check_si_ke_zi),
+    (FanType.DA_SI_XI, _formula.check_da_si_xi),
+    (FanType.CI_YI_SE, _formula.check_ci_yi_se),
+    (FanType.SAN_KE_ZI, _formula.check_san_ke_zi),
+    (FanType.XIAO_SAN_YUAN, _formula.check_xiao_san_yuan),
+    (FanType.XIAO_SI_XI, _formula.check_xiao_si_xi),
+    (FanType.JIA_YI_SE, _formula.check_jia_yi_se),
+    (FanType.CHENG_YI_SE, _formula.check_cheng_yi_se),
+    (FanType.SI_MEN_QI, _formula.check_si_men_qi),
+    (FanType.CI_FANG, _formula.check_ci_fang),
+    (FanType.QUAN_CAI, _tile_info.check_quan_cai),
+    (FanType.QUAN_DAI_CAI, _tile_info.check_quan_dai_cai),
+    (FanType.PING_HU, _tile_info.check_ping_hu),
+    (FanType.YANG_YANG, _tile_info.check_yang_yang),
+    (FanType.BAO_PAI, _tile_info.check_bao_pai),
+    (FanType.SI_TONG_SHI, _comparison.check_si_tong_shi),
+    (FanType.LIANG_BAN_GAO, _comparison.check_liang_ban_gao),
+    (FanType.SAN_TONG_SHI, _comparison.check_san_tong_shi),
+    (FanType.YI_BAN_GAO, _comparison.check_yi_ban_gao),
+    (FanType.LIAN_BA_DUI, _special.check_lian_ba_dui),
+    (FanType.BA_XIAO_DUI, _special.check_ba_xiao_dui),
+    (FanType.CHUAN_TONG_MAJIANG, _special.check_chuan_tong_majiang),
+]
+
+try:
+    from fan_calculator import fan_special_winning as _special_winning
+    FAN_CHECKERS += [
+        (FanType.BA_XIAN_GUO_HAI, _special_winning.check_ba_xian_guo_hai),
+        (FanType.SI_XIAN_GUO_HAI, _special_winning.check_si_xian_guo_hai),
+        (FanType.TIAN_LONG, _special_winning.check_tian_long),
+        (FanType.DI_LONG, _special_winning.check_di_long),
+        (FanType.SHI_SAN_YAO, _special_winning.check_shi_san_yao),
+    ]
+except ImportError:
+    pass  # 如果模块不可用，跳过
+
+FAN_CHECKERS += [
+    (FanType.TIAN_HU, _context.check_tian_hu),
+    (FanType.HAI_DI_LAO_YUE, _context.check_hai_di_lao_yue),
+    (FanType.GANG_SHANG_KAI_HUA, _context.check_gang_shang_kai_hua),
+    (FanType.QIANG_GANG, _context.check_qiang_gang),
+    (FanType.BU_QIU_REN, _context.check_bu_qiu_ren),
+    (FanType.QUAN_QIU_REN, _context.check_quan_qiu_ren),
+    (FanType.AN_KE, _context.check_an_ke),
+    (FanType.GANG, _context.check_gang),
+    (FanType.MEN_QING, _context.check_men_qing),
+    (FanType.MING_KE, _context.check_ming_ke),
+    (FanType.TING_FU_HAO, _context.check_ting_fu_hao),
+]
+
+# 可以叠加的番种：每组最多一次的，和每张牌（每对）最多一次的
+_COUNTED_PER_GROUP = {FanType.CI_FANG, FanType.AN_KE, FanType.MING_KE, FanType.GANG}
+_COUNTED_PER_TILE = {FanType.BAO_PAI, FanType.YANG_YANG}
+
+# 检查顺序：先检查可以叠加的番种（检查前只能按牌数估计它们的番数，上界很松），
+# 其余按番值从大到小。下面的表都按检查顺序中的位置索引（FanType 的哈希较慢）
+_ORDER = sorted(FAN_CHECKERS, key=lambda item: (
+    item[0] not in _COUNTED_PER_GROUP | _COUNTED_PER_TILE, -item[0].fan_value))
+_POSITION = {fan_type: i for i, (fan_type, _) in enumerate(_ORDER)}
+
+# FanCalculator.calculate 的顺序中每个番种的位置
+_CALCULATE_ORDER = [(_POSITION[fan_type], check) for fan_type, check in FAN_CHECKERS]
+
+# _REST_FAN[i]：第 i 个及以后的不可叠加番种的番值之和
+_REST_FAN = [0] * (len(_ORDER) + 1)
+for _i in range(len(_ORDER) - 1, -1, -1):
+    _fan_type = _ORDER[_i][0]
+    _REST_FAN[_i] = _REST_FAN[_i + 1] + (
+        0 if _fan_type in _COUNTED_PER_GROUP | _COUNTED_PER_TILE else _fan_type.fan_value)
+
+# _EXCLUDES[i]：第 i 个番种（直接或间接）排除的番种的位置
+_EXCLUDES = [tuple(_POSITION[lower] for lower in fan_types_in_mask(EXCLUSION_MASKS[FAN_TYPES.index(fan_type)])
+                   if lower in _POSITION)
+             for fan_type, _ in _ORDER]
+
+# _LAST_EXCLUDER[i]：能排除第 i 个番种的番种中最后检查的位置（没有时为-1），
+# 检查过这个位置后，第 i 个番种就不会再被排除
+_LAST_EXCLUDER = [max((j for j, lowers in enumerate(_EXCLUDES) if i in lowers), default=-1)
+                  for i in range(len(_ORDER))]
+
+_N_COUNTED = len(_COUNTED_PER_GROUP | _COUNTED_PER_TILE)
+_WU_FAN_HU = FanType.WU_FAN_HU.fan_value
+
+
+def finalize_fans(all_fans: FanResults) -> FanResults:
+    """
+    由检查出的所有番种得到最终结果（FanCalculator.calculate 的最后几步）
+    
+    参数：
+        all_fans: 按 FanCalculator.calculate 的顺序检查出的番种
+    
+    返回：
+        FanResults对象
+    """
+    # 7. 应用不重复规则
+    final_fans = apply_exclusion_rules(all_fans)
+    
+    # 8. 检查无番胡
+    # 如果没有任何番种，则为无番胡（8番）
+    if len(final_fans.results) == 0:
+        final_fans.add(FanResult(FanType.WU_FAN_HU))
+    
+    # 9. 按番值排序
+    final_fans.sort_by_value()
+    
+    return final_fans
+
+
+class FanThreshold:
+    """
+    起胡判定的结果
+
+    属性：
+        reached: 总番数是否达到起胡番数
+        lower_bound / upper_bound: 停止时总番数的下界和上界
+        checked: 实际检查了多少个番种
+        fan_results: 完整的番种明细（第一次访问时计算）
+    """
+
+    def __init__(self, hand, reached, lower_bound, upper_bound, results, checked):
+        self.hand = hand
+        self.reached = reached
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.checked = checked
+        self._results = results  # 按检查顺序，前 checked 个是检查结果（FanResult或None）
+
+    def __bool__(self):
+        return self.reached
+
+    @cached_property
+    def fan_results(self) -> FanResults:
+        """完整的番种明细（已经检查过的番种不再重复检查）"""
+        all_fans = FanResults()
+        for i, check in _CALCULATE_ORDER:
+            fan = self._results[i] if i < self.checked else check(self.hand)
+            if fan:
+                all_fans.add(fan)
+        return finalize_fans(all_fans)
+
+    def __repr__(self):
+        return (f"FanThreshold(reached={self.reached}, "
+                f"bounds=[{self.lower_bound}, {self.upper_bound}], checked={self.checked})")
+
+
+def evaluate_threshold(hand: Hand, min_fan: int = 8) -> FanThreshold:
+    """
+    判断总番数是否达到起胡番数（结果确定后就不再检查其余番种）
+
+    结果与 FanCalculator.calculate(hand).get_total_fan() >= min_fan 相同
+
+    参数：
+        hand: Hand对象（已经胡牌的手牌）
+        min_fan: 起胡番数
+
+    返回：
+        FanThreshold对象
+    """
+    # 可以叠加的番种在这手牌中最多能贡献的番数
+    n_groups = len(hand.hand_groups) + sum(
+        1 for group in hand.melded_groups if group.group_type != 'single_gang')
+    if not hand.hand_groups:
+        n_groups += len(hand.hand_tiles) // 2
+    n_tiles = len(get_all_tiles_for_fan(hand, include_single_gang=True))
+    max_fans = [fan_type.fan_value * (n_groups if fan_type in _COUNTED_PER_GROUP else n_tiles)
+                for fan_type, _ in _ORDER[:_N_COUNTED]]
+    counted_max = sum(max_fans)
+
+    n = len(_ORDER)
+    results = [None] * n
+    found = []        # 已经找到的番种的位置
+    found_total = 0   # 已经找到的番数（应用不重复规则后）
+    excluded = set()
+
+    for i in range(n + 1):
+        # 检查完前 i 个番种：上界 = 已找到的 + 还没检查的最多能贡献的
+        rest = _REST_FAN[i] + counted_max
+        upper = found_total + rest if found else max(rest, _WU_FAN_HU)
+        if i == n or upper < min_fan or found_total >= min_fan:
+            # 下界只计不会再被还没检查的番种排除的番种
+            if found:
+                lower = sum(results[j].get_total_fan() for j in found
+                            if j not in excluded and _LAST_EXCLUDER[j] < i)
+            else:
+                lower = _WU_FAN_HU if i == n else 0
+            if i == n:
+                return FanThreshold(hand, lower >= min_fan, lower, lower, results, n)
+            if upper < min_fan or lower >= min_fan:
+                return FanThreshold(hand, lower >= min_fan, lower, upper, results, i)
+
+        fan = results[i] = _ORDER[i][1](hand)
+        if i < _N_COUNTED:
+            counted_max -= max_fans[i]
+        if fan:
+            found.append(i)
+            excluded.update(_EXCLUDES[i])
+            found_total = sum(results[j].get_total_fan() for j in found if j not in excluded)
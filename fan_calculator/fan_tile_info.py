@@ -10,6 +10,7 @@ from fan_calculator.fan_base import (
     FanType, FanResult, FanResults,
     get_tile_count, get_all_tiles_for_fan, TILE_COUNTS
 )
+from fan_calculator.fan_features import group_features
 
 
 def check_ping_hu(hand: Hand) -> Optional[FanResult]:
@@ -84,6 +85,12 @@ def check_quan_dai_cai(hand: Hand) -> Optional[FanResult]:
     
     # 检查每一组是否都有张数=2的牌
     for group in hand.hand_groups:
+        # 没有万用牌的组直接查表
+        if not any(tile.is_joker_used for tile in group):
+            if not group_features(group).has_rare:
+                return None
+            continue
+        
         has_rare_tile = False
         for tile in group:
             # 不计算万用牌
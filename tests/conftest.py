@@ -0,0 +1,16 @@
+"""
+测试公共配置
+"""
+
+import pytest
+
+from calculator_base.formula_table import CACHE_DIR_ENV
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_cache_dir(tmp_path_factory):
+    """磁盘缓存写到临时目录，不读写开发者主目录下的缓存"""
+    mp = pytest.MonkeyPatch()
+    mp.setenv(CACHE_DIR_ENV, str(tmp_path_factory.mktemp("suanshu_cache")))
+    yield
+    mp.undo()
@@ -5,7 +5,7 @@
 
 import pytest
 from calculator_base.mahjong_checker import ArithmeticMahjong
-from calculator_base.parser import parse_hand, format_hand
+from calculator_base.parser import parse_hand, format_hand, tile_sort_key
 
 
 # ============================================================
@@ -75,6 +75,47 @@ class TestParseHand:
         hand = parse_hand(joker_input)
         assert hand == [expected]
 
+    def test_tokenize_complex(self):
+        """测试复杂模式分词：全角括号、逗号、结构字符"""
+        from calculator_base.parser import _tokenize_complex
+
+        assert _tokenize_complex("（11d 2）【+】，3/4|5｛自摸｝") == [
+            '(', '11d', '2', ')', '[', '+', ']', '3', '/', '4', '|', '5', '{', '自摸', '}']
+        # 全角空格不是分隔符，只去掉两端的
+        assert _tokenize_complex("1\u30002 \u30003") == ['1\u30002', '3']
+
+    def test_tile_token_table_matches_slow_path(self):
+        """查表解析与逐个解析的结果相同"""
+        from calculator_base.parser import (
+            _TILE_TOKEN_TABLE, _parse_tile_token, _parse_tile_token_slow)
+
+        for token, parsed in _TILE_TOKEN_TABLE.items():
+            assert parsed == _parse_tile_token_slow(token)
+        assert _parse_tile_token("60dw") == (60, True, True)
+        with pytest.raises(ValueError):
+            _parse_tile_token("abc")
+
+    def test_parse_cache(self):
+        """测试解析缓存：命中计数、返回副本"""
+        from calculator_base.parser import (
+            parse_mode2_check_win, enable_parse_cache, disable_parse_cache, parse_cache_info)
+
+        hand_str = "(11d) (2 2 2 2w) (3 + 10 13d) 5 7 wp 9 5 14 + [+]"
+        enable_parse_cache(maxsize=8)
+        try:
+            first = parse_mode2_check_win(hand_str)
+            first.hand_tiles[0].value = 99
+            first.melded_groups.clear()
+            second = parse_mode2_check_win(" " + hand_str)
+            info = parse_cache_info()
+            assert (info['hits'], info['misses'], info['size']) == (1, 1, 1)
+            assert second.hand_tiles[0].value == 5
+            assert len(second.melded_groups) == 3
+            assert second.winning_tile is second.hand_tiles[-1]
+        finally:
+            disable_parse_cache()
+        assert not parse_cache_info()['enabled']
+
     def test_format_hand(self):
         """测试手牌格式化输出"""
         hand = [1, '+', 9, 10, 2, '×', 3, 6, 5, 5, 5, 5, '∧', '∧', '∧', '∧']
@@ -115,7 +156,24 @@ class TestTraditionalMahjongWin:
     # TODO: test_with_joker_tong - API changed, needs update
     # TODO: test_zero_as_normal_tile_in_eight_pairs - API changed, needs update
     # TODO: test_zero_as_joker_in_traditional - API changed, needs update
-    pass
+
+    def test_counting_search_matches_joker_enumeration(self):
+        """按张数搜索与枚举万用牌替换的结果相同"""
+        from calculator_base.traditional_mahjong import TraditionalMahjongChecker
+
+        checker = TraditionalMahjongChecker()
+        hands = [
+            [1, 2, 3, 4, 5, 6, 7, 7, 7, 8, 8, 8, 11, 11, 12, 12],
+            [1, 2, 0, 4, 5, 6, 7, 7, 7, 8, 8, 8, 11, 11, 12, 'joker_tong'],
+            [1, 2, 0, 4, 5, 6, 7, 7, 7, 8, 8, 8, 11, 11, 12, 'joker_symbol'],
+            ['+', '+', '+', 'joker_symbol', 10, 10, 10, 0, 21, 32, 35, 36, 36, 19, 19, 'joker_wan'],
+        ]
+        for hand in hands:
+            expected, _ = checker.can_win_traditional(hand)
+            result, groups = checker.can_win_traditional_counting(hand)
+            assert result == expected
+            if result:
+                assert len(groups) == 6
 
 
 # ============================================================
@@ -169,3 +227,1023 @@ class TestRuleModes:
     # TODO: test_standard_rule_rejects_sum_lt_10 - API changed, needs update
     # TODO: test_newbie_rule_accepts_sum_lt_10 - API changed, needs update
     pass
+
+
+# ============================================================
+# 随机手牌生成测试 (TestHandGenerator)
+# ============================================================
+
+class TestHandGenerator:
+    """测试按牌库发牌的随机手牌生成器"""
+
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_winning_hands_respect_pool(self, use_numpy, standard_mahjong):
+        """生成的胡牌手牌能分组，且不超过牌库张数"""
+        from collections import Counter
+        from calculator_base.hand_generator import generate_hands, NUMPY_AVAILABLE
+        from calculator_base.empty_listening_checker import TILE_POOL
+
+        if use_numpy and not NUMPY_AVAILABLE:
+            pytest.skip("未安装 NumPy")
+
+        hands = generate_hands(20, size=16, seed=7, joker_rate=0.2, use_numpy=use_numpy)
+        for hand in hands:
+            assert len(hand) == 16
+            assert all(count <= TILE_POOL.get(tile, 0) for tile, count in Counter(hand).items())
+            success, _ = standard_mahjong._partition_optimized(hand)
+            assert success
+
+    def test_same_seed_same_hands(self):
+        """相同种子生成相同手牌"""
+        from calculator_base.hand_generator import generate_hands
+
+        first = generate_hands(10, size=7, seed=42, use_numpy=False)
+        second = generate_hands(10, size=7, seed=42, use_numpy=False)
+        assert first == second
+        assert all(len(hand) == 7 for hand in first)
+
+    def test_hands_with_melds(self):
+        """带鸣牌的手牌返回Hand对象"""
+        from calculator_base.hand_generator import generate_hands
+
+        hand = generate_hands(1, size=11, melds=1, seed=1, use_numpy=False)[0]
+        assert len(hand.melded_groups) == 1
+        assert len(hand.hand_tiles) == 11
+        assert hand.total_tile_count() == 15
+
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_empty_and_exhausted(self, use_numpy, monkeypatch):
+        """生成0手牌返回空结果；牌库放不下任何手牌时报错而不是死循环"""
+        from calculator_base import hand_generator
+
+        if use_numpy and not hand_generator.NUMPY_AVAILABLE:
+            pytest.skip("未安装 NumPy")
+
+        assert len(hand_generator.generate_hand_ids(0, use_numpy=use_numpy)) == 0
+        monkeypatch.setattr(hand_generator, '_pool_counts', lambda: [0] * hand_generator.NUM_TILE_IDS)
+        monkeypatch.setattr(hand_generator, '_MAX_RETRIES', 5)
+        with pytest.raises(ValueError):
+            hand_generator.generate_hand_ids(1, use_numpy=use_numpy)
+
+
+# ============================================================
+# 胡牌概率估计测试 (TestWinProbability)
+# ============================================================
+
+class TestWinProbability:
+    """测试蒙特卡洛胡牌概率估计"""
+
+    def test_estimate_is_reproducible(self):
+        """同一种子结果相同，且能胡的牌只有 ∧"""
+        from calculator_base.win_probability import estimate_win_probability
+
+        mjong = ArithmeticMahjong(require_sum_gte_10=False)
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 ^ ^ ^")
+        first = estimate_win_probability(hand, draws=10, mjong=mjong, workers=0, seed=1)
+        second = estimate_win_probability(hand, draws=10, mjong=mjong, workers=0, seed=1)
+        assert first == second
+        assert set(first['winning_tiles']) == {'∧'}
+        assert 0 < first['win_probability'] < 1
+        assert first['converged']
+
+    def test_no_tiles_left(self):
+        """能胡的牌全部可见时概率为0"""
+        from calculator_base.win_probability import estimate_win_probability
+
+        mjong = ArithmeticMahjong(require_sum_gte_10=False)
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 ^ ^ ^")
+        result = estimate_win_probability(hand, visible_tiles=['∧'], draws=10,
+                                          mjong=mjong, workers=0, seed=1)
+        assert result['win_probability'] == 0
+
+
+# ============================================================
+# 打牌建议测试 (TestDiscardAdvisor)
+# ============================================================
+
+class TestDiscardAdvisor:
+    """测试16张牌的打牌建议"""
+
+    def test_winning_hand_waits_on_discard(self, newbie_mahjong):
+        """胡牌的16张打出任意一张，都听这张牌"""
+        from calculator_base.discard_advisor import best_discards
+
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 8")
+        results = best_discards(hand, newbie_mahjong, with_fan=False)
+        assert {r['discard'] for r in results} == set(hand)
+        for r in results:
+            assert r['discard'] in r['waits']['算术麻将']
+        counts = [r['live_count'] for r in results]
+        assert counts == sorted(counts, reverse=True)
+
+    def test_fan_is_best_partition(self, newbie_mahjong):
+        """听牌的番数与 is_ready 详细信息中番数最高的分组方案相同"""
+        from calculator_base.discard_advisor import best_discards
+
+        # 第一种分组方案6番，番数最高的方案14番
+        hand = [6, '+', '+', 7, 20, 11, 27, 2, '×', 1, 15, 9, 6, 4, '+', 11]
+        for r in best_discards(hand, newbie_mahjong):
+            rest = list(hand)
+            rest.remove(r['discard'])
+            details = newbie_mahjong.is_ready(rest, return_details=True)[1]['算术麻将']['details']
+            for tile in r['waits']['算术麻将']:
+                fan_info = details[tile]['fan_info']
+                assert r['fan_by_tile'][tile] >= fan_info['total_fan']
+
+    def test_shared_waits_match_partition(self, standard_mahjong):
+        """一次搜索得到的听牌与逐张尝试分组的结果相同"""
+        from calculator_base.discard_advisor import SharedPartitioner
+        from calculator_base.constants import ALL_TILES
+
+        partitioner = SharedPartitioner(standard_mahjong)
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 ^ joker_tiao ^")
+        expected = {tile for tile in ALL_TILES | set(range(20, 50))
+                    if standard_mahjong._partition_optimized(hand + [tile])[0]}
+        assert set(partitioner.waits(hand)) == expected
+
+
+# ============================================================
+# 向听数测试 (TestShanten)
+# ============================================================
+
+class TestShanten:
+    """测试算术麻将向听数"""
+
+    def test_ready_and_winning_hands(self):
+        """胡牌为-1，听牌为0，换掉一张有用的牌后向听数加1"""
+        from calculator_base.shanten import calculate_shanten
+
+        winning = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 8")
+        assert calculate_shanten(winning, require_sum_gte_10=False) == -1
+        assert calculate_shanten(winning[:-1], require_sum_gte_10=False) == 0
+        assert calculate_shanten(parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 48"),
+                                 require_sum_gte_10=False) == 0
+
+    def test_shanten_zero_iff_ready(self, standard_mahjong):
+        """向听数为0与分组搜索得到的听牌一致"""
+        from calculator_base.shanten import calculate_shanten
+        from calculator_base.discard_advisor import SharedPartitioner
+        from calculator_base.hand_generator import deal_random_hands
+        from calculator_base.constants import ID_TO_TILE
+
+        partitioner = SharedPartitioner(standard_mahjong)
+        for row in deal_random_hands(20, size=15, seed=3, use_numpy=False):
+            hand = [ID_TO_TILE[i] for i in row]
+            shanten = calculate_shanten(hand)
+            assert 0 <= shanten <= 4
+            assert (shanten == 0) == bool(partitioner.waits(hand))
+
+    def test_generated_hands_and_many_copies(self):
+        """生成的胡牌/听牌手牌为-1/0；同一种牌有8张以上时也不出错"""
+        from calculator_base.shanten import calculate_shanten
+        from calculator_base.hand_generator import generate_hands
+
+        for hand in generate_hands(20, size=16, seed=5, use_numpy=False):
+            assert calculate_shanten(hand) == -1
+            assert calculate_shanten(hand[:-1]) == 0
+        for hand in generate_hands(10, size=8, seed=6, use_numpy=False):
+            for tile in (5, '+'):
+                winning = hand + [tile] * 8
+                assert calculate_shanten(winning) == -1
+                assert calculate_shanten(winning[1:]) == 0
+
+        assert calculate_shanten(parse_hand("5 5 5 5 5 5 5 5 1 + 9 10 2 ^ 3 8")) == -1
+        assert calculate_shanten(parse_hand("+ + + + + + + + 5 5 5 5 5 5 5 5")) == -1
+
+
+# ============================================================
+# 补全索引测试 (TestGroupCompletionIndex)
+# ============================================================
+
+class TestGroupCompletionIndex:
+    """测试3张牌补全索引"""
+
+    @pytest.mark.parametrize("partial", [
+        (1, 9, 10), ('+', 1, 9), ('joker_symbol', 2, 3), (5, 5, 5),
+        ('joker_tiao', 'joker_tiao', 'joker_tiao'), ('×', 'joker_wan', 7),
+    ])
+    def test_index_matches_is_valid_group(self, standard_mahjong, partial):
+        """索引与 is_valid_group 的判定相同"""
+        from calculator_base.formula_table import get_group_completion_index, formula_key
+        from calculator_base.constants import ID_TO_TILE
+
+        index = get_group_completion_index(True)
+        expected = {tile for tile in ID_TO_TILE
+                    if standard_mahjong.is_valid_group(list(partial) + [tile])}
+        assert index[formula_key(partial)] == expected
+
+    def test_disk_cache(self, tmp_path, monkeypatch):
+        """索引写入磁盘后可以直接读取"""
+        from calculator_base import formula_table
+
+        monkeypatch.setenv(formula_table.CACHE_DIR_ENV, str(tmp_path))
+        monkeypatch.setattr(formula_table, '_GROUP_COMPLETION_INDEXES', {})
+        built = formula_table.get_group_completion_index(False)
+        assert list(tmp_path.iterdir())
+
+        monkeypatch.setattr(formula_table, '_GROUP_COMPLETION_INDEXES', {})
+        monkeypatch.setattr(formula_table, '_build_group_completion_index', None)
+        assert formula_table.get_group_completion_index(False) == built
+
+    def test_shared_mmap_index(self, tmp_path, monkeypatch, newbie_mahjong):
+        """内存映射的索引与字典索引相同，安装后判定器直接使用"""
+        from calculator_base import formula_table
+        from calculator_base.shared_tables import open_completion_index, use_shared_tables
+
+        index = formula_table.get_group_completion_index(False)
+        shared = open_completion_index(False, cache_dir=tmp_path)
+        assert len(shared) == len(index)
+        assert all(shared[key] == tiles for key, tiles in index.items())
+        assert shared.get((1, '+', 9)) is None
+
+        monkeypatch.setattr(formula_table, '_GROUP_COMPLETION_INDEXES', {})
+        use_shared_tables(tmp_path)
+        assert newbie_mahjong.is_ready([2, '∧', 3]) == (True, {'算术麻将': ['8', '9']})
+
+
+# ============================================================
+# 二进制编码测试 (TestHandCodec)
+# ============================================================
+
+class TestHandCodec:
+    """测试手牌二进制编码"""
+
+    def test_round_trip(self):
+        """编码再解码得到相同的手牌"""
+        from calculator_base.hand_codec import encode_hand, decode_hand, RECORD_SIZE
+        from calculator_base.parser import parse_mode1_already_won, parse_mode3_ready_with_meld
+
+        for hand in (
+            parse_mode1_already_won("(11d) (2 2 2 2w) (3 + 10 13d) 5 + 7 12w / 9 [+] 5 14 {自摸}"),
+            parse_mode3_ready_with_meld("(11d) (2 2 2 2 2 明) 5 7 wp 9 5 14 + 1 2 3"),
+        ):
+            record = encode_hand(hand)
+            assert len(record) == RECORD_SIZE
+            decoded = decode_hand(record)
+            assert repr(decoded) == repr(hand)
+            assert decoded.win_type == hand.win_type
+            assert decoded.should_win_in_mode == hand.should_win_in_mode
+
+    def test_mmap_reader(self, tmp_path):
+        """写入文件后用内存映射逐条读取"""
+        from calculator_base.hand_codec import write_hands, HandFileReader
+        from calculator_base.hand_generator import generate_hands
+
+        hands = generate_hands(20, size=8, melds=2, seed=3, joker_rate=0.2)
+        path = tmp_path / "hands.bin"
+        assert write_hands(path, hands) == 20
+
+        with HandFileReader(path) as reader:
+            assert len(reader) == 20
+            assert [repr(h) for h in reader.hands()] == [repr(h) for h in hands]
+            record = reader[-1]
+            assert len(record) == 64
+            record.release()
+
+
+# ============================================================
+# 持久化结果缓存测试 (TestResultCache)
+# ============================================================
+
+class TestResultCache:
+    """测试 can_win / is_ready 的持久化结果缓存"""
+
+    def test_results_survive_restart(self, tmp_path):
+        """缓存写入磁盘后，新的判定器直接读取"""
+        from calculator_base.result_cache import ResultCache
+
+        path = tmp_path / "results.sqlite"
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 8")
+        mjong = ArithmeticMahjong(require_sum_gte_10=False, result_cache=path)
+        expected = mjong.can_win(hand)
+        ready = mjong.is_ready([2, '∧', 3])
+        mjong.result_cache.close()
+
+        with ResultCache(path) as cache:
+            mjong = ArithmeticMahjong(require_sum_gte_10=False, result_cache=cache)
+            result = mjong.can_win(list(reversed(hand)))
+            assert result[:3] == expected[:3]
+            assert result[3]['total_fan'] == expected[3]['total_fan']
+            assert mjong.is_ready([3, 2, '∧']) == ready
+            assert (cache.hits, cache.misses) == (2, 0)
+
+    def test_eviction(self, tmp_path):
+        """超过最大条数时淘汰最久未使用的"""
+        from calculator_base.result_cache import ResultCache
+
+        with ResultCache(tmp_path / "results.sqlite", max_entries=3, batch_size=2) as cache:
+            for i in range(5):
+                cache.put(bytes([i]), i)
+            assert len(cache) == 3
+            assert cache.get(bytes([4])) == 4
+
+
+# ============================================================
+# 手牌指纹测试 (TestFingerprint)
+# ============================================================
+
+class TestFingerprint:
+    """测试手牌指纹"""
+
+    def test_order_independent(self):
+        """顺序不同的手牌指纹相同，不同的手牌指纹不同"""
+        from calculator_base.fingerprint import fingerprint, canonical_key
+
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 ^ joker_tiao ^")
+        assert fingerprint(hand) == fingerprint(list(reversed(hand)))
+        assert 0 <= fingerprint(hand) < 2 ** 64
+        assert canonical_key(hand) != canonical_key(hand[:-1] + ['+'])
+        assert canonical_key([60, 1]) == canonical_key([1, 60])
+
+    def test_hand_objects(self):
+        """Hand对象区分鸣牌、标记和胡牌，不区分顺序"""
+        from calculator_base.fingerprint import canonical_key, dedupe_hands
+        from calculator_base.parser import parse_mode2_check_win
+
+        a = parse_mode2_check_win("(11d) (2 2 2 2w) 5 7 wp 9 5 14 + [+]")
+        b = parse_mode2_check_win("(2 2 2 2w) (11d) 14 5 9 wp 7 5 + [+]")
+        c = parse_mode2_check_win("(11) (2 2 2 2w) 5 7 wp 9 5 14 + [+]")
+        assert canonical_key(a) == canonical_key(b)
+        assert canonical_key(a) != canonical_key(c)
+        assert [i for i, _ in dedupe_hands([a, b, c, a])] == [0, 2]
+
+
+# ============================================================
+# 批量判定测试 (TestBatch)
+# ============================================================
+
+class TestBatch:
+    """测试线程池批量判定"""
+
+    def test_matches_sequential(self, newbie_mahjong):
+        """多线程的结果与逐个判定相同，顺序与输入一致"""
+        from calculator_base.batch import batch_can_win, batch_is_ready
+
+        winning = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 8")
+        hands = [winning[:-1], parse_hand("2 ^ 3"), parse_hand("1 + 1"), parse_hand("5 5 5")]
+        expected = [newbie_mahjong.is_ready(hand) for hand in hands]
+        assert batch_is_ready(hands, newbie_mahjong, max_workers=4) == expected
+        results = batch_can_win([winning, winning[:-1] + [7]], newbie_mahjong, max_workers=2)
+        assert [r[:2] for r in results] == [newbie_mahjong.can_win(winning)[:2], (False, [])]
+
+    def test_unknown_method(self):
+        """只支持 can_win / is_ready"""
+        from calculator_base.batch import run_batch
+
+        with pytest.raises(ValueError):
+            run_batch('calculate_fan', [])
+
+
+# ============================================================
+# asyncio接口测试 (TestAsyncChecker)
+# ============================================================
+
+class TestAsyncChecker:
+    """测试异步接口的请求合并与取消"""
+
+    def test_coalesce_identical_requests(self, newbie_mahjong):
+        """顺序不同的相同手牌只计算一次"""
+        import asyncio
+        from calculator_base.async_checker import AsyncArithmeticMahjong
+
+        checker = AsyncArithmeticMahjong(newbie_mahjong)
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3")
+
+        async def run():
+            return await asyncio.gather(
+                checker.ais_ready(hand), checker.ais_ready(list(reversed(hand))),
+                checker.ais_ready(hand[:3]))
+
+        first, second, third = asyncio.run(run())
+        assert first is second
+        assert first == newbie_mahjong.is_ready(hand)
+        assert third == newbie_mahjong.is_ready(hand[:3])
+        assert checker.coalesced == 1
+        assert checker.inflight == 0
+
+    def test_cancel_last_waiter_cancels_work(self, newbie_mahjong):
+        """所有等待者都取消后，排队中的计算被撤销"""
+        import asyncio
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from calculator_base.async_checker import AsyncArithmeticMahjong
+
+        calls = []
+        newbie_mahjong.is_ready = lambda hand, return_details=False: calls.append(hand)
+        release = threading.Event()
+
+        async def run(pool):
+            checker = AsyncArithmeticMahjong(newbie_mahjong, executor=pool)
+            loop = asyncio.get_running_loop()
+            blocker = loop.run_in_executor(pool, release.wait)  # 占住唯一的线程
+            task = asyncio.ensure_future(checker.ais_ready(parse_hand("2 ^ 3")))
+            await asyncio.sleep(0.01)
+            assert checker.inflight == 1
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert checker.inflight == 0
+            release.set()
+            await blocker
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            asyncio.run(run(pool))
+        assert calls == []
+
+
+# ============================================================
+# 搜索预算测试 (TestSearchBudget)
+# ============================================================
+
+class TestSearchBudget:
+    """测试带预算的搜索"""
+
+    def test_truncated_search_returns_partial_waits(self, newbie_mahjong):
+        """预算用完时返回已经找到的听牌，预算足够时结果与不限预算相同"""
+        from calculator_base.search_budget import SearchBudget
+
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3")
+        full = newbie_mahjong.is_ready(hand, return_details=True)[1]['算术麻将']['tiles']
+
+        budget = SearchBudget(max_nodes=10)
+        _, info = newbie_mahjong.is_ready(hand, return_details=True, budget=budget)
+        assert budget.truncated
+        assert set(info.get('算术麻将', {}).get('tiles', [])) <= set(full)
+
+        budget = SearchBudget(max_nodes=10 ** 6)
+        _, info = newbie_mahjong.is_ready(hand, return_details=True, budget=budget)
+        assert not budget.truncated
+        assert info['算术麻将']['tiles'] == full
+
+    def test_best_partition_respects_budget(self, newbie_mahjong):
+        """选番数最高的分组方案也受预算限制，用完时保留听牌搜索找到的方案"""
+        from calculator_base.search_budget import SearchBudget
+
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3")
+        budget = SearchBudget()
+        waits = [wait for win_type, _, wait in newbie_mahjong.iter_ready(hand, budget=budget)
+                 if win_type == '算术麻将']
+        assert waits and not budget.truncated
+        budget.max_nodes = budget.nodes
+        for wait in waits:
+            assert wait.groups
+            assert newbie_mahjong.can_win(hand + [wait.tile])[0]
+        assert budget.truncated
+
+        for max_nodes in range(20, 320, 20):
+            budget = SearchBudget(max_nodes=max_nodes)
+            _, info = newbie_mahjong.is_ready(hand, return_details=True, budget=budget)
+            for detail in info.get('算术麻将', {}).get('details', {}).values():
+                assert detail['groups']
+
+    def test_truncated_can_win_not_cached(self, tmp_path):
+        """预算用完的结果不写入结果缓存"""
+        from calculator_base.search_budget import SearchBudget
+
+        mjong = ArithmeticMahjong(require_sum_gte_10=False, result_cache=tmp_path / "r.sqlite")
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 8")
+        budget = SearchBudget(max_nodes=1)
+        assert mjong.can_win(hand, budget=budget)[0] is False
+        assert budget.truncated
+        assert mjong.can_win(hand)[0] is True
+        mjong.result_cache.close()
+
+
+# ============================================================
+# 逐个产出听牌测试 (TestIterReady)
+# ============================================================
+
+class TestIterReady:
+    """测试逐个产出听牌的生成器"""
+
+    @pytest.mark.parametrize("hand_str", [
+        "1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3",
+        "1 1 2 2 3 3 4 4 5 5 6 6 7 7 8",
+        "2 ^ 3",
+    ])
+    def test_same_waits_as_is_ready(self, newbie_mahjong, hand_str):
+        """产出的听牌与 is_ready 相同"""
+        hand = parse_hand(hand_str)
+        found = {}
+        for win_type, tile, _ in newbie_mahjong.iter_ready(hand):
+            found.setdefault(win_type, set()).add(tile)
+        _, info = newbie_mahjong.is_ready(hand, return_details=True)
+        assert found == {win_type: set(v['tiles']) for win_type, v in info.items()}
+
+    def test_lazy_details(self, newbie_mahjong):
+        """详细信息在访问时才计算，与 is_ready 的详细信息相同"""
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3")
+        calls = []
+        calculate_fan = newbie_mahjong._calculate_fan
+        newbie_mahjong._calculate_fan = lambda *args: calls.append(args) or calculate_fan(*args)
+
+        win_type, tile, details = next(newbie_mahjong.iter_ready(hand))
+        assert win_type == '算术麻将' and calls == []
+        expected = newbie_mahjong.is_ready(hand, return_details=True)[1]['算术麻将']['details'][tile]
+        calls.clear()
+        assert details.groups == expected['groups']
+        assert details.fan_info['total_fan'] == expected['fan_info']['total_fan']
+        computed = len(calls)
+        assert computed > 0
+        # 再次访问不重新计算
+        assert details.groups == expected['groups']
+        assert details.fan_info['total_fan'] == expected['fan_info']['total_fan']
+        assert len(calls) == computed
+
+
+# ============================================================
+# 精确覆盖分组测试 (TestExactCover)
+# ============================================================
+
+class TestExactCover:
+    """测试精确覆盖分组引擎"""
+
+    def test_agrees_with_recursive_search(self, standard_mahjong):
+        """能否分组与递归分组搜索相同，找到的分组都有效"""
+        from calculator_base.exact_cover import find_partition
+        from calculator_base.hand_generator import deal_random_hands
+        from calculator_base.constants import ID_TO_TILE
+
+        for row in deal_random_hands(30, size=16, seed=5, use_numpy=False):
+            hand = [ID_TO_TILE[i] for i in row]
+            expected, _ = standard_mahjong._try_partition_with_pruning(
+                sorted(hand, key=tile_sort_key), [])
+            success, groups = find_partition(hand)
+            assert success == expected
+            assert all(standard_mahjong.is_valid_group(group) for group in groups)
+
+    def test_best_partition_bounded(self, standard_mahjong, monkeypatch):
+        """选番数最高的分组方案时最多计算 MAX_FAN_PARTITIONS 种方案的番数"""
+        hand = [1, '×', 0, 0, '+', 'joker_tiao', 10, 'joker_tong', 6, 4, 8, 12, 49, '+', 49, '∧']
+        assert len(list(standard_mahjong._iter_arith_partitions(hand))) > standard_mahjong.MAX_FAN_PARTITIONS
+
+        calls = []
+        calculate_fan = standard_mahjong._calculate_fan
+        monkeypatch.setattr(standard_mahjong, '_calculate_fan',
+                            lambda *args: calls.append(args) or calculate_fan(*args))
+        groups, _ = standard_mahjong._best_arith_partition(hand, '自摸')
+        assert groups
+        assert len(calls) == standard_mahjong.MAX_FAN_PARTITIONS
+
+    def test_enumerates_each_partition_once(self):
+        """所有分组方案各出现一次，也适用于12张"""
+        from calculator_base.exact_cover import iter_partitions
+
+        hand = parse_hand("1 + 9 10 2 x 3 6 0 0 0 0 2 ^ 3 joker_tiao")
+        partitions = [sorted(map(repr, groups)) for groups in iter_partitions(hand, False)]
+        assert len(partitions) == 3
+        assert len({tuple(p) for p in partitions}) == 3
+
+        assert len(list(iter_partitions(parse_hand("5 5 5 5 5 5 5 5 1 + 9 10"), False))) == 1
+        assert list(iter_partitions([1, 2, 3, 4], False)) == []
+
+
+# ============================================================
+# 分组前筛查测试 (TestPrefilter)
+# ============================================================
+
+class TestPrefilter:
+    """测试按张数的快速筛查"""
+
+    def test_reasons(self):
+        """符号张数不对、数字牌没有搭档时排除，能胡的牌不被排除"""
+        from calculator_base.prefilter import prefilter, REJECT_SYMBOLS, REJECT_PARTNERS
+
+        assert prefilter(parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 8"), False) is None
+        assert prefilter(parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 3 3 8"), False) == REJECT_SYMBOLS
+        assert prefilter(parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 47"), False) == REJECT_PARTNERS
+        assert prefilter(parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 joker_wan"), False) is None
+
+    def test_never_rejects_winning_hands(self, standard_mahjong):
+        """筛查只排除确实不能分组的牌，并记录命中率"""
+        from calculator_base.prefilter import prefilter
+        from calculator_base.exact_cover import find_partition
+        from calculator_base.hand_generator import deal_random_hands
+        from calculator_base.constants import ID_TO_TILE
+
+        for row in deal_random_hands(100, size=16, seed=7, use_numpy=False):
+            hand = [ID_TO_TILE[i] for i in row]
+            if prefilter(hand) is not None:
+                assert not find_partition(hand)[0]
+
+        standard_mahjong.prefilter_stats.reset()
+        for row in deal_random_hands(10, size=11, seed=1, use_numpy=False):
+            standard_mahjong.is_ready([ID_TO_TILE[i] for i in row])
+        stats = standard_mahjong.prefilter_stats
+        assert stats.checked > 0 and 0 < stats.hit_rate < 1
+
+    def test_stats_thread_safe(self):
+        """多线程同时记录时不丢失计数，且可以序列化（传给进程池）"""
+        import pickle
+        from concurrent.futures import ThreadPoolExecutor
+        from calculator_base.prefilter import PrefilterStats, REJECT_SYMBOLS
+
+        stats = PrefilterStats()
+
+        def record(_):
+            for _ in range(1000):
+                stats.record(REJECT_SYMBOLS)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(record, range(8)))
+        assert stats.checked == 8000 and stats.rejected[REJECT_SYMBOLS] == 8000
+        restored = pickle.loads(pickle.dumps(stats))
+        restored.record(None)
+        assert restored.as_dict()['checked'] == 8001
+
+
+# ============================================================
+# 两种规则一起判定测试 (TestMultiRule)
+# ============================================================
+
+class TestMultiRule:
+    """测试新手、进阶两种规则共用一次搜索"""
+
+    def test_rule_tags(self):
+        """和小于10的加法只在新手规则下有效"""
+        from calculator_base.formula_table import get_group_rule_index, RULE_NEWBIE, ALL_RULES
+
+        index = get_group_rule_index()
+        assert index[('+', 1, 2)][3] == RULE_NEWBIE
+        assert index[('+', 1, 9)][10] == ALL_RULES
+        assert 7 not in index[('+', 1, 2)]
+
+    def test_same_results_as_separate_checkers(self, standard_mahjong, newbie_mahjong):
+        """结果与两个单独的判定器相同（分组方案中组的顺序可以不同）"""
+        from calculator_base.multi_rule import MultiRuleMahjong
+
+        multi = MultiRuleMahjong()
+        separate = {True: standard_mahjong, False: newbie_mahjong}
+        for hand_str in ["1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 8",
+                         "1 + 2 3 2 x 3 6 5 5 5 5 2 ^ 3 8",
+                         "1 + 2 3 2 x 3 6 5 5 5 5 2 ^ 3 9"]:
+            hand = parse_hand(hand_str)
+            for rule, (success, groups, win_type, _) in multi.can_win(hand).items():
+                expected = separate[rule].can_win(hand)
+                assert (success, win_type) == expected[0::2][:2]
+                assert sorted(map(repr, groups)) == sorted(map(repr, expected[1]))
+            assert multi.is_ready(hand[:-1]) == {rule: mjong.is_ready(hand[:-1])
+                                                 for rule, mjong in separate.items()}
+        assert multi.shared._first or multi.shared._all
+
+    def test_waits_searched_once(self, standard_mahjong, newbie_mahjong):
+        """逐张试听牌只做一次，后判定的规则不再筛查候选牌"""
+        from calculator_base.multi_rule import MultiRuleMahjong
+        from calculator_base.hand_generator import generate_hands
+
+        multi = MultiRuleMahjong()
+        separate = {True: standard_mahjong, False: newbie_mahjong}
+        for hand in generate_hands(10, size=11, seed=3, joker_rate=0.1, require_sum_gte_10=False):
+            assert multi.is_ready(hand) == {rule: mjong.is_ready(hand)
+                                            for rule, mjong in separate.items()}
+        assert multi.checkers[True].prefilter_stats.checked > 0
+        assert multi.checkers[False].prefilter_stats.checked == 0
+
+
+# ============================================================
+# 起胡判定模式测试 (TestFanThreshold)
+# ============================================================
+
+class TestFanThreshold:
+    """测试只判断是否达到起胡番数的番数计算"""
+
+    HANDS = [
+        "(2 2 2 2w) (3 + 10 13d) 5 + 7 12w / 9 [+] 5 14 {自摸}",
+        "1 + 9 10 / 2 x 3 6 / 5 5 5 5 / 2 ^ 3 [8]",
+        "1 + 2 3 / 2 x 3 6 / 5 5 5 5 / 2 ^ 3 [8]",
+    ]
+
+    def test_matches_full_calculation(self):
+        """结果与完整计算的总番数比较相同，停止时的上下界包含总番数"""
+        from calculator_base.parser import parse_mode1_already_won
+        from fan_calculator.fan_calculator import FanCalculator, calculate_fan
+
+        for hand_str in self.HANDS:
+            hand = parse_mode1_already_won(hand_str)
+            total = calculate_fan(hand).get_total_fan()
+            for min_fan in (0, 8, 16, 48, 88, 200):
+                decision = FanCalculator(min_fan).evaluate_threshold(hand)
+                assert decision.reached == (total >= min_fan)
+                assert decision.lower_bound <= total <= decision.upper_bound
+
+    def test_stops_early_and_details_lazy(self):
+        """起胡番数为0时不检查任何番种，番种明细在访问时才计算"""
+        from calculator_base.parser import parse_mode1_already_won
+        from fan_calculator.fan_calculator import FanCalculator, calculate_fan
+
+        hand = parse_mode1_already_won(self.HANDS[1])
+        decision = FanCalculator(0).evaluate_threshold(hand)
+        assert decision.reached and decision.checked == 0
+        assert 'fan_results' not in decision.__dict__
+        assert decision.fan_results.get_total_fan() == calculate_fan(hand).get_total_fan()
+
+    def test_can_win_unchanged(self, standard_mahjong):
+        """can_win 只计算达到起胡番数的胡法，结果不变"""
+        hand = parse_hand("1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3 8")
+        success, groups, win_type, fan_info = standard_mahjong.can_win(hand)
+        assert success == (fan_info is not None and fan_info['total_fan'] >= 8)
+        if success:
+            assert fan_info['fan_result'].get_total_fan() == fan_info['total_fan']
+
+
+# ============================================================
+# 番种位掩码测试 (TestFanMasks)
+# ============================================================
+
+class TestFanMasks:
+    """测试按位掩码应用不重复规则"""
+
+    def test_transitive_exclusions(self):
+        """排除关系按传递闭包预先计算"""
+        from fan_calculator.fan_base import FanType, fan_mask, apply_exclusion_mask
+
+        present = fan_mask([FanType.DA_SAN_YUAN, FanType.AN_KE, FanType.PING_HU])
+        assert apply_exclusion_mask(present) == fan_mask([FanType.DA_SAN_YUAN, FanType.PING_HU])
+        present = fan_mask([FanType.SAN_TONG_SHI, FanType.LIANG_BAN_GAO, FanType.MEN_QING])
+        assert apply_exclusion_mask(present) == fan_mask([FanType.SAN_TONG_SHI, FanType.MEN_QING])
+
+    def test_apply_exclusion_rules(self):
+        """结果和被排除的番种及原因不变"""
+        from fan_calculator.fan_base import FanType, FanResult, FanResults, apply_exclusion_rules
+
+        fans = FanResults()
+        for fan_type in (FanType.SI_KE_ZI, FanType.SAN_KE_ZI, FanType.AN_KE, FanType.PING_HU):
+            fans.add(FanResult(fan_type))
+        final = apply_exclusion_rules(fans)
+        assert [r.fan_type for r in final.results] == [FanType.SI_KE_ZI, FanType.PING_HU]
+        assert final.excluded == [(FanType.SAN_KE_ZI, "被四刻子包含"), (FanType.AN_KE, "被四刻子包含"),
+                                  (FanType.AN_KE, "被三刻子包含")]
+
+    def test_from_mask(self):
+        """由位掩码和数量创建的结果在访问时生成番种明细"""
+        from fan_calculator.fan_base import FanType, FanResults
+
+        fans = FanResults.from_mask(FanType.PING_HU.bit | FanType.BAO_PAI.bit, {FanType.BAO_PAI: 3})
+        assert fans.mask == FanType.PING_HU.bit | FanType.BAO_PAI.bit
+        assert fans.get_total_fan() == 4 + 2 * 3
+        assert [r.fan_type for r in fans.results] == [FanType.PING_HU, FanType.BAO_PAI]
+
+
+# ============================================================
+# 组的特征表测试 (TestFanFeatures)
+# ============================================================
+
+class TestFanFeatures:
+    """测试预先计算的算式特征"""
+
+    def test_formula_features(self):
+        """合法算式的特征与牌的顺序无关"""
+        from fan_calculator.fan_features import group_features
+
+        features = group_features(['+', 1, 9, 10])
+        assert features == group_features([9, 1, 10, '+'])
+        assert features.key == ('+', 1, 9, 10)
+        assert features.operator == '+' and features.symbol_count == 1
+        assert features.has_rare and features.tens == 1 and not features.is_kezi
+
+    def test_power_order(self):
+        """有多种读法的次方按牌的顺序标准化"""
+        from fan_calculator.fan_features import group_features
+
+        assert group_features([2, '∧', 4, 16]).key == ('∧', 2, 4, 16)
+        assert group_features([4, '∧', 2, 16]).key == ('∧', 4, 2, 16)
+        assert group_features([0, '∧', 1, 0]).key == ('∧', 0, 1, 0)
+        assert group_features([0, '∧', 0, 1]).key == ('∧', 0, 0, 1)
+
+    def test_kezi(self):
+        """刻子不是算式"""
+        from calculator_base.hand_structure import Tile
+        from fan_calculator.fan_comparison import normalize_formula
+        from fan_calculator.fan_formula_based import is_formula_group, is_kezi_group
+
+        group = [Tile('+') for _ in range(4)]
+        assert is_kezi_group(group) and not is_formula_group(group)
+        assert normalize_formula(group) is None
+
+
+# ============================================================
+# 数字性质位掩码测试 (TestNumberMasks)
+# ============================================================
+
+class TestNumberMasks:
+    """测试按数字性质位判断全X类番种"""
+
+    def test_number_properties(self):
+        """性质位表与逐个判断的结果相同"""
+        from fan_calculator.fan_base import (
+            NUMBER_PROPERTIES, NUM_COMPOSITE, NUM_POWER_OF_2, is_composite, is_power_of_2,
+        )
+
+        for n in range(50):
+            assert bool(NUMBER_PROPERTIES[n] & NUM_COMPOSITE) == is_composite(n)
+            assert bool(NUMBER_PROPERTIES[n] & NUM_POWER_OF_2) == is_power_of_2(n)
+
+    def test_number_masks(self):
+        """交是所有数字都有的性质，并是至少一个数字有的性质"""
+        from fan_calculator.fan_base import (
+            number_masks, NUM_EVEN, NUM_POWER_OF_2, NUM_ONE_DIGIT, NUM_TWO, NUM_COMPOSITE,
+        )
+
+        all_of, any_of = number_masks([2, 4, 16])
+        assert all_of & NUM_EVEN and all_of & NUM_POWER_OF_2
+        assert not all_of & NUM_ONE_DIGIT and any_of & NUM_TWO and any_of & NUM_COMPOSITE
+        assert number_masks([]) == (0, 0)
+
+
+# ============================================================
+# 批量计算番数测试 (TestFanBatch)
+# ============================================================
+
+class TestFanBatch:
+    """测试按列计算基于数字和牌面信息的番种"""
+
+    HANDS = TestFanThreshold.HANDS + [
+        "11d + 0 11 / 13 x 1 13d / 14 + 1 15 / 14 + 1 [15]",
+        "20 + 20 40 / 20 + 20 40 / 20 + 20 40 / 20 + 20 [40]",
+    ]
+
+    def test_matches_calculate(self):
+        """结果（包括数量、原因和被排除的番种）与逐手计算相同"""
+        from calculator_base.parser import parse_mode1_already_won
+        from fan_calculator.fan_batch import calculate_batch, NUMPY_AVAILABLE
+        from fan_calculator.fan_calculator import calculate_fan
+
+        if not NUMPY_AVAILABLE:
+            pytest.skip("未安装 NumPy")
+
+        hands = [parse_mode1_already_won(hand_str) for hand_str in self.HANDS]
+        for hand, batch_result in zip(hands, calculate_batch(hands)):
+            expected = calculate_fan(hand)
+            assert ([(repr(r), r.count, r.reason) for r in batch_result.results]
+                    == [(repr(r), r.count, r.reason) for r in expected.results])
+            assert batch_result.excluded == expected.excluded
+
+    def test_tables_built_once(self, monkeypatch):
+        """多线程同时第一次使用时查找表只构建一次，且构建完整"""
+        from concurrent.futures import ThreadPoolExecutor
+        from fan_calculator import fan_batch
+
+        if not fan_batch.NUMPY_AVAILABLE:
+            pytest.skip("未安装 NumPy")
+
+        monkeypatch.setattr(fan_batch, '_TABLES', None)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            tables = list(pool.map(lambda _: fan_batch._tables(), range(8)))
+        assert all(table is tables[0] for table in tables)
+        assert 'rare_ids' in tables[0]
+
+    def test_column_fans(self):
+        """直接对牌编号数组按列计算"""
+        from calculator_base.constants import TILE_TO_ID
+        from fan_calculator.fan_base import FanType
+        from fan_calculator.fan_batch import column_fans, NUMPY_AVAILABLE
+
+        if not NUMPY_AVAILABLE:
+            pytest.skip("未安装 NumPy")
+
+        ids = [[TILE_TO_ID[v] for v in (4, '×', 4, 16, 4, '×', 2, 8)] + [-1] * 8,
+               [TILE_TO_ID[v] for v in (20, '+', 20, 40, 20, '+', 20, 40)] + [-1] * 8]
+        fans = column_fans(ids)
+        assert list(fans[FanType.QUAN_ER_MI]) == [1, 0]
+        assert list(fans[FanType.QUAN_OU_SHU]) == [1, 1]
+        assert list(fans[FanType.QUAN_DUO_BEI]) == [0, 20]
+        assert list(fans[FanType.YANG_YANG]) == [0, 3]
+
+
+# ============================================================
+# 批量算式判定测试 (TestFormulaBatch)
+# ============================================================
+
+class TestFormulaBatch:
+    """测试对 (N, 4) 牌编号数组的向量化算式判定"""
+
+    ROWS = [
+        ['+', 1, 9, 10],
+        [10, 1, '+', 9],
+        ['+', 1, 2, 3],
+        [3, '∧', 2, 9],
+        [2, '∧', 30, 1],
+        [5, 5, 5, 5],
+        ['+', '×', 2, 4],
+        ['joker_tiao', '+', 9, 10],  # 万用牌代替 1
+    ]
+
+    def test_matches_is_valid_formula(self):
+        """结果与 is_valid_formula 相同，算式编号指向标准形式"""
+        from calculator_base.constants import TILE_TO_ID
+        from calculator_base.formula_batch import validate_formulas, NUMPY_AVAILABLE
+        from calculator_base.formula_table import get_formula_table, formula_key
+        from calculator_base.mahjong_checker import ArithmeticMahjong
+
+        if not NUMPY_AVAILABLE:
+            pytest.skip("未安装 NumPy")
+
+        ids = [[TILE_TO_ID[tile] for tile in row] for row in self.ROWS]
+        for require_sum_gte_10 in (True, False):
+            mjong = ArithmeticMahjong(require_sum_gte_10)
+            table = get_formula_table(require_sum_gte_10)
+            valid, formula_ids = validate_formulas(ids, require_sum_gte_10, resolve_jokers=True)
+            for row, ok, formula_id in zip(self.ROWS, valid, formula_ids):
+                assert ok == mjong.is_valid_formula(row)
+                if ok and 'joker_tiao' not in row:
+                    assert table[formula_id] == formula_key(row)
+                if not ok:
+                    assert formula_id == -1
+
+    def test_tables_built_once(self, monkeypatch):
+        """多线程同时第一次使用时每张表只构建一次"""
+        from concurrent.futures import ThreadPoolExecutor
+        from calculator_base import formula_batch
+
+        if not formula_batch.NUMPY_AVAILABLE:
+            pytest.skip("未安装 NumPy")
+
+        monkeypatch.setattr(formula_batch, '_TABLES', {})
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: (formula_batch._power_table(),
+                                               formula_batch._formula_codes(True)), range(8)))
+        assert all(power is results[0][0] and codes is results[0][1] for power, codes in results)
+
+    def test_jokers_need_resolution(self):
+        """不展开万用牌时有万用牌的行都不合法"""
+        from calculator_base.constants import TILE_TO_ID
+        from calculator_base.formula_batch import validate_formulas, NUMPY_AVAILABLE
+
+        if not NUMPY_AVAILABLE:
+            pytest.skip("未安装 NumPy")
+
+        valid, formula_ids = validate_formulas([[TILE_TO_ID[tile] for tile in self.ROWS[-1]]])
+        assert not valid[0] and formula_ids[0] == -1
+
+
+# ============================================================
+# 对局中手牌状态测试 (TestHandState)
+# ============================================================
+
+class TestHandState:
+    """测试摸牌/打牌时增量维护的听牌"""
+
+    HAND = "1 + 9 10 2 x 3 6 5 5 5 5 2 ^ 3"
+
+    @pytest.mark.parametrize("hand_str", [
+        HAND,
+        "1 2 3 4 5 6 7 7 7 8 8 8 11 11 12",
+        "1 2 0 4 5 6 7 7 7 8 8 8 11 11 筒",
+    ])
+    def test_waits_match_iter_ready(self, standard_mahjong, hand_str):
+        """各种胡牌类型的听牌与 iter_ready 相同（传统麻将按花色计算）"""
+        from calculator_base.hand_state import HandState
+
+        hand = parse_hand(hand_str)
+        expected = {}
+        for win_type, tile, _ in standard_mahjong.iter_ready(hand):
+            expected.setdefault(win_type, set()).add(tile)
+        state = HandState(hand, standard_mahjong)
+        assert {win_type: set(tiles) for win_type, tiles in state.waits.items()} == expected
+
+    def test_draw_and_discard(self, standard_mahjong):
+        """摸到听的牌能胡；摸切后听牌不变；换牌后听牌更新"""
+        from calculator_base.hand_state import HandState
+
+        state = HandState(parse_hand(self.HAND), standard_mahjong)
+        waits = state.waits
+        assert state.draw(8) == ['算术麻将']
+        assert state.discard(8) == waits
+
+        assert state.draw(7) == []
+        assert state.discard(1) == {'算术麻将': [3, 12, 17]}
+        groups = state.wait_groups('算术麻将', 12)
+        assert sorted((t for group in groups for t in group), key=tile_sort_key) == \
+            sorted(state.tiles + [12], key=tile_sort_key)
+        assert state.wait_groups('算术麻将', 8) is None
+        with pytest.raises(ValueError):
+            state.discard(7)
+
+    def test_incremental_arith_waits(self, standard_mahjong):
+        """随机摸打时增量维护的算术麻将听牌与重新搜索的结果相同"""
+        import random
+        from calculator_base.hand_state import HandState
+        from calculator_base.hand_generator import generate_hands, build_wall
+        from calculator_base.discard_advisor import SharedPartitioner
+
+        rng = random.Random(1)
+        partitioner = SharedPartitioner(standard_mahjong)
+        for hand in generate_hands(6, size=15, seed=2, joker_rate=0.1, use_numpy=False):
+            state = HandState(list(hand), standard_mahjong, check_traditional=False)
+            wall = build_wall()
+            for tile in hand:
+                wall.remove(tile)
+            rng.shuffle(wall)
+            for _ in range(8):
+                assert set(state.waits.get('算术麻将', ())) == partitioner.waits(state.tiles)
+                state.draw(wall.pop())
+                state.discard(rng.choice(state.tiles))
+
+    def test_live_waits(self, standard_mahjong):
+        """剩余张数计入场上可见的牌"""
+        from calculator_base.hand_state import HandState
+
+        state = HandState(parse_hand(self.HAND), standard_mahjong)
+        assert state.live_waits()[8] == ('available', 2)
+        state.see(8, 8)
+        assert state.live_waits()[8][1] < 2